@@ -0,0 +1,162 @@
+# performance_appraisal/authentication.py
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Role, User
+from .versioning import table_versions
+
+
+# Claims copied from the user into every token (see add_authorization_claims)
+AUTHORIZATION_CLAIMS = ['role_id', 'role', 'department_id', 'is_staff', 'is_superuser', 'is_active', 'auth_at']
+
+
+def _timestamp(moment):
+    return moment.timestamp() if moment is not None else 0
+
+
+def add_authorization_claims(token, user):
+    """
+    Copies what the permission checks need (role, department and the admin flags) into a token,
+    so requests made with it are authorized without loading the user. `auth_at` records the
+    authorization the claims were taken from; tokens older than a later change are rejected.
+    """
+    token['role_id'] = user.role_id
+    token['role'] = user.role_name
+    token['department_id'] = user.department_id
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['is_active'] = user.is_active
+    token['auth_at'] = _timestamp(user.authorization_changed_at)
+    return token
+
+
+def principal_from_claims(token):
+    """
+    Builds the request's user from the token alone: a User with only the claimed fields loaded
+    (any other field is fetched on first access) and its role already attached.
+    """
+    user = User.from_db(
+        DEFAULT_DB_ALIAS,
+        ['id', 'is_staff', 'is_superuser', 'is_active', 'department_id', 'role_id'],
+        [
+            token[api_settings.USER_ID_CLAIM], token['is_staff'], token['is_superuser'],
+            # Tokens issued before the claim was added were only ever issued to active users
+            token.get('is_active', True), token['department_id'], token['role_id'],
+        ],
+    )
+    if token['role_id'] is not None:
+        user.role = Role.from_db(DEFAULT_DB_ALIAS, ['id', 'role_name'], [token['role_id'], token['role']])
+    return user
+
+
+# --- Recent authorization changes ---
+# {user_id: authorization_changed_at timestamp} for the changes that could still be contradicted
+# by an unexpired access token. Changes made by this process are recorded at once (see
+# winas.signals); changes made by other processes are picked up when the map is reloaded, at most
+# AUTH_CLAIMS_RECHECK_SECONDS (default 5) after they were made.
+#
+# The ids of the existing users are kept too, reloaded only when the user table changed, so the
+# tokens of deleted users are rejected without loading the user on every request.
+
+_changes_lock = threading.Lock()
+_changes = {}
+_changes_loaded_at = None
+_user_ids = set()
+_user_ids_version = None
+_missing_user_ids = set()
+
+
+def authorization_changes():
+    global _changes, _changes_loaded_at, _user_ids, _user_ids_version, _missing_user_ids
+    recheck = getattr(settings, 'AUTH_CLAIMS_RECHECK_SECONDS', 5)
+    if _changes_loaded_at is not None and time.monotonic() - _changes_loaded_at < recheck:
+        return _changes
+    with _changes_lock:
+        if _changes_loaded_at is None or time.monotonic() - _changes_loaded_at >= recheck:
+            since = timezone.now() - api_settings.ACCESS_TOKEN_LIFETIME
+            _changes = {
+                user_id: _timestamp(changed_at)
+                for user_id, changed_at in User.objects.filter(authorization_changed_at__gt=since)
+                .values_list('id', 'authorization_changed_at')
+            }
+            # The version is read first: a user created meanwhile is looked up by user_exists
+            versions, _ = table_versions([User])
+            if versions != _user_ids_version:
+                _user_ids = set(User.objects.values_list('id', flat=True))
+                _user_ids_version = versions
+            _missing_user_ids = set()
+            _changes_loaded_at = time.monotonic()
+    return _changes
+
+
+def user_exists(user_id):
+    """
+    Whether the user still exists, from the loaded ids. Users created since the last reload are
+    looked up; users found missing are remembered until the next reload.
+    """
+    if user_id in _user_ids:
+        return True
+    if user_id in _missing_user_ids:
+        return False
+    exists = User.objects.filter(pk=user_id).exists()
+    with _changes_lock:
+        (_user_ids if exists else _missing_user_ids).add(user_id)
+    return exists
+
+
+def record_authorization_change(user):
+    record_authorization_changes([user.pk], user.authorization_changed_at)
+
+
+def record_authorization_changes(user_ids, changed_at):
+    with _changes_lock:
+        for user_id in user_ids:
+            _changes[user_id] = _timestamp(changed_at)
+
+
+def record_user_deletions(user_ids):
+    with _changes_lock:
+        for user_id in user_ids:
+            _user_ids.discard(user_id)
+            _missing_user_ids.add(user_id)
+
+
+def reset_authorization_changes():
+    """Forgets the loaded changes and user ids, so the next request reloads them."""
+    global _changes, _changes_loaded_at, _user_ids, _user_ids_version, _missing_user_ids
+    with _changes_lock:
+        _changes, _changes_loaded_at = {}, None
+        _user_ids, _user_ids_version, _missing_user_ids = set(), None, set()
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that authorizes from the token's claims instead of loading the user and
+    their role on every request. Tokens issued before the user's role, department or access
+    flags last changed are rejected, so the user has to sign in again to get current claims, and so
+    are the tokens of deleted users.
+    Tokens without claims (issued before they were added) load the user as before.
+    """
+
+    def get_user(self, validated_token):
+        if 'auth_at' not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise AuthenticationFailed("Token contained no recognizable user identification", code="token_not_valid")
+
+        if authorization_changes().get(user_id, 0) > validated_token['auth_at']:
+            raise AuthenticationFailed(
+                "Your role or department has changed. Please sign in again.", code="authorization_changed"
+            )
+        if not user_exists(user_id):
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        return principal_from_claims(validated_token)
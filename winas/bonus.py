@@ -0,0 +1,228 @@
+# performance_appraisal/bonus.py
+import hashlib
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, FilteredRelation, Max, Q, Sum
+from django.utils import timezone
+
+from .jobs import claim_next_job, renew_claim
+from .models import Department, Role, User, EmployeePerformance, SoftSkillRating, BonusRun, BonusResult, SECTION_CHOICES
+from .scoring import ScoringModel
+from .summaries import SUMMARY_SCORE_FIELDS, summary_scores
+from .versioning import table_versions
+from .utils import consistent_snapshot
+
+
+class BonusCalculationError(Exception):
+    """
+    Raised when a bonus run cannot be computed at all (as opposed to per-employee warnings).
+    """
+    pass
+
+
+def iter_bonuses(total_bonus_pool, period_id):
+    """
+    Calculates the bonus of every active employee for a period, returning an iterator
+    of result dicts, one per active user.
+
+    Problems that make the whole run impossible raise BonusCalculationError right away;
+    the scores are only computed once the iterator is consumed, and users are read
+    through a server-side cursor, so rows can be streamed to the client as they come.
+
+    Runs two queries regardless of head count: one salary aggregate and one pass over
+    the users with their department, role and PeriodScoreSummary joined in. Scores are
+    calculated in Decimal from the summaries' exact sums and section shares.
+    """
+    all_eligible_users = User.objects.filter(is_active=True)
+
+    sum_of_all_staff_annual_salary = all_eligible_users.aggregate(
+        total_annual_salary=Sum('annual_salary')
+    )['total_annual_salary']
+
+    if not sum_of_all_staff_annual_salary or sum_of_all_staff_annual_salary == Decimal('0.00'):
+        raise BonusCalculationError(
+            "Sum of all staff annual salaries is zero or not found. Cannot calculate bonus."
+        )
+
+    return _bonus_rows(total_bonus_pool, period_id, all_eligible_users, sum_of_all_staff_annual_salary)
+
+
+def _bonus_rows(total_bonus_pool, period_id, all_eligible_users, sum_of_all_staff_annual_salary):
+    # Every user's period score summary is LEFT JOINed in, so scores, salary, department
+    # and role all arrive in one pass over a server-side cursor.
+    users = all_eligible_users.select_related('department', 'role').annotate(
+        period_summary=FilteredRelation(
+            'score_summaries', condition=Q(score_summaries__period_id=period_id)
+        ),
+        **{f'summary_{field}': F(f'period_summary__{field}') for field in SUMMARY_SCORE_FIELDS}
+    ).order_by('id')
+
+    for user in users.iterator(chunk_size=2000):
+        if user.summary_strategic_share is None: # No performance records or ratings in the period
+            section_scores, total_employee_score = {'strategic': Decimal('0.00'), 'soft_skill': Decimal('0.00')}, Decimal('0.00')
+        else:
+            section_scores, total_employee_score = summary_scores(
+                {field: getattr(user, f'summary_{field}') for field in SUMMARY_SCORE_FIELDS}
+            )
+
+        performance_rating = total_employee_score
+
+        employee_bonus = Decimal('0.00')
+        warning_message = None
+
+        if user.annual_salary is None:
+            warning_message = f"User {user.username} has no annual salary defined, skipping bonus calculation for them."
+        else:
+            try:
+                employee_bonus = (user.annual_salary / sum_of_all_staff_annual_salary) * \
+                                 (performance_rating * total_bonus_pool)
+            except Exception as e:
+                warning_message = f"Error calculating bonus for {user.username}: {e}"
+                employee_bonus = Decimal('0.00')
+
+        yield {
+            'user_id': user.id,
+            'username': user.username,
+            'employee_name': user.get_full_name(),
+            'department': user.department.department_name if user.department else None,
+            'role': user.role.role_name if user.role else None,
+            'annual_salary': user.annual_salary,
+            'strategic_score': round(section_scores['strategic'], 2),
+            'soft_skill_score': round(section_scores['soft_skill'], 2),
+            'total_employee_score': round(total_employee_score, 2),
+            'performance_rating': round(performance_rating, 2),
+            'calculated_bonus': round(employee_bonus, 2),
+            'warnings': warning_message
+        }
+
+
+def calculate_bonuses(total_bonus_pool, period_id):
+    """
+    Returns the list of bonus results for every active employee in a period.
+    """
+    return list(iter_bonuses(total_bonus_pool, period_id))
+
+
+# Keys of a bonus result dict, in output order
+BONUS_RESULT_FIELDS = [
+    'user_id', 'username', 'employee_name', 'department', 'role', 'annual_salary',
+    'strategic_score', 'soft_skill_score', 'total_employee_score', 'performance_rating',
+    'calculated_bonus', 'warnings'
+]
+
+# Number of result rows written per batch while a stored run is being executed
+RESULT_BATCH_SIZE = 500
+
+
+def input_fingerprint(total_bonus_pool, period_id):
+    """
+    Returns a checksum of the bonus parameters and of every input the calculation reads
+    (active salaries, the period's performance and soft-skill rows and the scoring
+    hierarchy) or copies into its results (names, departments and roles, through the version
+    stamps of their tables). Two runs with the same fingerprint produce the same results.
+    """
+    users = User.objects.filter(is_active=True).aggregate(
+        count=Count('id'), max_id=Max('id'), salary=Sum('annual_salary'),
+        checksum=Sum(F('id') * F('annual_salary')),
+    )
+    # Which section each row is scored in
+    section_checksums = {
+        f'{section}_ids': Sum('id', filter=Q(section=section)) for section, _ in SECTION_CHOICES
+    }
+    performances = EmployeePerformance.objects.filter(period_id=period_id).aggregate(
+        count=Count('id'), max_id=Max('id'), weight=Sum('target_weight'),
+        w_avg=Sum('weighted_average'), checksum=Sum(F('user_id') * F('weighted_average')),
+        **section_checksums,
+    )
+    ratings = SoftSkillRating.objects.filter(period_id=period_id).aggregate(
+        count=Count('id'), max_id=Max('id'), weight=Sum('weight'),
+        w_avg=Sum('weighted_average'), checksum=Sum(F('user_id') * F('weighted_average')),
+        **section_checksums,
+    )
+    # Names, departments and roles cannot be summed; any edit of those tables bumps their stamps
+    versions, _ = table_versions([User, Department, Role])
+    # The pool as stored on the run (2 places), so a claimed run reproduces its request's fingerprint
+    parts = [
+        str(Decimal(total_bonus_pool).quantize(Decimal('0.01'))), str(period_id),
+        ScoringModel().fingerprint(), repr(sorted(versions.items())),
+    ]
+    for aggregates in (users, performances, ratings):
+        parts.extend(str(aggregates[key]) for key in sorted(aggregates))
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def request_bonus_run(total_bonus_pool, period_id, requested_by=None):
+    """
+    Returns (run, created). An existing completed, queued or running run over identical
+    inputs is reused; otherwise a new run is queued for the worker. A running run whose worker
+    died is taken over by another worker once its claim expires (see winas.jobs).
+    """
+    fingerprint = input_fingerprint(total_bonus_pool, period_id)
+    existing = BonusRun.objects.filter(
+        input_fingerprint=fingerprint,
+        status__in=[BonusRun.STATUS_COMPLETED, BonusRun.STATUS_QUEUED, BonusRun.STATUS_RUNNING],
+    ).order_by('-created_at').first()
+    if existing:
+        return existing, False
+
+    run = BonusRun.objects.create(
+        total_bonus_pool=total_bonus_pool,
+        period_id=period_id,
+        input_fingerprint=fingerprint,
+        requested_by=requested_by,
+    )
+    return run, True
+
+
+def claim_next_bonus_run():
+    """Claims the oldest queued run, or a running one left behind by a dead worker; None when there is none."""
+    return claim_next_job(BonusRun)
+
+
+def execute_bonus_run(run):
+    """
+    Calculates a claimed run and stores its per-employee results.
+
+    All inputs are read inside one consistent snapshot, so concurrent edits cannot
+    produce a half-old, half-new result set. Results are then written in batches,
+    updating the run's progress after each one so clients can poll it. Each batch renews the
+    worker's claim on the run; a worker whose claim expired meanwhile stops, leaving the run to
+    the worker that took it over.
+    """
+    try:
+        with consistent_snapshot():
+            fingerprint = input_fingerprint(run.total_bonus_pool, run.period_id)
+            bonus_results = calculate_bonuses(run.total_bonus_pool, run.period_id)
+    except BonusCalculationError as e:
+        run.status = BonusRun.STATUS_FAILED
+        run.error = str(e)
+        run.completed_at = timezone.now()
+        run.save(update_fields=['status', 'error', 'completed_at'])
+        return run
+
+    if not renew_claim(run):
+        run.refresh_from_db()
+        return run
+    run.input_fingerprint = fingerprint
+    run.total_employees = len(bonus_results)
+    run.processed_employees = 0
+    run.save(update_fields=['input_fingerprint', 'total_employees', 'processed_employees'])
+    run.results.all().delete() # A re-executed run starts from a clean slate
+
+    for start in range(0, len(bonus_results), RESULT_BATCH_SIZE):
+        batch = bonus_results[start:start + RESULT_BATCH_SIZE]
+        with transaction.atomic():
+            if not renew_claim(run):
+                run.refresh_from_db()
+                return run
+            BonusResult.objects.bulk_create([
+                BonusResult(run=run, **result) for result in batch
+            ])
+            run.processed_employees = start + len(batch)
+            run.save(update_fields=['processed_employees'])
+
+    run.status = BonusRun.STATUS_COMPLETED
+    run.completed_at = timezone.now()
+    run.save(update_fields=['status', 'completed_at'])
+    return run
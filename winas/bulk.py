@@ -0,0 +1,375 @@
+# performance_appraisal/bulk.py
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import F
+from django.utils.crypto import get_random_string
+
+from .models import (
+    Department, Role, User, KeyResultArea, KPI, PerformanceTarget, EmployeePerformance, SoftSkillRating,
+    AppraisalPeriod, normalize_period_label, target_value_cents
+)
+from .serializers import (
+    AppraisalPeriodField, EmployeePerformanceRowSerializer, SoftSkillRatingGridSerializer, SoftSkillRatingGridRowSerializer, OnboardingRowSerializer
+)
+from .summaries import refresh_score_summaries
+from .utils import queue_password_emails
+from .versioning import bump_table_versions
+
+
+BULK_MAX_ROWS = 500
+BULK_BATCH_SIZE = 500
+
+DOES_NOT_EXIST = 'Invalid pk "{pk}" - object does not exist.'
+PERIOD_DOES_NOT_EXIST = AppraisalPeriodField.default_error_messages['does_not_exist']
+
+
+class BulkUploadError(Exception):
+    """
+    Raised when a bulk upload is rejected; nothing is written. `rows` lists the offending
+    records as {'row': index in the upload, 'errors': {field: [messages]}}.
+    """
+    def __init__(self, message, rows=()):
+        super().__init__(message)
+        self.rows = list(rows)
+
+
+def _validated_rows(rows, row_serializer_class):
+    """Validates the shape of every row without touching the database; returns (valid, errors) by index."""
+    if not isinstance(rows, list) or not rows:
+        raise BulkUploadError("Expected a non-empty list of records.")
+    if len(rows) > BULK_MAX_ROWS:
+        raise BulkUploadError(f"At most {BULK_MAX_ROWS} records can be uploaded at once, got {len(rows)}.")
+
+    valid, errors = {}, {}
+    for index, row in enumerate(rows):
+        serializer = row_serializer_class(data=row)
+        if serializer.is_valid():
+            valid[index] = serializer.validated_data
+        else:
+            errors[index] = dict(serializer.errors)
+    return valid, errors
+
+
+def _reject(errors, total):
+    """Raises a BulkUploadError for the rows in `errors` ({index: {field: [messages]}}), if any."""
+    if errors:
+        raise BulkUploadError(
+            f"{len(errors)} of {total} records are invalid; nothing was saved.",
+            [{'row': index, 'errors': errors[index]} for index in sorted(errors)],
+        )
+
+
+def _department_scope(requested_by):
+    """The department a supervisor may upload for; None for admins (and management commands), who may upload for anyone."""
+    if requested_by is None or requested_by.is_staff or requested_by.is_superuser:
+        return None
+    return requested_by.department_id
+
+
+def create_performance_records(rows, requested_by):
+    """
+    Validates and inserts many EmployeePerformance records in one transaction.
+
+    Users, targets, KPIs, periods and already existing (user, kpi, period) records are each read once
+    for the whole upload; each record copies its target's value and weight, from which the database
+    derives its scores as it inserts them. Any invalid row rejects the whole upload with a BulkUploadError listing every
+    offending row. Returns the created records.
+    """
+    valid, errors = _validated_rows(rows, EmployeePerformanceRowSerializer)
+
+    user_ids = {data['user'] for data in valid.values()}
+    target_ids = {data['performance_target'] for data in valid.values()}
+    kpi_ids = {data['kpi'] for data in valid.values() if data.get('kpi') is not None}
+    labels = {normalize_period_label(data['period_under_review']) for data in valid.values()}
+
+    periods = dict(AppraisalPeriod.objects.filter(label__in=labels).values_list('label', 'id'))
+    departments = dict(User.objects.filter(pk__in=user_ids).values_list('id', 'department_id'))
+    targets = {
+        row['id']: row for row in PerformanceTarget.objects.filter(pk__in=target_ids)
+        .values('id', 'target_value', 'weight', section=F('kra__pillar__section'))
+    }
+    kpis = set(KPI.objects.filter(pk__in=kpi_ids).values_list('id', flat=True))
+    taken = set(
+        EmployeePerformance.objects.filter(user_id__in=user_ids, kpi_id__in=kpis, period_id__in=periods.values())
+        .values_list('user_id', 'kpi_id', 'period_id')
+    ) if kpis else set()
+
+    scope = _department_scope(requested_by)
+    for index, data in valid.items():
+        row_errors = {}
+        if data['user'] not in departments:
+            row_errors['user'] = [DOES_NOT_EXIST.format(pk=data['user'])]
+        elif scope is not None and departments[data['user']] != scope:
+            row_errors['user'] = ["You can only create performance records for employees in your department."]
+        if data['performance_target'] not in targets:
+            row_errors['performance_target'] = [DOES_NOT_EXIST.format(pk=data['performance_target'])]
+        period = data['period'] = periods.get(normalize_period_label(data['period_under_review']))
+        if period is None:
+            row_errors['period_under_review'] = [PERIOD_DOES_NOT_EXIST.format(value=data['period_under_review'])]
+        kpi = data.get('kpi')
+        if kpi is not None:
+            if kpi not in kpis:
+                row_errors['kpi'] = [DOES_NOT_EXIST.format(pk=kpi)]
+            elif period is not None:
+                # unique_together = (user, kpi, period), against the table and earlier rows
+                key = (data['user'], kpi, period)
+                if key in taken:
+                    row_errors['non_field_errors'] = ["The fields user, kpi, period_under_review must make a unique set."]
+                taken.add(key)
+        if row_errors:
+            errors[index] = row_errors
+    _reject(errors, len(rows))
+
+    records = [
+        EmployeePerformance(
+            user_id=data['user'],
+            performance_target_id=data['performance_target'],
+            kpi_id=data.get('kpi'),
+            period_id=data['period'],
+            actual_achievement=data['actual_achievement'],
+            actual_rating=data.get('actual_rating'),
+            comments=data.get('comments'),
+            target_value_cents=target_value_cents(targets[data['performance_target']]['target_value']),
+            target_weight=targets[data['performance_target']]['weight'],
+            section=targets[data['performance_target']]['section'],
+        )
+        for data in (valid[index] for index in sorted(valid))
+    ]
+
+    # bulk_create sends no signals: refresh the summaries and version stamps the saves would have
+    with transaction.atomic():
+        EmployeePerformance.objects.bulk_create(records, batch_size=BULK_BATCH_SIZE)
+        refresh_score_summaries({(record.user_id, record.period_id) for record in records})
+        bump_table_versions(EmployeePerformance)
+    return records
+
+
+# The columns a grid cell writes (weighted_average follows from rating and weight in the database)
+SOFT_SKILL_GRID_FIELDS = ['soft_skill_kra_id', 'rating', 'weight', 'section', 'comments']
+
+
+def upsert_soft_skill_ratings(grid, requested_by):
+    """
+    Writes a grid of soft skill ratings for one period: each cell creates or replaces the rating
+    of a (user, soft_skill_kpi, period), the model's unique key.
+
+    The grid is validated against users, KPIs and KRAs read once, the stored ratings of its keys
+    are read with one query, and only the cells that differ from them are written, with a single
+    INSERT ... ON CONFLICT DO UPDATE (PostgreSQL and SQLite both support it). Returns a dict with
+    the number of created, updated and unchanged ratings.
+    """
+    header = SoftSkillRatingGridSerializer(data=grid)
+    header.is_valid(raise_exception=True)
+    period = header.validated_data['period_under_review']
+    department = header.validated_data.get('department')
+    rows = grid.get('ratings')
+    valid, errors = _validated_rows(rows, SoftSkillRatingGridRowSerializer)
+
+    user_ids = {data['user'] for data in valid.values()}
+    kpi_ids = {data['soft_skill_kpi'] for data in valid.values()}
+    kra_ids = {data['soft_skill_kra'] for data in valid.values() if data.get('soft_skill_kra') is not None}
+
+    departments = dict(User.objects.filter(pk__in=user_ids).values_list('id', 'department_id'))
+    kpis = {
+        row['id']: row for row in KPI.objects.filter(pk__in=kpi_ids)
+        .values('id', 'kra_id', 'weight', section=F('kra__pillar__section'))
+    }
+    kras = dict(KeyResultArea.objects.filter(pk__in=kra_ids).values_list('id', 'pillar__section'))
+
+    scope = _department_scope(requested_by)
+    cells = {}
+    for index, data in valid.items():
+        row_errors = {}
+        user_department = departments.get(data['user'], False)
+        if user_department is False:
+            row_errors['user'] = [DOES_NOT_EXIST.format(pk=data['user'])]
+        elif scope is not None and user_department != scope:
+            row_errors['user'] = ["You can only rate employees in your department."]
+        elif department is not None and user_department != department:
+            row_errors['user'] = [f"The employee is not in department {department}."]
+        kpi = kpis.get(data['soft_skill_kpi'])
+        if kpi is None:
+            row_errors['soft_skill_kpi'] = [DOES_NOT_EXIST.format(pk=data['soft_skill_kpi'])]
+        kra_id = data.get('soft_skill_kra')
+        if kra_id is not None and kra_id not in kras:
+            row_errors['soft_skill_kra'] = [DOES_NOT_EXIST.format(pk=kra_id)]
+        key = (data['user'], data['soft_skill_kpi'])
+        if key in cells:
+            row_errors['non_field_errors'] = [f"Row {cells[key][0]} already rates this employee on this KPI."]
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            cells[key] = (index, data, kpi)
+    _reject(errors, len(rows))
+
+    cells = list(cells.values())
+    weights = [data['weight'] if data.get('weight') is not None else kpi['weight'] for _, data, kpi in cells]
+    ratings = [
+        SoftSkillRating(
+            user_id=data['user'],
+            soft_skill_kpi_id=data['soft_skill_kpi'],
+            soft_skill_kra_id=data['soft_skill_kra'] if data.get('soft_skill_kra') is not None else kpi['kra_id'],
+            section=kras[data['soft_skill_kra']] if data.get('soft_skill_kra') is not None else kpi['section'],
+            period=period,
+            rating=data['rating'],
+            weight=weight,
+            comments=data.get('comments'),
+        )
+        for (_, data, kpi), weight in zip(cells, weights)
+    ]
+
+    with transaction.atomic():
+        stored = {
+            (row['user_id'], row['soft_skill_kpi_id']): row
+            for row in SoftSkillRating.objects.select_for_update()
+            .filter(period=period, user_id__in=user_ids, soft_skill_kpi_id__in=kpi_ids)
+            .values('user_id', 'soft_skill_kpi_id', *SOFT_SKILL_GRID_FIELDS)
+        }
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+        changed = []
+        for rating in ratings:
+            current = stored.get((rating.user_id, rating.soft_skill_kpi_id))
+            if current is None:
+                counts['created'] += 1
+            elif all(current[field] == getattr(rating, field) for field in SOFT_SKILL_GRID_FIELDS):
+                counts['unchanged'] += 1
+                continue
+            else:
+                counts['updated'] += 1
+            changed.append(rating)
+
+        if changed:
+            # bulk_create sends no signals: refresh the summaries and version stamps the saves would have
+            SoftSkillRating.objects.bulk_create(
+                changed,
+                batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['user', 'soft_skill_kpi', 'period'],
+                update_fields=[field.removesuffix('_id') for field in SOFT_SKILL_GRID_FIELDS],
+            )
+            refresh_score_summaries({(rating.user_id, period.id) for rating in changed})
+            bump_table_versions(SoftSkillRating)
+    return counts
+
+
+# --- Employee onboarding ---
+
+ONBOARDING_COLUMNS = ['email', 'first_name', 'last_name', 'employee_number', 'annual_salary', 'department']
+# Below this many passwords, starting worker processes costs more than hashing serially
+PARALLEL_HASHING_MIN_PASSWORDS = 16
+
+
+def parse_onboarding_csv(content):
+    """Reads onboarding rows from CSV text with a header line; empty cells are left out."""
+    reader = csv.DictReader(io.StringIO(content))
+    missing = [column for column in ONBOARDING_COLUMNS[:-1] if column not in (reader.fieldnames or [])]
+    if missing:
+        raise BulkUploadError(f"The CSV file is missing the column(s): {', '.join(missing)}.")
+    return [
+        {column: value.strip() for column, value in row.items() if column in ONBOARDING_COLUMNS and value and value.strip()}
+        for row in reader
+    ]
+
+
+def _setup_hashing_process():
+    # Worker processes that are spawned rather than forked start without Django configured
+    if not apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords):
+    """
+    Hashes many passwords with the configured hasher. PBKDF2 is deliberately slow, so large
+    batches are spread over ONBOARDING_HASH_WORKERS processes (default: one per CPU).
+    """
+    workers = getattr(settings, 'ONBOARDING_HASH_WORKERS', None) or os.cpu_count() or 1
+    if workers < 2 or len(passwords) < PARALLEL_HASHING_MIN_PASSWORDS:
+        return [make_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_setup_hashing_process) as executor:
+        return list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def onboard_employees(rows, requested_by=None):
+    """
+    Creates many employee accounts at once, all or nothing.
+
+    Every row is validated up front: duplicate emails, employee numbers and usernames (the part
+    of the email before the @, as for single accounts) are checked against the table with one
+    query each and against the other rows. Rows without a department join the department of
+    `requested_by`. Temporary passwords are hashed in parallel (see hash_passwords), the users
+    are inserted with bulk_create and their password emails are queued to be sent after the
+    commit. Returns the created users.
+    """
+    valid, errors = _validated_rows(rows, OnboardingRowSerializer)
+
+    emails = {data['email'] for data in valid.values()}
+    usernames = {data['email'].split('@')[0] for data in valid.values()}
+    numbers = {data['employee_number'] for data in valid.values()}
+    taken_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+    taken_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    taken_numbers = set(User.objects.filter(employee_number__in=numbers).values_list('employee_number', flat=True))
+    department_ids = {data.get('department') for data in valid.values()} - {None}
+    departments = set(Department.objects.filter(pk__in=department_ids).values_list('id', flat=True))
+
+    scope = _department_scope(requested_by)
+    default_department = requested_by.department_id if requested_by is not None else None
+    accepted = []
+    for index, data in valid.items():
+        row_errors = {}
+        email, username = data['email'], data['email'].split('@')[0]
+        if email in taken_emails:
+            row_errors['email'] = ["A user with this email already exists."]
+        elif username in taken_usernames:
+            row_errors['email'] = [f"A user with the username '{username}' (taken from the email) already exists."]
+        if data['employee_number'] in taken_numbers:
+            row_errors['employee_number'] = ["A user with this employee number already exists."]
+        department = data.get('department') or default_department
+        if department is None:
+            row_errors['department'] = ["This field is required."]
+        elif department not in departments and department != default_department:
+            row_errors['department'] = [DOES_NOT_EXIST.format(pk=department)]
+        elif scope is not None and department != scope:
+            row_errors['department'] = ["You can only onboard employees into your department."]
+        # Later rows must not repeat earlier ones either
+        taken_emails.add(email)
+        taken_usernames.add(username)
+        taken_numbers.add(data['employee_number'])
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            accepted.append((data, username, department))
+    _reject(errors, len(rows))
+
+    passwords = [get_random_string(length=12) for _ in accepted]
+    password_hashes = hash_passwords(passwords)
+    employee_role, _ = Role.objects.get_or_create(role_name='Employee')
+    users = [
+        User(
+            email=data['email'],
+            username=username,
+            password=password_hash,
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            employee_number=data['employee_number'],
+            annual_salary=data['annual_salary'],
+            department_id=department,
+            role=employee_role,
+            is_active=True,
+        )
+        for (data, username, department), password_hash in zip(accepted, password_hashes)
+    ]
+
+    # bulk_create sends no signals: bump the version stamp the saves would have
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=BULK_BATCH_SIZE)
+        bump_table_versions(User)
+        queue_password_emails(zip(users, passwords))
+    return users
@@ -0,0 +1,200 @@
+# performance_appraisal/consistency.py
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import EmployeePerformance, SoftSkillRating, target_value_cents
+from .summaries import refresh_score_summaries
+from .versioning import bump_table_versions
+
+
+CHECK_CHUNK_SIZE = 5000
+REPAIR_BATCH_SIZE = 1000
+# Row ids kept per mismatching field, to show where to look
+REPORT_SAMPLE_SIZE = 10
+
+
+def _performance_expectations(rows):
+    """The copies of the target as it is now."""
+    return {
+        'target_value_cents': [target_value_cents(row['current_target_value']) for row in rows],
+        'target_weight': [row['current_target_weight'] for row in rows],
+        'section': [row['current_section'] for row in rows],
+    }
+
+
+def _rating_expectations(rows):
+    return {
+        'section': [row['current_section'] for row in rows],
+    }
+
+
+class DerivedFieldCheck:
+    """
+    How the stored copies of one table are checked: the columns read per row, annotations
+    reading the hierarchy as it is now, and a function returning each copied field's expected
+    values for a list of rows. The generated score columns are not checked: the database
+    computes them from the copies, so they follow once the copies are repaired.
+    """
+
+    def __init__(self, model, columns, expectations, annotations=None):
+        self.model = model
+        self.columns = ['id', *columns]
+        self.annotations = annotations or {}
+        self.expectations = expectations
+
+    def read(self, after, upto):
+        """Returns the rows with after < pk <= upto (no upper bound when upto is None)."""
+        rows = self.model.objects.filter(pk__gt=after).order_by('pk')
+        if upto is not None:
+            rows = rows.filter(pk__lte=upto)
+        return list(rows.values(*self.columns, **self.annotations).iterator(chunk_size=CHECK_CHUNK_SIZE))
+
+
+CHECKS = {
+    'employee_performance': DerivedFieldCheck(
+        EmployeePerformance,
+        ['user_id', 'period_id', 'target_value_cents', 'target_weight', 'section'],
+        _performance_expectations,
+        annotations={
+            'current_target_value': F('performance_target__target_value'),
+            'current_target_weight': F('performance_target__weight'),
+            'current_section': F('performance_target__kra__pillar__section'),
+        },
+    ),
+    'soft_skill_ratings': DerivedFieldCheck(
+        SoftSkillRating,
+        ['user_id', 'period_id', 'section'],
+        _rating_expectations,
+        annotations={'current_section': F('soft_skill_kra__pillar__section')},
+    ),
+}
+
+
+class TableReport:
+    """What checking one table found: rows read, mismatches and sample ids per field, rows repaired."""
+
+    def __init__(self, name):
+        self.name = name
+        self.checked = 0
+        self.mismatches = {}
+        self.samples = {}
+        self.repaired = 0
+
+    def add(self, checked, mismatches):
+        self.checked += checked
+        for field, ids in mismatches.items():
+            self.mismatches[field] = self.mismatches.get(field, 0) + len(ids)
+            samples = self.samples.setdefault(field, [])
+            samples.extend(ids[:REPORT_SAMPLE_SIZE - len(samples)])
+
+
+def _pk_ranges(model, chunk_size):
+    """
+    Splits a table into consecutive (after, upto] primary key ranges of chunk_size rows, walking
+    the primary key index one boundary at a time; the last range has upto=None.
+    """
+    after = 0
+    while True:
+        boundary = list(
+            model.objects.filter(pk__gt=after).order_by('pk').values_list('pk', flat=True)[chunk_size - 1:chunk_size]
+        )
+        if not boundary:
+            yield after, None
+            return
+        yield after, boundary[0]
+        after = boundary[0]
+
+
+def _check_chunk(name, after, upto):
+    """
+    Reads one range of rows of a CHECKS table and compares their stored copies with the expected
+    values. Returns (rows checked, {field: [mismatching ids]}, repairs, keys): for every stale
+    row, repairs holds the expected values of all of its copied fields and keys its
+    (user_id, period_id). Runs in a worker process when several workers are used.
+    """
+    check = CHECKS[name]
+    rows = check.read(after, upto)
+    mismatches, repairs, keys = {}, {}, {}
+    expectations = check.expectations(rows) if rows else {}
+    for index, row in enumerate(rows):
+        stale = False
+        for field, expected_values in expectations.items():
+            if row[field] != expected_values[index]:
+                mismatches.setdefault(field, []).append(row['id'])
+                stale = True
+        if stale:
+            repairs[row['id']] = {field: values[index] for field, values in expectations.items()}
+            keys[row['id']] = (row['user_id'], row['period_id'])
+    return len(rows), mismatches, repairs, keys
+
+
+def _repair(check, repairs, keys):
+    """Writes the expected stored copies with batched bulk_update()s and rescores the rows' summaries."""
+    objs = [check.model(pk=pk, **values) for pk, values in repairs.items()]
+    fields = list(next(iter(repairs.values())))
+    with transaction.atomic():
+        check.model.objects.bulk_update(objs, fields, batch_size=REPAIR_BATCH_SIZE)
+        # bulk_update sends no signals: refresh the summaries and version stamps the saves would have
+        refresh_score_summaries(set(keys.values()))
+        bump_table_versions(check.model)
+    return len(objs)
+
+
+def check_derived_fields(tables=None, repair=False, workers=None, chunk_size=CHECK_CHUNK_SIZE):
+    """
+    Compares the copies of their target and pillar section that performance records and soft
+    skill ratings store (or only the CHECKS named in tables) with the hierarchy as it is now,
+    returning one TableReport per table.
+
+    Each table is read in primary key ranges of chunk_size rows, checked by CONSISTENCY_CHECK_WORKERS
+    processes (default: one per CPU) with at most two ranges per worker in flight, so memory stays
+    bounded whatever the table size. With repair=True, stale copies are rewritten by this process
+    as each range is checked.
+    """
+    if workers is None:
+        workers = getattr(settings, 'CONSISTENCY_CHECK_WORKERS', None) or os.cpu_count() or 1
+    reports = []
+    executor = None
+    if workers >= 2:
+        # Spawned rather than forked: a forked worker would share this process's database connection.
+        # A spawned worker starts without Django configured, and unpickling its initializer must not
+        # import this module (and the models) before django.setup() has run
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+        )
+    try:
+        for name in tables or CHECKS:
+            check = CHECKS[name]
+            report = TableReport(name)
+
+            def collect(result):
+                checked, mismatches, repairs, keys = result
+                report.add(checked, mismatches)
+                if repair and repairs:
+                    report.repaired += _repair(check, repairs, keys)
+
+            ranges = _pk_ranges(check.model, chunk_size)
+            if executor is None:
+                for after, upto in ranges:
+                    collect(_check_chunk(name, after, upto))
+            else:
+                pending = set()
+                for after, upto in ranges:
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            collect(future.result())
+                    pending.add(executor.submit(_check_chunk, name, after, upto))
+                for future in wait(pending).done:
+                    collect(future.result())
+            reports.append(report)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return reports
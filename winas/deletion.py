@@ -0,0 +1,253 @@
+# performance_appraisal/deletion.py
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    Pillar, KeyResultArea, KPI, PerformanceTarget, EmployeePerformance, SoftSkillRating, DeletionJob
+)
+from .hierarchy import invalidate_hierarchy_snapshot
+from .jobs import claim_next_job, renew_claim
+from .summaries import refresh_section_shares
+from .versioning import bump_table_versions
+from .utils import consistent_snapshot
+
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 1000
+
+# The objects a deletion job can remove, by DeletionJob.object_type
+DELETABLE_MODELS = {
+    DeletionJob.OBJECT_PILLAR: Pillar,
+    DeletionJob.OBJECT_KRA: KeyResultArea,
+}
+
+# The tables a deletion removes rows from, children first, with the name the plan reports them under
+DELETE_ORDER = [
+    (KPI, 'kpis'),
+    (PerformanceTarget, 'performance_targets'),
+    (KeyResultArea, 'key_result_areas'),
+    (Pillar, 'pillars'),
+]
+
+# The rows whose PROTECT foreign keys keep a deleted level of the hierarchy in place: for each
+# fact table, how a message names its rows and its field pointing at each level
+_PROTECTING_FIELDS = {
+    'employee_performance': (EmployeePerformance, "performance records", {KPI: 'kpi', PerformanceTarget: 'performance_target'}),
+    'soft_skill_ratings': (SoftSkillRating, "soft skill ratings", {KPI: 'soft_skill_kpi', KeyResultArea: 'soft_skill_kra'}),
+}
+
+
+class DeletionPlan:
+    """
+    What deleting a pillar or KRA removes: a queryset per table of the rows that cascade with it,
+    and how many fact rows protect them. Every queryset filters through subqueries, so counting and
+    deleting never load the cascaded rows; only the ids of the (few) cascaded pillars are read.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        pillar_ids = {root.pk} if isinstance(root, Pillar) else set()
+        root_kra = Q(pk=root.pk) if isinstance(root, KeyResultArea) else Q()
+        while True:
+            kras = KeyResultArea.objects.filter(root_kra | Q(pillar_id__in=pillar_ids))
+            targets = PerformanceTarget.objects.filter(kra__in=kras)
+            # Pillar.performance_target cascades too: a pillar pointing at a deleted target goes with it
+            cascaded = set(
+                Pillar.objects.filter(performance_target__in=targets).exclude(pk__in=pillar_ids).values_list('pk', flat=True)
+            )
+            if not cascaded:
+                break
+            pillar_ids |= cascaded
+        self.rows = {
+            KPI: KPI.objects.filter(kra__in=kras),
+            PerformanceTarget: targets,
+            KeyResultArea: kras,
+            Pillar: Pillar.objects.filter(pk__in=pillar_ids),
+        }
+        self.counts = {}
+        self.blocked_by = {}
+
+    def count(self):
+        """Counts the cascaded rows and the rows blocking them, one COUNT query per table, in one snapshot."""
+        with consistent_snapshot():
+            self.counts = {name: self.rows[model].count() for model, name in DELETE_ORDER}
+            self.blocked_by = {}
+            for name, (fact_model, _, fields) in _PROTECTING_FIELDS.items():
+                protected = Q()
+                for model, field in fields.items():
+                    protected |= Q(**{f'{field}__in': self.rows[model]})
+                self.blocked_by[name] = fact_model.objects.filter(protected).count()
+        return self
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def blocked(self):
+        return any(self.blocked_by.values())
+
+    def as_dict(self):
+        return {
+            'deletes': self.counts,
+            'total_rows': self.total,
+            'blocked_by': self.blocked_by,
+            'can_delete': not self.blocked,
+        }
+
+
+def plan_deletion(root):
+    """Returns the counted DeletionPlan of a pillar or KRA."""
+    return DeletionPlan(root).count()
+
+
+def blocked_message(plan):
+    parts = [f"{count} {_PROTECTING_FIELDS[name][1]}" for name, count in plan.blocked_by.items() if count]
+    return (
+        f"Cannot delete {plan.root} because {' and '.join(parts)} still refer to it or to the KPIs and "
+        "targets beneath it. Delete those records first or move them to a different KPI or target."
+    )
+
+
+def _object_type(root):
+    return next(object_type for object_type, model in DELETABLE_MODELS.items() if isinstance(root, model))
+
+
+def request_deletion(plan, requested_by=None):
+    """
+    Returns (job, created). A queued or running deletion of the same object is reused; otherwise
+    the deletion of the plan's root is queued for the worker. A running job whose worker died is
+    taken over by another worker once its claim expires (see winas.jobs).
+    """
+    object_type = _object_type(plan.root)
+    existing = DeletionJob.objects.filter(
+        object_type=object_type, object_id=plan.root.pk,
+        status__in=[DeletionJob.STATUS_QUEUED, DeletionJob.STATUS_RUNNING],
+    ).order_by('-created_at').first()
+    if existing:
+        return existing, False
+
+    job = DeletionJob.objects.create(
+        object_type=object_type,
+        object_id=plan.root.pk,
+        object_name=str(plan.root),
+        plan=plan.as_dict(),
+        total_rows=plan.total,
+        requested_by=requested_by,
+    )
+    return job, True
+
+
+def claim_next_deletion_job():
+    """Claims the oldest queued job, or a running one left behind by a dead worker; None when there is none."""
+    return claim_next_job(DeletionJob)
+
+
+def _finish(job, status, error=None):
+    job.status = status
+    job.error = error
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'completed_at'])
+    return job
+
+
+def _blocked_by(model, ids):
+    """Counts the fact rows that refer to the given rows of one level of the hierarchy, per fact table."""
+    blocked_by = {}
+    for name, (fact_model, _, fields) in _PROTECTING_FIELDS.items():
+        field = fields.get(model)
+        blocked_by[name] = fact_model.objects.filter(**{f'{field}__in': ids}).count() if field else 0
+    return blocked_by
+
+
+class DeletionBlocked(Exception):
+    """Raised inside a batch's transaction when fact rows started referring to the batch."""
+    pass
+
+
+class ClaimLost(Exception):
+    """Raised inside a batch's transaction when another worker took the job over."""
+    pass
+
+
+def _delete_batch(job, plan, model):
+    """
+    Deletes the next DELETE_BATCH_SIZE rows of one table in one transaction and returns how many
+    there were. The rows are locked and checked for protecting fact rows first, so a record created
+    against them meanwhile stops the job before the batch is deleted instead of failing it halfway.
+    """
+    with transaction.atomic():
+        if not renew_claim(job):
+            raise ClaimLost()
+        # Locked rows cannot gain new references until the transaction ends (PostgreSQL; SQLite
+        # serializes writers anyway)
+        batch = list(plan.rows[model].order_by('pk').select_for_update().values_list('pk', flat=True)[:DELETE_BATCH_SIZE])
+        if not batch:
+            return 0
+        plan.blocked_by = _blocked_by(model, batch)
+        if plan.blocked:
+            raise DeletionBlocked(blocked_message(plan))
+        if model is PerformanceTarget:
+            # Pillar -> target -> KRA -> pillar may form a cycle: unhook the pillars pointing at the
+            # targets, which are deleted with them later on
+            if Pillar.objects.filter(performance_target_id__in=batch).update(performance_target=None):
+                bump_table_versions(Pillar)
+        deleted = model.objects.filter(pk__in=batch)._raw_delete(model.objects.db)
+        bump_table_versions(model)
+        job.deleted_rows += deleted
+        job.save(update_fields=['deleted_rows'])
+    return len(batch)
+
+
+def execute_deletion_job(job):
+    """
+    Deletes a claimed job's object and everything beneath it.
+
+    The plan is counted again first, since the hierarchy may have changed since the request; a
+    deletion that fact rows now block fails without deleting anything. Rows are then removed
+    children first, DELETE_BATCH_SIZE at a time with raw DELETEs in their own transactions,
+    updating the job's progress and renewing the worker's claim on it after each batch so clients
+    can poll it. A batch that records started referring to in the meantime stops the job, leaving
+    what was not deleted yet intact; so does finding the job taken over by another worker after
+    this one's claim expired, leaving the rest to that worker.
+    Raw deletes send no signals, so the version stamps, hierarchy snapshot and score summaries
+    are refreshed here, however the job ends.
+    """
+    model = DELETABLE_MODELS[job.object_type]
+    root = model.objects.filter(pk=job.object_id).first()
+    if root is None:
+        return _finish(job, DeletionJob.STATUS_COMPLETED) # Already deleted by someone else
+
+    plan = plan_deletion(root)
+    if plan.blocked:
+        return _finish(job, DeletionJob.STATUS_FAILED, blocked_message(plan))
+
+    try:
+        with transaction.atomic():
+            if not renew_claim(job):
+                raise ClaimLost()
+            job.plan = plan.as_dict()
+            job.total_rows = plan.total
+            job.deleted_rows = 0
+            job.save(update_fields=['plan', 'total_rows', 'deleted_rows'])
+        for model, _ in DELETE_ORDER:
+            while _delete_batch(job, plan, model):
+                invalidate_hierarchy_snapshot()
+    except ClaimLost:
+        logger.warning("Deletion job %s was taken over by another worker", job.pk)
+        job.refresh_from_db()
+        return job
+    except (DeletionBlocked, IntegrityError) as e:
+        logger.warning("Deletion job %s stopped after %d rows: %s", job.pk, job.deleted_rows, e)
+        return _finish(job, DeletionJob.STATUS_FAILED, f"Stopped after deleting {job.deleted_rows} rows. {e}")
+    finally:
+        invalidate_hierarchy_snapshot()
+        # Deleted pillars may no longer weigh in the sections' shares; no scored rows were deleted
+        refresh_section_shares()
+
+    logger.info("Deletion job %s removed %d rows", job.pk, job.deleted_rows)
+    return _finish(job, DeletionJob.STATUS_COMPLETED)
@@ -0,0 +1,44 @@
+# performance_appraisal/exports.py
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the line back, so csv.writer output can be yielded."""
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    # The header goes out before the first row is produced, so the client gets its first
+    # byte while the rows are still being calculated.
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row.get(field) for field in fields])
+
+
+def _ndjson_lines(rows, fields):
+    for row in rows:
+        yield json.dumps({field: row.get(field) for field in fields}, cls=DjangoJSONEncoder) + '\n'
+
+
+def streaming_export(rows, fields, export_format, filename):
+    """
+    Streams an iterable of dicts as a CSV or NDJSON attachment, one row at a time.
+    Memory use is independent of the number of rows as long as `rows` is itself lazy
+    (a generator or a queryset's .iterator()).
+    """
+    lines = _csv_lines(rows, fields) if export_format == 'csv' else _ndjson_lines(rows, fields)
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
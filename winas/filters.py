@@ -0,0 +1,54 @@
+# performance_appraisal/filters.py
+from datetime import date
+
+from rest_framework.exceptions import ValidationError
+
+
+class QueryFilter:
+    """
+    One query-parameter filter of a list view: `?<param>=value` becomes `.filter(<lookup>=value)`.
+    Comma-separated values (`?user=3,7`) filter with `__in`. Values are converted with `parse`
+    and rejected with 400 Bad Request when they do not convert.
+    """
+
+    def __init__(self, lookup, parse=int, many=True):
+        self.lookup = lookup
+        self.parse = parse
+        self.many = many
+
+    def apply(self, queryset, param, raw_value):
+        raw_values = raw_value.split(',') if self.many else [raw_value]
+        try:
+            values = [self.parse(value.strip()) for value in raw_values if value.strip()]
+        except ValueError:
+            raise ValidationError({param: f"Invalid value '{raw_value}'."})
+        if not values:
+            return queryset
+        if len(values) == 1:
+            return queryset.filter(**{self.lookup: values[0]})
+        return queryset.filter(**{f'{self.lookup}__in': values})
+
+
+def parse_date(value):
+    return date.fromisoformat(value)
+
+
+def text(value):
+    return value
+
+
+def date_range_filters(param, lookup):
+    """Returns the `<param>_after` / `<param>_before` pair of filters for an inclusive date range."""
+    return {
+        f'{param}_after': QueryFilter(f'{lookup}__gte', parse_date, many=False),
+        f'{param}_before': QueryFilter(f'{lookup}__lte', parse_date, many=False),
+    }
+
+
+def filter_queryset(request, queryset, filters):
+    """Applies the view's declared `filters` ({param: QueryFilter}) present in the query string."""
+    for param, query_filter in filters.items():
+        raw_value = request.query_params.get(param)
+        if raw_value:
+            queryset = query_filter.apply(queryset, param, raw_value)
+    return queryset
@@ -0,0 +1,158 @@
+# performance_appraisal/hierarchy.py
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Metrics, Pillar, KeyResultArea, KPI, PerformanceTarget
+from .utils import consistent_snapshot
+from .versioning import table_versions
+
+
+HIERARCHY_MODELS = [Metrics, Pillar, KeyResultArea, KPI, PerformanceTarget]
+
+
+# For each level of the hierarchy: the descendant models and the lookup from each back up to it
+_DESCENDANT_LOOKUPS = {
+    Metrics: {Pillar: 'metrics', KeyResultArea: 'pillar__metrics', KPI: 'kra__pillar__metrics', PerformanceTarget: 'kra__pillar__metrics'},
+    Pillar: {KeyResultArea: 'pillar', KPI: 'kra__pillar', PerformanceTarget: 'kra__pillar'},
+    KeyResultArea: {KPI: 'kra', PerformanceTarget: 'kra'},
+}
+
+# Annotation name: (descendant model, aggregate)
+HIERARCHY_COUNTS = {
+    'pillars_count': (Pillar, Count('id')),
+    'kras_count': (KeyResultArea, Count('id')),
+    'kpis_count': (KPI, Count('id')),
+    'targets_count': (PerformanceTarget, Count('id')),
+    'kpis_weight': (KPI, Sum('weight')),
+    'targets_weight': (PerformanceTarget, Sum('weight')),
+}
+
+
+def hierarchy_count_names(model):
+    """Returns the count annotations available on a level of the hierarchy."""
+    lookups = _DESCENDANT_LOOKUPS.get(model, {})
+    return [name for name, (descendant, _) in HIERARCHY_COUNTS.items() if descendant in lookups]
+
+
+def annotate_hierarchy_counts(queryset, names=None):
+    """
+    Annotates Metrics, Pillar or KeyResultArea rows with the number (or weight sum) of their
+    descendants. Each annotation is a grouped correlated subquery, so the counts arrive with the
+    rows in the same query and several counts never multiply each other the way joins would.
+    """
+    lookups = _DESCENDANT_LOOKUPS[queryset.model]
+    available = hierarchy_count_names(queryset.model)
+    annotations = {}
+    for name in (available if names is None else names):
+        descendant, aggregate = HIERARCHY_COUNTS[name]
+        lookup = lookups[descendant]
+        per_parent = (
+            descendant.objects.filter(**{lookup: OuterRef('pk')})
+            .order_by().values(lookup).annotate(value=aggregate).values('value')
+        )
+        annotations[name] = Coalesce(Subquery(per_parent, output_field=IntegerField()), Value(0))
+    return queryset.annotate(**annotations) if annotations else queryset
+
+
+# --- Hierarchy tree ---
+
+# Columns of each node; children are added under 'pillars', 'kras', 'kpis' and 'performance_targets'
+TREE_FIELDS = {
+    Metrics: ['id', 'metrics_name', 'description', 'weight'],
+    Pillar: ['id', 'pillar_name', 'section', 'performance_target', 'metrics'],
+    KeyResultArea: ['id', 'kra_name', 'description', 'pillar'],
+    KPI: ['id', 'kpi_name', 'description', 'target_value', 'annual_target', 'weight', 'kra'],
+    PerformanceTarget: ['id', 'target_description', 'target_value', 'annual_target', 'weight', 'kra'],
+}
+
+
+def _children(rows, parent_field):
+    """Groups .values() rows by their parent id, dropping the parent column."""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.pop(parent_field), []).append(row)
+    return grouped
+
+
+def build_hierarchy_tree():
+    """
+    Returns the whole Metrics -> Pillar -> KeyResultArea -> KPI / PerformanceTarget tree as nested
+    dicts, read with one query per level. Pillars without Metrics and targets without a KRA are
+    listed separately so that nothing in the hierarchy is left out.
+    """
+    def rows(model):
+        return list(model.objects.order_by('id').values(*TREE_FIELDS[model]))
+
+    kpis = _children(rows(KPI), 'kra')
+    targets = _children(rows(PerformanceTarget), 'kra')
+    kras = _children(rows(KeyResultArea), 'pillar')
+    for kra_list in kras.values():
+        for kra in kra_list:
+            kra['kpis'] = kpis.get(kra['id'], [])
+            kra['performance_targets'] = targets.get(kra['id'], [])
+    pillars = _children(rows(Pillar), 'metrics')
+    for pillar_list in pillars.values():
+        for pillar in pillar_list:
+            pillar['kras'] = kras.get(pillar['id'], [])
+    metrics = rows(Metrics)
+    for item in metrics:
+        item['pillars'] = pillars.get(item['id'], [])
+
+    return {
+        'metrics': metrics,
+        'unassigned_pillars': pillars.get(None, []),
+        'unassigned_performance_targets': targets.get(None, []),
+    }
+
+
+class HierarchySnapshot:
+    """The rendered hierarchy tree plus the table versions it was built from."""
+
+    def __init__(self, versions):
+        self.versions = versions
+        self.content = json.dumps(build_hierarchy_tree(), cls=DjangoJSONEncoder).encode('utf-8')
+        self.etag = '"%s"' % hashlib.sha256(self.content).hexdigest()[:40]
+        self.checked_at = time.monotonic()
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def hierarchy_snapshot():
+    """
+    Returns the cached hierarchy snapshot of this process, rebuilding it when it was invalidated.
+
+    Writes made by this process invalidate it immediately (see winas.signals). Writes made by other
+    processes are noticed by re-reading the hierarchy's table versions, at most once every
+    HIERARCHY_SNAPSHOT_RECHECK_SECONDS; in between, requests are served without any query.
+    """
+    global _snapshot
+    recheck = getattr(settings, 'HIERARCHY_SNAPSHOT_RECHECK_SECONDS', 5)
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - snapshot.checked_at < recheck:
+        return snapshot
+
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if snapshot is not None and time.monotonic() - snapshot.checked_at < recheck:
+            return snapshot  # Rebuilt by another thread meanwhile
+        with consistent_snapshot():
+            versions, _ = table_versions(HIERARCHY_MODELS)
+            if snapshot is not None and snapshot.versions == versions:
+                snapshot.checked_at = time.monotonic()
+            else:
+                snapshot = _snapshot = HierarchySnapshot(versions)
+    return snapshot
+
+
+def invalidate_hierarchy_snapshot():
+    global _snapshot
+    _snapshot = None
@@ -0,0 +1,49 @@
+# performance_appraisal/jobs.py
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .versioning import bump_table_versions
+
+
+# How long a claimed job is reserved for the worker running it. The worker renews the claim as it
+# makes progress; a job whose claim expired was left behind by a worker that died, and is taken
+# over by the next worker looking for work
+JOB_CLAIM_SECONDS = 300
+
+
+def _claim_expiry():
+    return timezone.now() + timedelta(seconds=JOB_CLAIM_SECONDS)
+
+
+def claim_next_job(model):
+    """
+    Atomically moves the oldest queued job of a job model (BonusRun, DeletionJob) to running, or
+    takes over the oldest running one whose claim expired, and returns it; None when there is no
+    work. The conditional UPDATE makes it safe to run several workers side by side.
+    """
+    now = timezone.now()
+    claimable = Q(status=model.STATUS_QUEUED) | Q(status=model.STATUS_RUNNING, claimed_until__lt=now)
+    for job_id in model.objects.filter(claimable).order_by('created_at').values_list('id', flat=True)[:10]:
+        claimed = model.objects.filter(claimable, pk=job_id).update(
+            status=model.STATUS_RUNNING, started_at=now, claimed_until=_claim_expiry()
+        )
+        if claimed:
+            bump_table_versions(model)
+            return model.objects.get(pk=job_id)
+    return None
+
+
+def renew_claim(job):
+    """
+    Extends the claim on a running job, as its worker makes progress. Returns False when the claim
+    expired and another worker took the job over, in which case this one has to stop.
+    """
+    claimed_until = _claim_expiry()
+    renewed = type(job).objects.filter(
+        pk=job.pk, status=job.STATUS_RUNNING, claimed_until=job.claimed_until
+    ).update(claimed_until=claimed_until)
+    if renewed:
+        job.claimed_until = claimed_until
+    return bool(renewed)
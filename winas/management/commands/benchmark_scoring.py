@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from winas.scoring import compute_section_scores
+
+
+def loop_section_scores(user_index, section_index, weighted_averages, weights, n_users, section_weights):
+    """Row-at-a-time equivalent of compute_section_scores(), used as the benchmark baseline."""
+    n_sections = len(section_weights)
+    weighted_sums = [[0.0] * n_sections for _ in range(n_users)]
+    weight_sums = [[0.0] * n_sections for _ in range(n_users)]
+    for user, section, weighted_average, weight in zip(
+        user_index.tolist(), section_index.tolist(), weighted_averages.tolist(), weights.tolist()
+    ):
+        if section >= 0:
+            weighted_sums[user][section] += weighted_average
+            weight_sums[user][section] += weight
+    totals = []
+    for user in range(n_users):
+        total = 0.0
+        for section in range(n_sections):
+            if weight_sums[user][section] > 0:
+                total += weighted_sums[user][section] / weight_sums[user][section] * section_weights[section] / 100
+        totals.append(total)
+    return totals
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the vectorized scoring kernel on synthetic appraisal data."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--rows-per-employee', type=int, default=28, help="Performance records plus soft skill ratings per employee.")
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--skip-baseline', action='store_true', help="Only time the vectorized kernel.")
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        section_weights = [70, 30]
+
+        self.stdout.write(f"{'employees':>10} {'rows':>10} {'vectorized':>12} {'row loop':>12} {'speed-up':>9}")
+        for n_users in options['employees']:
+            n_rows = n_users * options['rows_per_employee']
+            user_index = np.repeat(np.arange(n_users, dtype=np.int64), options['rows_per_employee'])
+            section_index = rng.integers(-1, len(section_weights), n_rows)
+            weights = rng.integers(1, 30, n_rows).astype(np.float64)
+            weighted_averages = weights * rng.integers(0, 3, n_rows)
+            arrays = (user_index, section_index, weighted_averages, weights, n_users, section_weights)
+
+            vectorized = self.best_of(options['repeat'], compute_section_scores, arrays)
+            if options['skip_baseline']:
+                self.stdout.write(f"{n_users:>10} {n_rows:>10} {vectorized * 1000:>10.1f}ms {'-':>12} {'-':>9}")
+                continue
+            baseline = self.best_of(1, loop_section_scores, arrays)
+            self.stdout.write(
+                f"{n_users:>10} {n_rows:>10} {vectorized * 1000:>10.1f}ms {baseline * 1000:>10.1f}ms {baseline / vectorized:>8.1f}x"
+            )
+
+    @staticmethod
+    def best_of(repeat, function, arrays):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(*arrays)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,33 @@
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from winas.bonus import calculate_bonuses, BonusCalculationError
+from winas.models import AppraisalPeriod, normalize_period_label
+
+
+class Command(BaseCommand):
+    help = "Calculates employee bonuses for an appraisal period and prints them as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pool', required=True, help="Total bonus amount available for distribution.")
+        parser.add_argument('--period', required=True, help="The appraisal period for which bonus is being calculated.")
+
+    def handle(self, *args, **options):
+        try:
+            total_bonus_pool = Decimal(options['pool'])
+        except InvalidOperation:
+            raise CommandError(f"Invalid bonus pool amount: {options['pool']}")
+
+        period = AppraisalPeriod.objects.filter(label=normalize_period_label(options['period'])).first()
+        if period is None:
+            raise CommandError(f"Appraisal period \"{options['period']}\" does not exist.")
+
+        try:
+            bonus_results = calculate_bonuses(total_bonus_pool, period.id)
+        except BonusCalculationError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(bonus_results, cls=DjangoJSONEncoder, indent=2))
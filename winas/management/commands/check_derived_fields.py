@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from winas.consistency import CHECK_CHUNK_SIZE, CHECKS, check_derived_fields
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks the copies of the hierarchy that performance records and soft skill ratings store "
+        "against the hierarchy as it is now, and optionally repairs the stale ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table', action='append', choices=list(CHECKS), dest='tables',
+            help="Only check this table (repeat for several).",
+        )
+        parser.add_argument('--repair', action='store_true', help="Rewrite stale stored copies as they are found.")
+        parser.add_argument('--workers', type=int, help="Worker processes (default: CONSISTENCY_CHECK_WORKERS or one per CPU).")
+        parser.add_argument('--chunk-size', type=int, default=CHECK_CHUNK_SIZE, help="Rows read per query.")
+
+    def handle(self, *args, **options):
+        reports = check_derived_fields(
+            tables=options['tables'], repair=options['repair'],
+            workers=options['workers'], chunk_size=options['chunk_size'],
+        )
+        inconsistent = False
+        for report in reports:
+            self.stdout.write(f"{report.name}: {report.checked} rows checked")
+            for field, count in sorted(report.mismatches.items()):
+                inconsistent = True
+                samples = ', '.join(str(pk) for pk in report.samples[field])
+                self.stdout.write(self.style.WARNING(f"  {field}: {count} rows differ (e.g. ids {samples})"))
+            if report.repaired:
+                self.stdout.write(self.style.SUCCESS(f"  repaired {report.repaired} rows"))
+        if not inconsistent:
+            self.stdout.write(self.style.SUCCESS("All stored copies are consistent."))
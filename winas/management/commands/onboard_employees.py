@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from winas.bulk import onboard_employees, parse_onboarding_csv, BulkUploadError
+
+
+class Command(BaseCommand):
+    help = "Creates employee accounts from a CSV or JSON file and emails them their temporary passwords."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header line (email, first_name, last_name, employee_number, annual_salary, department) or a JSON array of the same fields.")
+        parser.add_argument('--department', type=int, help="Department id for rows that do not name one.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8-sig') as f:
+                content = f.read()
+        except OSError as e:
+            raise CommandError(str(e))
+
+        try:
+            rows = json.loads(content) if options['path'].lower().endswith('.json') else parse_onboarding_csv(content)
+            if options['department'] is not None and isinstance(rows, list):
+                rows = [{'department': options['department'], **row} if isinstance(row, dict) else row for row in rows]
+            users = onboard_employees(rows)
+        except (BulkUploadError, ValueError) as e:
+            for row in getattr(e, 'rows', []):
+                self.stderr.write(f"Row {row['row'] + 1}: {json.dumps(row['errors'])}")
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Created {len(users)} employee accounts; their password emails are being sent.")
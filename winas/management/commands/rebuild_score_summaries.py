@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from winas.models import AppraisalPeriod, normalize_period_label
+from winas.summaries import rebuild_score_summaries
+
+
+class Command(BaseCommand):
+    help = "Regenerates the period score summaries from the performance records and soft skill ratings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', help="Only rebuild this appraisal period.")
+
+    def handle(self, *args, **options):
+        period_id = None
+        if options['period']:
+            period_id = AppraisalPeriod.objects.filter(label=normalize_period_label(options['period'])) \
+                .values_list('id', flat=True).first()
+            if period_id is None:
+                raise CommandError(f"Appraisal period \"{options['period']}\" does not exist.")
+        written = rebuild_score_summaries(period_id)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} period score summaries."))
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from winas.bonus import claim_next_bonus_run, execute_bonus_run
+from winas.deletion import claim_next_deletion_job, execute_deletion_job
+from winas.outbox import drain_outbox
+from winas.models import BonusRun, DeletionJob
+from winas.versioning import bump_table_versions
+
+
+class Command(BaseCommand):
+    help = (
+        "Processes queued background jobs (outgoing emails, bonus runs and deletions of pillars and KRAs). "
+        "Run it next to the web server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit instead of polling.")
+        parser.add_argument('--sleep', type=float, default=2.0, help="Seconds to wait between polls when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.process_queue()
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['sleep'])
+
+    def process_queue(self):
+        processed = self.send_emails()
+        processed += self.run_jobs(BonusRun, claim_next_bonus_run, execute_bonus_run)
+        processed += self.run_jobs(DeletionJob, claim_next_deletion_job, execute_deletion_job)
+        return processed
+
+    def run_jobs(self, model, claim_next, execute):
+        processed = 0
+        while True:
+            job = claim_next()
+            if job is None:
+                return processed
+            self.stdout.write(f"Executing {job}")
+            try:
+                job = execute(job)
+            except Exception as e:
+                model.objects.filter(pk=job.pk).update(
+                    status=model.STATUS_FAILED, error=str(e), completed_at=timezone.now()
+                )
+                bump_table_versions(model)
+                self.stderr.write(f"{job} failed: {e}")
+            else:
+                self.stdout.write(f"Finished {job}")
+            processed += 1
+
+    def send_emails(self):
+        try:
+            processed = drain_outbox()
+        except Exception as e:
+            self.stderr.write(f"Sending emails failed: {e}")
+            return 0
+        if processed:
+            self.stdout.write(f"Processed {processed} outgoing emails")
+        return processed
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-17 02:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0010_change_target_fields_to_decimal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BonusRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_bonus_pool', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('period_under_review', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('input_fingerprint', models.CharField(help_text='Checksum of the run parameters and the data it was computed from.', max_length=64)),
+                ('total_employees', models.PositiveIntegerField(blank=True, null=True)),
+                ('processed_employees', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bonus_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Bonus Run',
+                'verbose_name_plural': 'Bonus Runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BonusResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150)),
+                ('employee_name', models.CharField(blank=True, max_length=255)),
+                ('department', models.CharField(blank=True, max_length=255, null=True)),
+                ('role', models.CharField(blank=True, max_length=255, null=True)),
+                ('annual_salary', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('strategic_score', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('soft_skill_score', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('total_employee_score', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('performance_rating', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('calculated_bonus', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('warnings', models.TextField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bonus_results', to=settings.AUTH_USER_MODEL)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='winas.bonusrun')),
+            ],
+            options={
+                'verbose_name': 'Bonus Result',
+                'verbose_name_plural': 'Bonus Results',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bonusrun',
+            index=models.Index(fields=['input_fingerprint', 'status'], name='winas_bonus_input_f_48310a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bonusrun',
+            index=models.Index(fields=['status', 'created_at'], name='winas_bonus_status_c8abbf_idx'),
+        ),
+    ]
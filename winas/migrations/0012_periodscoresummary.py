@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-17 02:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from ._score_summaries import rebuild_summaries
+
+
+def build_summaries(apps, schema_editor):
+    """Fills the new table from the existing records, so scores do not read as 0 until someone rebuilds it."""
+    rebuild_summaries(apps, period='period_under_review')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0011_bonusrun_bonusresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodScoreSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_under_review', models.CharField(max_length=100)),
+                ('strategic_weight', models.IntegerField(default=0, help_text='Sum of the weights of the strategic objective records.')),
+                ('strategic_weighted_sum', models.IntegerField(default=0, help_text='Sum of the weighted averages of the strategic objective records.')),
+                ('soft_skill_weight', models.IntegerField(default=0, help_text='Sum of the weights of the soft skill ratings.')),
+                ('soft_skill_weighted_sum', models.IntegerField(default=0, help_text='Sum of the weighted averages of the soft skill ratings.')),
+                ('strategic_share', models.IntegerField(help_text='Share (%) of the strategic objectives section in the total score.')),
+                ('soft_skill_share', models.IntegerField(help_text='Share (%) of the soft skills section in the total score.')),
+                ('strategic_score', models.DecimalField(decimal_places=4, max_digits=15)),
+                ('soft_skill_score', models.DecimalField(decimal_places=4, max_digits=15)),
+                ('total_score', models.DecimalField(decimal_places=4, max_digits=15)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Period Score Summary',
+                'verbose_name_plural': 'Period Score Summaries',
+                'indexes': [models.Index(fields=['period_under_review', 'user'], name='winas_perio_period__119b38_idx')],
+                'unique_together': {('user', 'period_under_review')},
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-17 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0012_periodscoresummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeeperformance',
+            index=models.Index(fields=['period_under_review', 'user'], name='winas_emplo_period__e9d43a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeperformance',
+            index=models.Index(fields=['user', 'period_under_review'], name='winas_emplo_user_id_c99a30_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overallappraisal',
+            index=models.Index(fields=['period_under_review', 'date_of_appraisal'], name='winas_overa_period__21b59d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overallappraisal',
+            index=models.Index(fields=['date_of_appraisal'], name='winas_overa_date_of_3a97d3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='softskillrating',
+            index=models.Index(fields=['period_under_review', 'user'], name='winas_softs_period__c83c14_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='softskillrating',
+            index=models.Index(fields=['user', 'period_under_review'], name='winas_softs_user_id_aa130f_idx'),
+        ),
+    ]
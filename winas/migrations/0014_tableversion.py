@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-17 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0013_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(help_text="Model label, e.g. 'winas.department'.", max_length=100, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Table Version',
+                'verbose_name_plural': 'Table Versions',
+            },
+        ),
+    ]
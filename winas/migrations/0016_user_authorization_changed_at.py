@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0015_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='authorization_changed_at',
+            field=models.DateTimeField(blank=True, help_text='When the role, department or access flags last changed; older access tokens are rejected.', null=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0016_user_authorization_changed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppraisalPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100, unique=True)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('closed', 'Closed')], default='open', max_length=20)),
+            ],
+            options={
+                'verbose_name': 'Appraisal Period',
+                'verbose_name_plural': 'Appraisal Periods',
+                'ordering': ['start_date', 'label'],
+            },
+        ),
+        migrations.AddField(
+            model_name='bonusrun',
+            name='period',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bonus_runs', to='winas.appraisalperiod'),
+        ),
+        migrations.AddField(
+            model_name='employeeperformance',
+            name='period',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='performance_records', to='winas.appraisalperiod'),
+        ),
+        migrations.AddField(
+            model_name='overallappraisal',
+            name='period',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='appraisals', to='winas.appraisalperiod'),
+        ),
+        migrations.AddField(
+            model_name='periodscoresummary',
+            name='period',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='score_summaries', to='winas.appraisalperiod'),
+        ),
+        migrations.AddField(
+            model_name='softskillrating',
+            name='period',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='soft_skill_ratings', to='winas.appraisalperiod'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+import calendar
+import re
+from datetime import date
+
+from django.db import migrations
+
+
+# Tables that stored the period as free text, before it became a foreign key to AppraisalPeriod
+PERIOD_MODELS = ['EmployeePerformance', 'SoftSkillRating', 'OverallAppraisal', 'PeriodScoreSummary', 'BonusRun']
+# Fact tables whose period is part of a unique key
+UNIQUE_KEYS = {
+    'EmployeePerformance': ['user_id', 'kpi_id'],
+    'SoftSkillRating': ['user_id', 'soft_skill_kpi_id'],
+    'OverallAppraisal': ['user_id'],
+}
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_abbr) if name}
+
+
+def normalize_period_label(label):
+    # Frozen copy of winas.models.normalize_period_label
+    return re.sub(r'\s*-\s*', '-', ' '.join(label.split()))
+
+
+def period_dates(label):
+    """Reads (start_date, end_date) from labels like "Jan-Jun 2024", "2023 Q2" or "2024"; (None, None) otherwise."""
+    match = re.fullmatch(r'([A-Za-z]{3})[A-Za-z]*-([A-Za-z]{3})[A-Za-z]* (\d{4})', label)
+    if match and match[1].lower() in MONTHS and match[2].lower() in MONTHS:
+        first, last, year = MONTHS[match[1].lower()], MONTHS[match[2].lower()], int(match[3])
+        if first <= last:
+            return date(year, first, 1), date(year, last, calendar.monthrange(year, last)[1])
+    match = re.fullmatch(r'(\d{4}) Q([1-4])|Q([1-4]) (\d{4})', label, re.IGNORECASE)
+    if match:
+        year, quarter = int(match[1] or match[4]), int(match[2] or match[3])
+        last = quarter * 3
+        return date(year, last - 2, 1), date(year, last, calendar.monthrange(year, last)[1])
+    match = re.fullmatch(r'(?:(?:FY|Annual) )?(\d{4})', label, re.IGNORECASE)
+    if match:
+        year = int(match[1])
+        return date(year, 1, 1), date(year, 12, 31)
+    return None, None
+
+
+def populate_periods(apps, schema_editor):
+    AppraisalPeriod = apps.get_model('winas', 'AppraisalPeriod')
+    models = {name: apps.get_model('winas', name) for name in PERIOD_MODELS}
+
+    raw_labels = set()
+    for model in models.values():
+        raw_labels.update(model.objects.values_list('period_under_review', flat=True).distinct())
+
+    periods = {}
+    variants = {}
+    for raw in sorted(raw_labels):
+        label = normalize_period_label(raw)
+        if label not in periods:
+            start_date, end_date = period_dates(label)
+            periods[label], _ = AppraisalPeriod.objects.get_or_create(
+                label=label, defaults={'start_date': start_date, 'end_date': end_date}
+            )
+        variants.setdefault(label, set()).add(raw)
+
+    # Spellings of one period (e.g. "Jan-Jun 2024" and "Jan - Jun 2024") are merged, unless that
+    # would give an employee two rows for the same key, which has to be resolved by hand first
+    for label, raws in variants.items():
+        if len(raws) == 1:
+            continue
+        for name, key in UNIQUE_KEYS.items():
+            rows = models[name].objects.filter(period_under_review__in=raws).values_list(*key, 'period_under_review')
+            seen = {}
+            for *values, raw in rows:
+                other = seen.setdefault(tuple(values), raw)
+                if other != raw:
+                    raise RuntimeError(
+                        f"{name} has rows for {dict(zip(key, values))} under both {other!r} and {raw!r}, which are "
+                        f"the same appraisal period {label!r}. Delete or rename one of them and migrate again."
+                    )
+        # Summaries are derived data: drop the merged ones; 0019 rebuilds them once periods are foreign keys
+        models['PeriodScoreSummary'].objects.filter(period_under_review__in=raws).delete()
+
+    for model in models.values():
+        for label, raws in variants.items():
+            model.objects.filter(period_under_review__in=raws).update(period=periods[label])
+
+
+def restore_labels(apps, schema_editor):
+    for name in PERIOD_MODELS:
+        model = apps.get_model('winas', name)
+        for period in apps.get_model('winas', 'AppraisalPeriod').objects.all():
+            model.objects.filter(period=period).update(period_under_review=period.label)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0017_appraisalperiod'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_periods, restore_labels),
+    ]
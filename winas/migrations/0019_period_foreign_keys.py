@@ -0,0 +1,131 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from ._score_summaries import rebuild_summaries
+
+
+def rebuild_merged_summaries(apps, schema_editor):
+    """Recreates the summaries 0018 dropped when it merged spellings of a period."""
+    rebuild_summaries(apps, period='period_id')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0018_populate_appraisal_periods'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='employeeperformance',
+            name='winas_emplo_period__e9d43a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='employeeperformance',
+            name='winas_emplo_user_id_c99a30_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='overallappraisal',
+            name='winas_overa_period__21b59d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='periodscoresummary',
+            name='winas_perio_period__119b38_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='softskillrating',
+            name='winas_softs_period__c83c14_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='softskillrating',
+            name='winas_softs_user_id_aa130f_idx',
+        ),
+        migrations.RemoveField(
+            model_name='bonusrun',
+            name='period_under_review',
+        ),
+        migrations.AlterUniqueTogether(
+            name='employeeperformance',
+            unique_together={('user', 'kpi', 'period')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='overallappraisal',
+            unique_together={('user', 'period')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='periodscoresummary',
+            unique_together={('user', 'period')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='softskillrating',
+            unique_together={('user', 'soft_skill_kpi', 'period')},
+        ),
+        migrations.AlterField(
+            model_name='bonusrun',
+            name='period',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='bonus_runs', to='winas.appraisalperiod'),
+        ),
+        migrations.AlterField(
+            model_name='employeeperformance',
+            name='period',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='performance_records', to='winas.appraisalperiod'),
+        ),
+        migrations.AlterField(
+            model_name='overallappraisal',
+            name='period',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='appraisals', to='winas.appraisalperiod'),
+        ),
+        migrations.AlterField(
+            model_name='periodscoresummary',
+            name='period',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='score_summaries', to='winas.appraisalperiod'),
+        ),
+        migrations.AlterField(
+            model_name='softskillrating',
+            name='period',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='soft_skill_ratings', to='winas.appraisalperiod'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeperformance',
+            index=models.Index(fields=['period', 'user'], name='winas_emplo_period__eb218d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeperformance',
+            index=models.Index(fields=['user', 'period'], name='winas_emplo_user_id_2fbf49_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overallappraisal',
+            index=models.Index(fields=['period', 'date_of_appraisal'], name='winas_overa_period__39f603_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='periodscoresummary',
+            index=models.Index(fields=['period', 'user'], name='winas_perio_period__392631_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='softskillrating',
+            index=models.Index(fields=['period', 'user'], name='winas_softs_period__0097d1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='softskillrating',
+            index=models.Index(fields=['user', 'period'], name='winas_softs_user_id_0d3017_idx'),
+        ),
+        migrations.RemoveField(
+            model_name='employeeperformance',
+            name='period_under_review',
+        ),
+        migrations.RemoveField(
+            model_name='overallappraisal',
+            name='period_under_review',
+        ),
+        migrations.RemoveField(
+            model_name='periodscoresummary',
+            name='period_under_review',
+        ),
+        migrations.RemoveField(
+            model_name='softskillrating',
+            name='period_under_review',
+        ),
+        migrations.RunPython(rebuild_merged_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:09
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+# Frozen copy of winas.scoring.DEFAULT_APPRAISAL_SECTIONS' pillar names
+DEFAULT_SECTION_PILLARS = {
+    'strategic': ["SHARED PERFORMANCE AREAS", "ICT & BUSINESS PROCESSES"],
+    'soft_skill': ["SOFT SKILLS"],
+}
+
+
+def classify_pillars(apps, schema_editor):
+    """Classifies the pillars by name, as scoring did until now, and copies the sections onto the fact rows."""
+    Pillar = apps.get_model('winas', 'Pillar')
+    KeyResultArea = apps.get_model('winas', 'KeyResultArea')
+    PerformanceTarget = apps.get_model('winas', 'PerformanceTarget')
+    configured = getattr(settings, 'APPRAISAL_SECTIONS', None)
+    section_pillars = (
+        {key: section['pillars'] for key, section in configured.items()} if configured else DEFAULT_SECTION_PILLARS
+    )
+    for section, pillar_names in section_pillars.items():
+        Pillar.objects.filter(pillar_name__in=pillar_names).update(section=section)
+
+    apps.get_model('winas', 'EmployeePerformance').objects.update(section=Subquery(
+        PerformanceTarget.objects.filter(pk=OuterRef('performance_target_id')).values('kra__pillar__section')[:1]
+    ))
+    apps.get_model('winas', 'SoftSkillRating').objects.update(section=Subquery(
+        KeyResultArea.objects.filter(pk=OuterRef('soft_skill_kra_id')).values('pillar__section')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0019_period_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeperformance',
+            name='section',
+            field=models.CharField(blank=True, choices=[('strategic', 'Strategic objectives'), ('soft_skill', 'Soft skills')], editable=False, help_text="Copied from the pillar of the row's performance target when saved (see winas.sections).", max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='pillar',
+            name='section',
+            field=models.CharField(blank=True, choices=[('strategic', 'Strategic objectives'), ('soft_skill', 'Soft skills')], help_text="The appraisal section this pillar's rows are scored in. Left empty, it is taken from the pillar name (see APPRAISAL_SECTIONS).", max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='softskillrating',
+            name='section',
+            field=models.CharField(blank=True, choices=[('strategic', 'Strategic objectives'), ('soft_skill', 'Soft skills')], editable=False, help_text="Copied from the pillar of the row's KRA when saved (see winas.sections).", max_length=20, null=True),
+        ),
+        migrations.RunPython(classify_pillars, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='employeeperformance',
+            index=models.Index(fields=['period', 'section', 'user', 'performance_target', 'weighted_average'], name='winas_emplo_period__d19a9c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='softskillrating',
+            index=models.Index(fields=['period', 'section', 'user', 'weight', 'weighted_average'], name='winas_softs_period__9575da_idx'),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:13
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Cast, Round
+
+from ._score_summaries import rebuild_summaries
+
+
+def copy_target_inputs(apps, schema_editor):
+    """Copies every performance record's target value (in cents) and weight onto the record."""
+    PerformanceTarget = apps.get_model('winas', 'PerformanceTarget')
+    targets = PerformanceTarget.objects.filter(pk=OuterRef('performance_target_id'))
+    apps.get_model('winas', 'EmployeePerformance').objects.update(
+        target_value_cents=Subquery(
+            # Rounded first: SQLite keeps decimals as floats, where 0.29 * 100 is 28.999...
+            targets.annotate(cents=Cast(Round(F('target_value') * 100), models.BigIntegerField())).values('cents')[:1]
+        ),
+        target_weight=Subquery(targets.values('weight')[:1]),
+    )
+
+
+def rebuild_from_generated_scores(apps, schema_editor):
+    """The database recalculated every weighted average: summaries built from the old stored ones are rebuilt."""
+    rebuild_summaries(apps, period='period_id', target_weight='target_weight', stored_sections=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0020_fact_sections'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeperformance',
+            name='target_value_cents',
+            field=models.BigIntegerField(blank=True, editable=False, help_text="Copied: the performance target's value, in cents.", null=True),
+        ),
+        migrations.AddField(
+            model_name='employeeperformance',
+            name='target_weight',
+            field=models.IntegerField(blank=True, editable=False, help_text="Copied: the performance target's weight.", null=True),
+        ),
+        migrations.RunPython(copy_target_inputs, migrations.RunPython.noop),
+        # Stored columns cannot be altered into generated ones: drop them (and the indexes covering
+        # them) and add them back as GeneratedFields, which the database computes for every row.
+        # They are NOT NULL, which also makes SQLite rebuild the tables, as it cannot add a stored
+        # generated column to a table that has rows.
+        migrations.RemoveIndex(
+            model_name='employeeperformance',
+            name='winas_emplo_period__d19a9c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='softskillrating',
+            name='winas_softs_period__9575da_idx',
+        ),
+        migrations.RemoveField(
+            model_name='employeeperformance',
+            name='percentage_achieved',
+        ),
+        migrations.RemoveField(
+            model_name='employeeperformance',
+            name='weighted_average',
+        ),
+        migrations.RemoveField(
+            model_name='overallappraisal',
+            name='total_performance_rating',
+        ),
+        migrations.RemoveField(
+            model_name='softskillrating',
+            name='weighted_average',
+        ),
+        migrations.AddField(
+            model_name='employeeperformance',
+            name='percentage_achieved',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('target_value_cents__isnull', True), ('target_value_cents', 0), _connector='OR'), then=models.Value(0)), default=django.db.models.functions.comparison.Cast(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('actual_achievement', models.BigIntegerField()), '*', models.Value(100)), '/', models.F('target_value_cents')), models.IntegerField()), output_field=models.IntegerField()), help_text='Calculated by the database: Actual Achievement / Target Value.', output_field=models.IntegerField()),
+        ),
+        migrations.AddField(
+            model_name='employeeperformance',
+            name='weighted_average',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('target_value_cents__isnull', True), ('target_value_cents', 0), _connector='OR'), then=models.Value(0)), default=django.db.models.functions.comparison.Cast(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('actual_achievement', models.BigIntegerField()), '*', models.Value(100)), '*', django.db.models.functions.comparison.Coalesce('target_weight', 0)), '/', models.F('target_value_cents')), models.IntegerField()), output_field=models.IntegerField()), help_text='Calculated by the database: Actual Achievement / Target Value * Weight.', output_field=models.IntegerField()),
+        ),
+        migrations.AddField(
+            model_name='overallappraisal',
+            name='total_performance_rating',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('strategic_objectives_score'), '+', models.F('soft_skills_score')), help_text='Calculated by the database: Strategic Objectives + Soft Skills.', output_field=models.IntegerField()),
+        ),
+        migrations.AddField(
+            model_name='softskillrating',
+            name='weighted_average',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('rating'), '*', models.F('weight')), '/', models.Value(100)), help_text='Calculated by the database: Rating * Weight / 100 (the rating is out of 100).', output_field=models.IntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='employeeperformance',
+            index=models.Index(fields=['period', 'section', 'user', 'performance_target', 'weighted_average'], name='winas_emplo_period__d19a9c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='softskillrating',
+            index=models.Index(fields=['period', 'section', 'user', 'weight', 'weighted_average'], name='winas_softs_period__9575da_idx'),
+        ),
+        migrations.RunPython(rebuild_from_generated_scores, migrations.RunPython.noop),
+    ]
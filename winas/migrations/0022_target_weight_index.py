@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0021_generated_scores'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='employeeperformance',
+            name='winas_emplo_period__d19a9c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='employeeperformance',
+            index=models.Index(fields=['period', 'section', 'user', 'target_weight', 'weighted_average'], name='winas_emplo_period__7831b8_idx'),
+        ),
+    ]
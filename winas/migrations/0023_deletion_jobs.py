@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0022_target_weight_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('pillar', 'Pillar'), ('key_result_area', 'Key Result Area')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('object_name', models.CharField(help_text='The deleted object as it was named, kept once it is gone.', max_length=255)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('plan', models.JSONField(blank=True, help_text='The rows the deletion removes per table, as planned when it was requested.', null=True)),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True)),
+                ('deleted_rows', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deletion_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Deletion Job',
+                'verbose_name_plural': 'Deletion Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['object_type', 'object_id', 'status'], name='winas_delet_object__9adca0_idx'), models.Index(fields=['status', 'created_at'], name='winas_delet_status_ad6ad7_idx')],
+            },
+        ),
+    ]
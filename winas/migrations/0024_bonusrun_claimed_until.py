@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0023_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bonusrun',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, help_text="While running: when the worker's claim on the run expires unless renewed (see winas.jobs).", null=True),
+        ),
+    ]
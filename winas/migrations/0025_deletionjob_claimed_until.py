@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('winas', '0024_bonusrun_claimed_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletionjob',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, help_text="While running: when the worker's claim on the job expires unless renewed (see winas.jobs).", null=True),
+        ),
+    ]
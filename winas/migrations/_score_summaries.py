@@ -0,0 +1,115 @@
+# performance_appraisal/migrations/_score_summaries.py
+# Frozen copy of the period score summary calculation (winas.summaries and winas.scoring), for
+# the migrations that create or invalidate the summaries. It works on historical models, whose
+# period, target weight and section columns differ from one migration to the next. Modules
+# starting with an underscore are not loaded as migrations.
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Q, Sum
+
+
+SUMMARY_BATCH_SIZE = 1000
+
+# Frozen copy of winas.scoring.DEFAULT_APPRAISAL_SECTIONS' pillar names and shares
+DEFAULT_SECTIONS = {
+    'strategic': {'pillars': ["SHARED PERFORMANCE AREAS", "ICT & BUSINESS PROCESSES"], 'weight': 70},
+    'soft_skill': {'pillars': ["SOFT SKILLS"], 'weight': 30},
+}
+SECTION_KEYS = ['strategic', 'soft_skill']
+
+
+def _rescale_shares(shares):
+    # Frozen copy of winas.scoring.rescale_shares
+    total = sum(shares)
+    scaled = [share * 100 // total for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda index: (-(shares[index] * 100 % total), index))
+    for index in by_remainder[:100 - sum(scaled)]:
+        scaled[index] += 1
+    return scaled
+
+
+def _section_shares(Pillar, sections, stored_sections):
+    """The sections' shares of the total score, with the Metrics weight overrides (see ScoringModel)."""
+    metrics_sections, metrics_weights = defaultdict(set), {}
+    for pillar in Pillar.objects.values('pillar_name', 'metrics_id', 'metrics__weight', *(['section'] if stored_sections else [])):
+        if pillar['metrics_id'] is None or pillar['metrics__weight'] is None:
+            continue
+        if stored_sections:
+            section = pillar['section']
+        else:
+            section = next((key for key in SECTION_KEYS if pillar['pillar_name'] in sections[key]['pillars']), None)
+        metrics_sections[pillar['metrics_id']].add(section)
+        metrics_weights[pillar['metrics_id']] = pillar['metrics__weight']
+    overrides = defaultdict(int)
+    for metrics_id, section_set in metrics_sections.items():
+        if len(section_set) == 1 and None not in section_set:
+            overrides[section_set.pop()] += metrics_weights[metrics_id]
+
+    configured = [sections[key]['weight'] for key in SECTION_KEYS]
+    weights = [overrides.get(key, weight) for key, weight in zip(SECTION_KEYS, configured)]
+    if min(weights) < 0 or sum(weights) <= 0:
+        return configured
+    return weights if sum(weights) == 100 else _rescale_shares(weights)
+
+
+def rebuild_summaries(apps, period='period_id', target_weight='performance_target__weight', stored_sections=False):
+    """
+    Replaces every PeriodScoreSummary with one per employee and period that has performance records
+    or soft skill ratings: strategic objectives scored from the records, soft skills from the
+    ratings, each under the pillars of its section.
+
+    period is the fact tables' period column, target_weight where a record's weight is read from,
+    and stored_sections whether the pillars and fact rows store their section yet (otherwise it is
+    taken from the pillar name).
+    """
+    Pillar = apps.get_model('winas', 'Pillar')
+    EmployeePerformance = apps.get_model('winas', 'EmployeePerformance')
+    SoftSkillRating = apps.get_model('winas', 'SoftSkillRating')
+    PeriodScoreSummary = apps.get_model('winas', 'PeriodScoreSummary')
+
+    configured = getattr(settings, 'APPRAISAL_SECTIONS', None) or DEFAULT_SECTIONS
+    sections = {key: configured[key] for key in SECTION_KEYS}
+    shares = _section_shares(Pillar, sections, stored_sections)
+    if stored_sections:
+        strategic, soft_skill = Q(section='strategic'), Q(section='soft_skill')
+    else:
+        strategic = Q(performance_target__kra__pillar__pillar_name__in=sections['strategic']['pillars'])
+        soft_skill = Q(soft_skill_kra__pillar__pillar_name__in=sections['soft_skill']['pillars'])
+
+    # {(user_id, period): [strategic weight, strategic weighted sum, soft skill weight, soft skill weighted sum]}
+    sums = defaultdict(lambda: [0, 0, 0, 0])
+    for rows, in_section, weight, offset in [
+        (EmployeePerformance, strategic, target_weight, 0),
+        (SoftSkillRating, soft_skill, 'weight', 2),
+    ]:
+        for user_id, period_value, weight_sum, weighted_sum in rows.objects.order_by().values('user_id', period).annotate(
+            weight_sum=Sum(weight, filter=in_section), weighted_sum=Sum('weighted_average', filter=in_section),
+        ).values_list('user_id', period, 'weight_sum', 'weighted_sum'):
+            key_sums = sums[(user_id, period_value)]
+            key_sums[offset] = int(weight_sum or 0)
+            key_sums[offset + 1] = int(weighted_sum or 0)
+
+    summaries = []
+    for (user_id, period_value), (strategic_weight, strategic_sum, soft_skill_weight, soft_skill_sum) in sums.items():
+        scores = [
+            Decimal(weighted_sum) / Decimal(weight) if weight > 0 else Decimal('0.00')
+            for weight, weighted_sum in [(strategic_weight, strategic_sum), (soft_skill_weight, soft_skill_sum)]
+        ]
+        total = sum(score * (Decimal(share) / Decimal(100)) for score, share in zip(scores, shares))
+        summaries.append(PeriodScoreSummary(
+            user_id=user_id,
+            **{period: period_value},
+            strategic_weight=strategic_weight,
+            strategic_weighted_sum=strategic_sum,
+            soft_skill_weight=soft_skill_weight,
+            soft_skill_weighted_sum=soft_skill_sum,
+            strategic_share=shares[0],
+            soft_skill_share=shares[1],
+            strategic_score=round(scores[0], 4),
+            soft_skill_score=round(scores[1], 4),
+            total_score=round(total, 4),
+        ))
+    PeriodScoreSummary.objects.all().delete()
+    PeriodScoreSummary.objects.bulk_create(summaries, batch_size=SUMMARY_BATCH_SIZE)
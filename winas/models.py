@@ -1,9 +1,14 @@
 # performance_appraisal/models.py
 
-from django.db import models
+import re
+
+import numpy as np
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser, UserManager # Or AbstractBaseUser if you need more control
+from django.db.models.functions import Cast, Coalesce
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 # If you're extending Django's default User model, you might need to import it
 # from django.conf import settings
@@ -36,6 +41,24 @@ class Role(models.Model):
     def __str__(self):
         return self.role_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_role_name = instance.__dict__.get('role_name')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Access tokens carry the role name: renaming a role stamps an authorization change on
+        # all of its users, so tokens issued to them before are rejected (see User.save)
+        loaded = getattr(self, '_loaded_role_name', None)
+        self._authorization_changed = loaded is not None and loaded != self.role_name
+        with transaction.atomic():
+            if self._authorization_changed:
+                self._authorization_changed_at = timezone.now()
+                self.users.update(authorization_changed_at=self._authorization_changed_at)
+            super().save(*args, **kwargs)
+        self._loaded_role_name = self.role_name
+
 # Assuming you want to extend Django's built-in User model
 # If you have a custom user model already defined, adjust accordingly.
 class CustomUserManager(UserManager):
@@ -112,6 +135,11 @@ class User(AbstractUser): # Extending AbstractUser for authentication features
         null=True,
         blank=True,
         help_text="Employee's annual salary for bonus calculation."
+    )
+    authorization_changed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the role, department or access flags last changed; older access tokens are rejected."
     )
      # Use the custom manager
     objects = CustomUserManager()
@@ -120,6 +148,11 @@ class User(AbstractUser): # Extending AbstractUser for authentication features
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = [] # No fields required when creating a user, as email is the username field
 
+    # Roles that supervise the employees of their department
+    SUPERVISOR_ROLES = ['Supervisor', 'HOD-ICT', 'Ass.ICTM']
+    # The columns access tokens carry as claims (see winas.authentication)
+    AUTHORIZATION_FIELDS = ['role_id', 'department_id', 'is_staff', 'is_superuser', 'is_active']
+
     class Meta:
         verbose_name = "Employee"
         verbose_name_plural = "Employees"
@@ -127,11 +160,60 @@ class User(AbstractUser): # Extending AbstractUser for authentication features
     def __str__(self):
         return self.email # Or self.get_full_name() if you prefer
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_authorization = [instance.__dict__.get(field) for field in cls.AUTHORIZATION_FIELDS]
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Stamp changes to what the access tokens carry, so tokens issued before are rejected
+        loaded = getattr(self, '_loaded_authorization', None)
+        current = [self.__dict__.get(field) for field in self.AUTHORIZATION_FIELDS]
+        self._authorization_changed = loaded is not None and loaded != current
+        if self._authorization_changed:
+            self.authorization_changed_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'authorization_changed_at'}
+        super().save(*args, **kwargs)
+        self._loaded_authorization = current
+
+    @property
+    def role_name(self):
+        return self.role.role_name if self.role_id else None
+
+    @property
+    def is_supervisor(self):
+        return self.role_name in self.SUPERVISOR_ROLES
+
+
+class ScoringInputsMixin:
+    """
+    For levels of the hierarchy: remembers the SCORING_FIELDS a row was loaded with, so that
+    saving it only rescores the period summaries when one of them changed (see winas.signals).
+    """
+    SCORING_FIELDS = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_scoring_inputs = instance.scoring_inputs()
+        return instance
+
+    def scoring_inputs(self):
+        return [self.__dict__.get(field) for field in self.SCORING_FIELDS]
+
+    @property
+    def scoring_inputs_changed(self):
+        return getattr(self, '_loaded_scoring_inputs', None) != self.scoring_inputs()
+
 
-class Metrics(models.Model):
+class Metrics(ScoringInputsMixin, models.Model):
     """
     Defines the top-level metrics categories that group performance pillars.
     """
+    SCORING_FIELDS = ('weight',) # A Metrics weight may override a section's share
+
     # metrics_id is automatically created as 'id' by Django's AutoField
     metrics_name = models.CharField(max_length=255, unique=True)
     description = models.TextField(
@@ -153,10 +235,21 @@ class Metrics(models.Model):
         return self.metrics_name
 
 
-class Pillar(models.Model):
+# The appraisal sections a pillar, and the performance records and soft skill ratings under it, belong to
+SECTION_STRATEGIC = 'strategic'
+SECTION_SOFT_SKILL = 'soft_skill'
+SECTION_CHOICES = [
+    (SECTION_STRATEGIC, 'Strategic objectives'),
+    (SECTION_SOFT_SKILL, 'Soft skills'),
+]
+
+
+class Pillar(ScoringInputsMixin, models.Model):
     """
     Defines the broad categories of performance (e.g., Shared Performance Areas, Soft Skills).
     """
+    SCORING_FIELDS = ('section', 'metrics_id')
+
     # pillar_id is automatically created as 'id' by Django's AutoField
     metrics = models.ForeignKey(
         Metrics,
@@ -173,6 +266,14 @@ class Pillar(models.Model):
         blank=True
     )
     pillar_name = models.CharField(max_length=255)
+    section = models.CharField(
+        max_length=20,
+        choices=SECTION_CHOICES,
+        null=True,
+        blank=True,
+        help_text="The appraisal section this pillar's rows are scored in. Left empty, it is taken from "
+                  "the pillar name (see APPRAISAL_SECTIONS)."
+    )
 
     class Meta:
         verbose_name_plural = "Pillars"
@@ -182,10 +283,12 @@ class Pillar(models.Model):
         return f"{self.pillar_name} ({self.metrics})"
 
 
-class KeyResultArea(models.Model):
+class KeyResultArea(ScoringInputsMixin, models.Model):
     """
     Defines specific key result areas (KRAs) under each pillar.
     """
+    SCORING_FIELDS = ('pillar_id',)
+
     # kra_id is automatically created as 'id' by Django's AutoField
     pillar = models.ForeignKey(
         Pillar,
@@ -289,7 +392,102 @@ class PerformanceTarget(models.Model):
         return self.target_description
 
 
-class EmployeePerformance(models.Model):
+def kra_section(kra_id):
+    """Returns the section of the pillar a KRA belongs to (None without a KRA), as fact rows copy it when saved."""
+    if kra_id is None:
+        return None
+    return Pillar.objects.filter(kras=kra_id).values_list('section', flat=True).first()
+
+
+def normalize_period_label(label):
+    """Collapses runs of whitespace, and whitespace around dashes, so "Jan - Jun  2024" names "Jan-Jun 2024"."""
+    return re.sub(r'\s*-\s*', '-', ' '.join(label.split()))
+
+
+class AppraisalPeriod(models.Model):
+    """
+    An appraisal period (e.g. "Jan-Jun 2024") that performance records, soft skill ratings,
+    appraisals, score summaries and bonus runs belong to. The API refers to periods by label.
+    """
+    STATUS_OPEN = 'open'
+    STATUS_CLOSED = 'closed'
+    STATUS_CHOICES = [
+        (STATUS_OPEN, 'Open'),
+        (STATUS_CLOSED, 'Closed'),
+    ]
+
+    label = models.CharField(max_length=100, unique=True)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_OPEN)
+
+    class Meta:
+        verbose_name = "Appraisal Period"
+        verbose_name_plural = "Appraisal Periods"
+        ordering = ['start_date', 'label']
+
+    def __str__(self):
+        return self.label
+
+    def save(self, *args, **kwargs):
+        self.label = normalize_period_label(self.label)
+        super().save(*args, **kwargs)
+
+
+class ScoredRowMixin:
+    """
+    For rows that feed PeriodScoreSummary: remembers the (user, period) a row was loaded
+    with, so that moving it to another user or period refreshes both summaries.
+    """
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score_key = (
+            instance.__dict__.get('user_id'), instance.__dict__.get('period_id')
+        )
+        return instance
+
+
+def target_value_cents(target_value):
+    """A target value (Decimal with 2 places) as the whole number of cents performance records copy."""
+    return int(target_value * 100) if target_value is not None else None
+
+
+def _truncated_division(numerator, denominator):
+    """
+    numerator / denominator in SQL as an integer division, which truncates towards zero on
+    PostgreSQL and SQLite alike, or 0 when the denominator (a field name) is missing or zero.
+    """
+    return models.Case(
+        models.When(models.Q(**{f'{denominator}__isnull': True}) | models.Q(**{denominator: 0}), then=models.Value(0)),
+        default=Cast(numerator / models.F(denominator), models.IntegerField()),
+        output_field=models.IntegerField(),
+    )
+
+
+def performance_scores(actual_achievements, target_values_cents, weights):
+    """
+    Calculates percentage_achieved (actual / target value) and weighted_average
+    (actual / target value * weight) for many performance records at once, truncated to the
+    whole numbers the columns store. The target value is given in cents (see target_value_cents)
+    so the division is exact integer arithmetic. A missing or zero target value scores 0.
+
+    The database derives the stored columns the same way (see EmployeePerformance); this is for
+    values needed before a row is read back.
+    """
+    actuals = np.asarray(actual_achievements, dtype=np.int64) * 100
+    cents = np.array([value or 0 for value in target_values_cents], dtype=np.int64)
+    weights = np.array([weight or 0 for weight in weights], dtype=np.int64)
+    divisors = np.where(cents == 0, 1, cents)
+
+    def truncated_quotient(numerators):
+        quotients = np.abs(numerators) // np.abs(divisors) * np.sign(numerators) * np.sign(divisors)
+        return np.where(cents == 0, 0, quotients)
+
+    return truncated_quotient(actuals), truncated_quotient(actuals * weights)
+
+
+class EmployeePerformance(ScoredRowMixin, models.Model):
     """
     Records an employee's actual performance against specific performance targets for a given period.
     """
@@ -313,28 +511,57 @@ class EmployeePerformance(models.Model):
         null=True,
         blank=True
     )
-    # Using CharField for period for flexibility (e.g., "Jan-Jun 2024").
-    # For more complex period tracking, consider a separate `AppraisalPeriod` model.
-    period_under_review = models.CharField(max_length=100)
+    period = models.ForeignKey(
+        AppraisalPeriod,
+        on_delete=models.PROTECT, # Periods with records cannot be deleted
+        related_name='performance_records'
+    )
     actual_achievement = models.IntegerField(
         help_text="The actual value achieved by the employee."
     )
-    # These can be properties or calculated on save if preferred,
-    # but storing them can optimize reads for reporting.
-    percentage_achieved = models.IntegerField(
+    # The target's value (in cents) and weight, copied when the row is saved so the database can
+    # derive percentage_achieved and weighted_average without joining the target
+    target_value_cents = models.BigIntegerField(
         null=True,
         blank=True,
-        help_text="Calculated: Actual Achievement / Target Value."
+        editable=False,
+        help_text="Copied: the performance target's value, in cents."
+    )
+    target_weight = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Copied: the performance target's weight."
+    )
+    percentage_achieved = models.GeneratedField(
+        expression=_truncated_division(
+            Cast('actual_achievement', models.BigIntegerField()) * 100, 'target_value_cents'
+        ),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        help_text="Calculated by the database: Actual Achievement / Target Value."
     )
     actual_rating = models.IntegerField(
         null=True,
         blank=True,
         help_text="The rating given for the achievement (e.g., 60, 100)."
     )
-    weighted_average = models.IntegerField(
+    weighted_average = models.GeneratedField(
+        expression=_truncated_division(
+            Cast('actual_achievement', models.BigIntegerField()) * 100 * Coalesce('target_weight', 0),
+            'target_value_cents'
+        ),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        help_text="Calculated by the database: Actual Achievement / Target Value * Weight."
+    )
+    section = models.CharField(
+        max_length=20,
+        choices=SECTION_CHOICES,
         null=True,
         blank=True,
-        help_text="Calculated: Percentage Achieved * Weight."
+        editable=False,
+        help_text="Copied from the pillar of the row's performance target when saved (see winas.sections)."
     )
     comments = models.TextField(
         null=True,
@@ -345,24 +572,56 @@ class EmployeePerformance(models.Model):
     class Meta:
         verbose_name = "Employee Performance"
         verbose_name_plural = "Employee Performances"
-        unique_together = ('user', 'kpi', 'period_under_review')
+        unique_together = ('user', 'kpi', 'period')
+        indexes = [
+            # ?period= (or ?period_under_review=) alone, or together with ?user=
+            models.Index(fields=['period', 'user']),
+            # ?department= resolves to the department's users and probes their rows per period
+            models.Index(fields=['user', 'period']),
+            # Section scores of a period read from this index alone, without visiting the table
+            models.Index(fields=['period', 'section', 'user', 'target_weight', 'weighted_average']),
+        ]
 
     def __str__(self):
-        return f"{self.user.username}'s performance for {self.performance_target.target_description} ({self.period_under_review})"
-
-    def save(self, *args, **kwargs):
-        # Calculate percentage_achieved and weighted_average before saving
-        if self.performance_target.target_value is not None and self.performance_target.target_value != 0:
-            self.percentage_achieved = (self.actual_achievement / self.performance_target.target_value)
-        else:
-            self.percentage_achieved = 0.0 # Handle division by zero
+        return f"{self.user.username}'s performance for {self.performance_target.target_description} ({self.period})"
 
-        self.weighted_average = self.percentage_achieved * self.performance_target.weight
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_target_id = instance.__dict__.get('performance_target_id')
+        return instance
 
-        super().save(*args, **kwargs)
+    def save(self, *args, **kwargs):
+        # Copy what the row needs from its target (as bulk uploads do, see winas.bulk) in one query,
+        # unless the row keeps its target: edits of the target are copied by winas.targets
+        if self._state.adding or self.performance_target_id != getattr(self, '_loaded_target_id', None):
+            target_value, self.target_weight, self.section = PerformanceTarget.objects.filter(
+                pk=self.performance_target_id
+            ).values_list('target_value', 'weight', 'kra__pillar__section').first() or (None, None, None)
+            self.target_value_cents = target_value_cents(target_value)
+        # The database computes the derived columns; mirror them so the instance needs no reload
+        percentage_achieved, weighted_average = performance_scores(
+            [self.actual_achievement], [self.target_value_cents], [self.target_weight]
+        )
+        self.percentage_achieved = int(percentage_achieved[0])
+        self.weighted_average = int(weighted_average[0])
+
+        # Atomic so the score summary refresh (post_save) commits or rolls back with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_target_id = self.performance_target_id
+
+
+def soft_skill_scores(ratings, weights):
+    """
+    Calculates the weighted_average of many soft skill ratings at once: the rating (out of 100)
+    times the weight, truncated to the whole number the column stores.
+    """
+    products = np.asarray(ratings, dtype=np.int64) * np.asarray(weights, dtype=np.int64)
+    return np.abs(products) // 100 * np.sign(products)
 
 
-class SoftSkillRating(models.Model):
+class SoftSkillRating(ScoredRowMixin, models.Model):
     """
     Specifically handles the soft skills ratings for an employee.
     """
@@ -388,18 +647,30 @@ class SoftSkillRating(models.Model):
         null=True,
         blank=True
     )
-    # Using CharField for period consistency with EmployeePerformance
-    period_under_review = models.CharField(max_length=100, default="Annual") # Assuming soft skills are often annual
+    period = models.ForeignKey(
+        AppraisalPeriod,
+        on_delete=models.PROTECT,
+        related_name='soft_skill_ratings'
+    )
     rating = models.IntegerField(
         help_text="The score given for the soft skill (e.g., 80, 70)."
     )
     weight = models.IntegerField(
         help_text="The weight of the soft skill."
     )
-    weighted_average = models.IntegerField(
+    weighted_average = models.GeneratedField(
+        expression=models.F('rating') * models.F('weight') / 100,
+        output_field=models.IntegerField(),
+        db_persist=True,
+        help_text="Calculated by the database: Rating * Weight / 100 (the rating is out of 100)."
+    )
+    section = models.CharField(
+        max_length=20,
+        choices=SECTION_CHOICES,
         null=True,
         blank=True,
-        help_text="Calculated: Rating * Weight (assuming rating is scaled, e.g., out of 100)."
+        editable=False,
+        help_text="Copied from the pillar of the row's KRA when saved (see winas.sections)."
     )
     comments = models.TextField(
         null=True,
@@ -410,15 +681,25 @@ class SoftSkillRating(models.Model):
     class Meta:
         verbose_name = "Soft Skill Rating"
         verbose_name_plural = "Soft Skill Ratings"
-        unique_together = ('user', 'soft_skill_kpi', 'period_under_review')
+        unique_together = ('user', 'soft_skill_kpi', 'period')
+        indexes = [
+            # ?period= (or ?period_under_review=) alone, or together with ?user=
+            models.Index(fields=['period', 'user']),
+            # ?department= resolves to the department's users and probes their rows per period
+            models.Index(fields=['user', 'period']),
+            # Section scores of a period read from this index alone, without visiting the table
+            models.Index(fields=['period', 'section', 'user', 'weight', 'weighted_average']),
+        ]
 
     def __str__(self):
-        return f"{self.user.username}'s {self.soft_skill_kra.kra_name} rating ({self.period_under_review})"
+        return f"{self.user.username}'s {self.soft_skill_kra.kra_name} rating ({self.period})"
 
     def save(self, *args, **kwargs):
-        # Assuming rating is on a scale that can be multiplied by weight directly or needs conversion
-        self.weighted_average = (self.rating / 100.0) * self.weight if self.weight else 0.0 # Example if rating is %
-        super().save(*args, **kwargs)
+        # The database computes weighted_average; mirror it so the instance needs no reload
+        self.weighted_average = int(soft_skill_scores([self.rating], [self.weight])[0])
+        self.section = kra_section(self.soft_skill_kra_id)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class OverallAppraisal(models.Model):
@@ -432,17 +713,22 @@ class OverallAppraisal(models.Model):
         related_name='overall_appraisal',
         help_text="The employee being appraised."
     )
-    period_under_review = models.CharField(max_length=100)
+    period = models.ForeignKey(
+        AppraisalPeriod,
+        on_delete=models.PROTECT,
+        related_name='appraisals'
+    )
     strategic_objectives_score = models.IntegerField(
         help_text="Total score for Strategic Objectives (e.g., Section B)."
     )
     soft_skills_score = models.IntegerField(
         help_text="Total score for Soft Skills (e.g., Section C)."
     )
-    total_performance_rating = models.IntegerField(
-        null=True,
-        blank=True,
-        help_text="Combined score (Strategic Objectives + Soft Skills)."
+    total_performance_rating = models.GeneratedField(
+        expression=models.F('strategic_objectives_score') + models.F('soft_skills_score'),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        help_text="Calculated by the database: Strategic Objectives + Soft Skills."
     )
     final_comments_appraisee = models.TextField(null=True, blank=True)
     final_comments_appraiser = models.TextField(null=True, blank=True)
@@ -464,12 +750,17 @@ class OverallAppraisal(models.Model):
     class Meta:
         verbose_name = "Overall Appraisal"
         verbose_name_plural = "Overall Appraisals"
-        unique_together = ('user', 'period_under_review') # One overall appraisal per user per period
+        unique_together = ('user', 'period') # One overall appraisal per user per period
+        indexes = [
+            models.Index(fields=['period', 'date_of_appraisal']),
+            models.Index(fields=['date_of_appraisal']),
+        ]
 
     def __str__(self):
-        return f"Overall Appraisal for {self.user.username} ({self.period_under_review})"
+        return f"Overall Appraisal for {self.user.username} ({self.period})"
 
     def save(self, *args, **kwargs):
+        # The database computes total_performance_rating; mirror it so the instance needs no reload
         self.total_performance_rating = self.strategic_objectives_score + self.soft_skills_score
         super().save(*args, **kwargs)
 
@@ -542,4 +833,258 @@ class RatingKey(models.Model):
         ordering = ['point_scale_min'] # Order by scale for logical display
 
     def __str__(self):
-        return f"{self.point_scale_min}% - {self.point_scale_max}%: {self.description}"
\ No newline at end of file
+        return f"{self.point_scale_min}% - {self.point_scale_max}%: {self.description}"
+
+class BonusRun(models.Model):
+    """
+    A persisted bonus calculation for a bonus pool and appraisal period, executed by the worker.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    total_bonus_pool = models.DecimalField(max_digits=15, decimal_places=2)
+    period = models.ForeignKey(
+        AppraisalPeriod,
+        on_delete=models.PROTECT,
+        related_name='bonus_runs'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    input_fingerprint = models.CharField(
+        max_length=64,
+        help_text="Checksum of the run parameters and the data it was computed from."
+    )
+    total_employees = models.PositiveIntegerField(null=True, blank=True)
+    processed_employees = models.PositiveIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    requested_by = models.ForeignKey(
+        'User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bonus_runs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    claimed_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="While running: when the worker's claim on the run expires unless renewed (see winas.jobs)."
+    )
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Bonus Run"
+        verbose_name_plural = "Bonus Runs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['input_fingerprint', 'status']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Bonus run {self.pk} ({self.period}, {self.status})"
+
+
+class BonusResult(models.Model):
+    """
+    One employee's row of a completed bonus run, as calculated at the time of the run.
+    """
+    run = models.ForeignKey(
+        BonusRun,
+        on_delete=models.CASCADE,
+        related_name='results'
+    )
+    user = models.ForeignKey(
+        'User',
+        on_delete=models.SET_NULL, # Keep payroll history even if the employee is removed later
+        null=True,
+        blank=True,
+        related_name='bonus_results'
+    )
+    username = models.CharField(max_length=150)
+    employee_name = models.CharField(max_length=255, blank=True)
+    department = models.CharField(max_length=255, null=True, blank=True)
+    role = models.CharField(max_length=255, null=True, blank=True)
+    annual_salary = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    strategic_score = models.DecimalField(max_digits=15, decimal_places=2)
+    soft_skill_score = models.DecimalField(max_digits=15, decimal_places=2)
+    total_employee_score = models.DecimalField(max_digits=15, decimal_places=2)
+    performance_rating = models.DecimalField(max_digits=15, decimal_places=2)
+    calculated_bonus = models.DecimalField(max_digits=15, decimal_places=2)
+    warnings = models.TextField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Bonus Result"
+        verbose_name_plural = "Bonus Results"
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.username}: {self.calculated_bonus} (run {self.run_id})"
+
+
+class DeletionJob(models.Model):
+    """
+    A queued deletion of a pillar or KRA and everything beneath it, executed by the worker.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    OBJECT_PILLAR = 'pillar'
+    OBJECT_KRA = 'key_result_area'
+    OBJECT_CHOICES = [
+        (OBJECT_PILLAR, 'Pillar'),
+        (OBJECT_KRA, 'Key Result Area'),
+    ]
+
+    object_type = models.CharField(max_length=20, choices=OBJECT_CHOICES)
+    object_id = models.PositiveIntegerField()
+    object_name = models.CharField(
+        max_length=255,
+        help_text="The deleted object as it was named, kept once it is gone."
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    plan = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="The rows the deletion removes per table, as planned when it was requested."
+    )
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    deleted_rows = models.PositiveIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    requested_by = models.ForeignKey(
+        'User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='deletion_jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    claimed_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="While running: when the worker's claim on the job expires unless renewed (see winas.jobs)."
+    )
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Deletion Job"
+        verbose_name_plural = "Deletion Jobs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['object_type', 'object_id', 'status']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Deletion job {self.pk} ({self.object_name}, {self.status})"
+
+
+class PeriodScoreSummary(models.Model):
+    """
+    Materialized appraisal scores of one employee for one period.
+    Kept up to date by winas.summaries whenever a performance record or soft skill rating changes.
+    """
+    user = models.ForeignKey(
+        'User',
+        on_delete=models.CASCADE,
+        related_name='score_summaries'
+    )
+    period = models.ForeignKey(
+        AppraisalPeriod,
+        on_delete=models.PROTECT,
+        related_name='score_summaries'
+    )
+    strategic_weight = models.IntegerField(default=0, help_text="Sum of the weights of the strategic objective records.")
+    strategic_weighted_sum = models.IntegerField(default=0, help_text="Sum of the weighted averages of the strategic objective records.")
+    soft_skill_weight = models.IntegerField(default=0, help_text="Sum of the weights of the soft skill ratings.")
+    soft_skill_weighted_sum = models.IntegerField(default=0, help_text="Sum of the weighted averages of the soft skill ratings.")
+    strategic_share = models.IntegerField(help_text="Share (%) of the strategic objectives section in the total score.")
+    soft_skill_share = models.IntegerField(help_text="Share (%) of the soft skills section in the total score.")
+    strategic_score = models.DecimalField(max_digits=15, decimal_places=4)
+    soft_skill_score = models.DecimalField(max_digits=15, decimal_places=4)
+    total_score = models.DecimalField(max_digits=15, decimal_places=4)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Period Score Summary"
+        verbose_name_plural = "Period Score Summaries"
+        unique_together = ('user', 'period')
+        indexes = [
+            models.Index(fields=['period', 'user']),
+        ]
+
+    def __str__(self):
+        return f"Score summary for {self.user_id} ({self.period_id}): {self.total_score}"
+
+
+class TableVersion(models.Model):
+    """
+    A counter per model that is bumped whenever any of its rows is written (see winas.versioning).
+    Read endpoints build their ETags from these, so unchanged data can be answered with 304 Not Modified.
+    """
+    table = models.CharField(max_length=100, unique=True, help_text="Model label, e.g. 'winas.department'.")
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Table Version"
+        verbose_name_plural = "Table Versions"
+
+    def __str__(self):
+        return f"{self.table} v{self.version}"
+
+
+class OutboundEmail(models.Model):
+    """
+    An email waiting for the worker to send it (see winas.outbox). Rows are written in the
+    transaction that causes the email, so it goes out only if that transaction commits, and
+    survives the mail server being slow or down. The body is cleared once the email is sent,
+    as it may carry a temporary password.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    to = models.EmailField(max_length=255)
+    from_email = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="When the worker may (re)try sending it.")
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Outbound Emails"
+        indexes = [
+            # The worker's poll: pending emails that are due, oldest first
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"Email to {self.to} ({self.status})"
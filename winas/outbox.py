@@ -0,0 +1,107 @@
+# performance_appraisal/outbox.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+OUTBOX_BATCH_SIZE = 50
+# How long a claimed batch is reserved for the worker that claimed it; a worker that dies
+# mid-batch leaves its emails to be retried once this has passed
+OUTBOX_CLAIM_SECONDS = 300
+
+
+def queue_emails(messages):
+    """
+    Stores EmailMessages (one recipient each) in the outbox for the worker to send. Call it
+    inside the transaction that causes the emails, so they are sent only if it commits.
+    """
+    OutboundEmail.objects.bulk_create([
+        OutboundEmail(to=message.to[0], from_email=message.from_email, subject=message.subject, body=message.body)
+        for message in messages
+    ])
+
+
+def retry_delay(attempts):
+    """Exponential backoff: OUTBOX_RETRY_SECONDS (default 60) doubled after every failed attempt, up to an hour."""
+    base = getattr(settings, 'OUTBOX_RETRY_SECONDS', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 3600))
+
+
+def claim_outbox_batch(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Reserves up to `batch_size` due emails for this worker and returns them. Rows locked by
+    another worker are skipped on PostgreSQL (SQLite has a single writer anyway), and claimed
+    rows are pushed OUTBOX_CLAIM_SECONDS into the future so no other worker picks them up.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            attempts=F('attempts') + 1, next_attempt_at=now + timedelta(seconds=OUTBOX_CLAIM_SECONDS)
+        )
+    for email in batch:
+        email.attempts += 1
+    return batch
+
+
+def send_outbox_batch(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Sends one claimed batch over a single mail server connection. Emails that fail are retried
+    with exponential backoff until OUTBOX_MAX_ATTEMPTS (default 6) attempts have failed.
+    Returns (sent, failed) counts.
+    """
+    batch = claim_outbox_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    sent, failures = [], []
+    # send_messages() connects and disconnects by itself unless the connection is already open,
+    # so it is opened here and kept open for the whole batch
+    connection = get_connection(fail_silently=False)
+    connected = False
+    try:
+        for email in batch:
+            message = EmailMessage(subject=email.subject, body=email.body, from_email=email.from_email, to=[email.to])
+            try:
+                if not connected:
+                    connection.open()
+                    connected = True
+                connection.send_messages([message])
+            except Exception as e:
+                failures.append((email, f"{type(e).__name__}: {e}"))
+                connection.close()  # Reconnect for the next email
+                connected = False
+            else:
+                sent.append(email.pk)
+    finally:
+        connection.close()
+
+    now = timezone.now()
+    OutboundEmail.objects.filter(pk__in=sent).update(status=OutboundEmail.STATUS_SENT, sent_at=now, body='', last_error=None)
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 6)
+    for email, error in failures:
+        if email.attempts >= max_attempts:
+            OutboundEmail.objects.filter(pk=email.pk).update(status=OutboundEmail.STATUS_FAILED, last_error=error)
+        else:
+            OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=now + retry_delay(email.attempts), last_error=error)
+    return len(sent), len(failures)
+
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE):
+    """Sends batches until no email is due. Returns the number of emails sent or failed."""
+    processed = 0
+    while True:
+        sent, failed = send_outbox_batch(batch_size)
+        if not sent and not failed:
+            return processed
+        processed += sent + failed
@@ -0,0 +1,194 @@
+# performance_appraisal/pagination.py
+import json
+from base64 import b64decode, b64encode
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+# Cursor values JSON cannot carry as-is, by tag: how to write them and read them back losslessly
+# (DjangoJSONEncoder would cut datetimes to milliseconds, and the cursor would no longer match its row)
+_CURSOR_TYPES = {
+    'dt': (datetime, datetime.isoformat, parse_datetime),
+    'd': (date, date.isoformat, parse_date),
+    'dec': (Decimal, str, Decimal),
+}
+
+
+def _encode_cursor_value(value):
+    for tag, (value_type, write, _) in _CURSOR_TYPES.items():
+        if isinstance(value, value_type):  # datetime is checked before date, its base class
+            return {tag: write(value)}
+    return value
+
+
+def _decode_cursor_value(value):
+    if isinstance(value, dict):
+        (tag, text), = value.items()
+        parsed = _CURSOR_TYPES[tag][2](text)
+        if parsed is None:
+            raise ValueError
+        return parsed
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination with opaque cursors.
+
+    Pages are selected with WHERE (ordering_field, id) > (last value, last id) instead of
+    OFFSET, so page 1000 costs the same single indexed range scan as page one, and rows
+    inserted while a client is paging never shift or repeat results.
+
+    Query parameters:
+      - page_size: rows per page (default PAGE_SIZE, capped at max_page_size)
+      - cursor:    the opaque value taken from a previous response's next/previous link
+      - ordering:  one of the view's `ordering_fields`, optionally prefixed with '-'
+      - count:     'approximate' (planner estimate, no table scan on PostgreSQL) or 'exact'
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, view)
+        self.count_queryset = queryset
+
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor['reverse'])
+
+        # Walking backwards means reading the opposite direction and flipping the page afterwards
+        descending = self.descending != self.reverse
+        if cursor:
+            queryset = queryset.filter(self._after(cursor['position'], descending))
+        queryset = queryset.order_by(*self._order_by(descending))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+        return self.page
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        count_mode = self.request.query_params.get(self.count_query_param)
+        if count_mode == 'exact':
+            response['count'] = self.count_queryset.count()
+        elif count_mode == 'approximate':
+            response['count'] = approximate_count(self.count_queryset)
+        return Response(response)
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request, view):
+        """Returns (field, descending). `id` is always the tie-breaker, so any allowed field gives a total order."""
+        allowed = getattr(view, 'ordering_fields', None) or ['id']
+        requested = request.query_params.get(self.ordering_query_param) or getattr(view, 'ordering', None) or 'id'
+        field = requested.lstrip('-')
+        if field not in allowed and field != 'id':
+            field, requested = 'id', 'id'
+        return field, requested.startswith('-')
+
+    def _order_by(self, descending):
+        prefix = '-' if descending else ''
+        if self.field == 'id':
+            return [f'{prefix}id']
+        return [f'{prefix}{self.field}', f'{prefix}id']
+
+    def _after(self, position, descending):
+        value, last_id = position
+        lookup = 'lt' if descending else 'gt'
+        if self.field == 'id':
+            return Q(**{f'id__{lookup}': last_id})
+        return Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'id__{lookup}': last_id})
+
+    def _position(self, row):
+        if isinstance(row, dict):  # .values() rows, see winas.readers
+            return [row[self.field], row['id']]
+        return [getattr(row, self.field), row.pk]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = cursor['p']
+            if not isinstance(position, list) or len(position) != 2 or cursor.get('f') != self.field:
+                raise ValueError
+            position = [_decode_cursor_value(position[0]), position[1]]
+        except (TypeError, ValueError, KeyError, ArithmeticError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return {'position': position, 'reverse': bool(cursor.get('r'))}
+
+    def encode_cursor(self, position, reverse):
+        value, last_id = position
+        cursor = {'f': self.field, 'p': [_encode_cursor_value(value), last_id]}
+        if reverse:
+            cursor['r'] = 1
+        encoded = b64encode(json.dumps(cursor).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+def approximate_count(queryset):
+    """
+    Returns the planner's row estimate for a queryset on PostgreSQL (no rows are read),
+    and falls back to an exact COUNT(*) on other databases.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def wants_pagination(request, paginator):
+    """Pagination is opt-in: lists stay plain arrays unless the client asks for a page or a cursor."""
+    return (
+        paginator.page_size_query_param in request.query_params
+        or paginator.cursor_query_param in request.query_params
+    )
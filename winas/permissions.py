@@ -35,8 +35,7 @@ class IsSupervisorOrAdmin(permissions.BasePermission):
         if request.user.is_staff or request.user.is_superuser:
             return True
 
-        return hasattr(request.user, 'role') and request.user.role and \
-               request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM']
+        return request.user.is_supervisor
 
 
 class IsOwnerOrAdmin(permissions.BasePermission):
@@ -49,9 +48,9 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             return True
 
         if request.method in permissions.SAFE_METHODS:
-            return obj.user == request.user
+            return obj.user_id == request.user.pk
 
-        return obj.user == request.user
+        return obj.user_id == request.user.pk
 
 class IsDepartmentSupervisor(permissions.BasePermission):
     """
@@ -66,11 +65,7 @@ class IsDepartmentSupervisor(permissions.BasePermission):
             return True
 
         # Check if the user is a supervisor and has a department assigned
-        is_supervisor = hasattr(request.user, 'role') and request.user.role and \
-                        request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM']
-        has_department = hasattr(request.user, 'department') and request.user.department is not None
-
-        return is_supervisor and has_department
+        return request.user.is_supervisor and request.user.department_id is not None
 
     def has_object_permission(self, request, view, obj):
         # Admins/Superusers can bypass this
@@ -78,10 +73,10 @@ class IsDepartmentSupervisor(permissions.BasePermission):
             return True
 
         # Check if the requesting user is a supervisor for the object's department
-        if hasattr(obj, 'department') and obj.department: # For User objects
-            return request.user.department == obj.department
-        elif hasattr(obj, 'user') and hasattr(obj.user, 'department') and obj.user.department: # For performance/training objects
-            return request.user.department == obj.user.department
+        if getattr(obj, 'department_id', None): # For User objects
+            return request.user.department_id == obj.department_id
+        elif hasattr(obj, 'user') and obj.user.department_id: # For performance/training objects
+            return request.user.department_id == obj.user.department_id
         
         # If the object doesn't have a department or associated user with a department,
         # then this permission doesn't apply, or it's implicitly denied if not handled by other permissions.
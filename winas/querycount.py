@@ -0,0 +1,115 @@
+# performance_appraisal/querycount.py
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+# Parameter lists of IN (...) vary with the number of values, not with the statement
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_WHITESPACE = re.compile(r'\s+')
+_SAVEPOINT = re.compile(r'^(RELEASE |ROLLBACK TO )?SAVEPOINT ', re.IGNORECASE)
+
+
+def sql_shape(sql):
+    """Returns a statement with its parameter lists collapsed, so repeated executions compare equal."""
+    return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', sql.strip()))
+
+
+class QueryLog:
+    """Collects the SQL executed on the connections it is installed on (see record_queries)."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, threshold):
+        """Returns {shape: executions} for the statements run at least `threshold` times."""
+        shapes = Counter(sql_shape(sql) for sql in self.statements if not _SAVEPOINT.match(sql))
+        return {shape: times for shape, times in shapes.items() if times >= threshold}
+
+
+@contextmanager
+def record_queries(log=None):
+    """
+    Records every statement executed on any database connection while the block runs, in a new
+    QueryLog or adding to the given one.
+    """
+    log = QueryLog() if log is None else log
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+        yield log
+
+
+class QueryCountMiddleware:
+    """
+    Development and test middleware that records the queries each request runs.
+
+    Every response carries an X-Query-Count header. A request is reported when it runs more than
+    QUERY_COUNT_BUDGET queries (no limit by default), or when one statement shape is executed
+    QUERY_COUNT_REPEAT_THRESHOLD times or more (default 5), which is the mark of an N+1: a query
+    per row instead of a join or a prefetch. Reports are logged as warnings, or raised as
+    QueryBudgetExceeded when QUERY_COUNT_STRICT is set.
+
+    Streaming responses (the CSV and NDJSON exports) run most of their queries while the body is
+    iterated, after the headers are sent: their X-Query-Count only covers the queries run before
+    the first byte, but the queries run while streaming are counted too, and the request is checked
+    once the whole body has been sent.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries() as log:
+            response = self.get_response(request)
+        response['X-Query-Count'] = str(log.count)
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._counted(request, response.streaming_content, log)
+        else:
+            self.report(request, log)
+        return response
+
+    def _counted(self, request, chunks, log):
+        chunks = iter(chunks)
+        while True:
+            # Recording only while a chunk is produced, never across a yield
+            with record_queries(log):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+        self.report(request, log)
+
+    def report(self, request, log):
+        problems = []
+        budget = getattr(settings, 'QUERY_COUNT_BUDGET', None)
+        if budget is not None and log.count > budget:
+            problems.append(f"{log.count} queries, over the budget of {budget}")
+        threshold = getattr(settings, 'QUERY_COUNT_REPEAT_THRESHOLD', 5)
+        for shape, times in log.repeated(threshold).items():
+            problems.append(f"possible N+1, run {times} times: {shape}")
+
+        if problems:
+            message = f"{request.method} {request.path}: " + '; '.join(problems)
+            if getattr(settings, 'QUERY_COUNT_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -0,0 +1,153 @@
+# performance_appraisal/readers.py
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+
+from .models import User
+
+
+# Model methods used as serializer sources, computed from the columns they read
+COMPUTED_SOURCES = {
+    (User, 'get_full_name'): (
+        ['first_name', 'last_name'],
+        lambda first_name, last_name: ("%s %s" % (first_name, last_name)).strip(),  # AbstractUser.get_full_name
+    ),
+}
+
+# Fields whose representation of a database value is the value itself
+PASSTHROUGH_FIELDS = (serializers.PrimaryKeyRelatedField, serializers.ReadOnlyField)
+
+# Marks a field left out of an item, as DRF does when a relation along a read-only source is empty
+_SKIP = object()
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class ValuesReader:
+    """
+    Builds a serializer's list representation straight from .values() rows: every readable field
+    is compiled once into the ORM lookups it reads and a function turning those columns into the
+    field's output, so no model instances or per-row field binding are involved.
+
+    Serializers opt in with `read_from_values = True`; use for_serializer(), which returns None
+    when a field (e.g. a SerializerMethodField) can only be computed from a model instance.
+    """
+
+    def __init__(self, serializer, annotations=()):
+        self.model = serializer.Meta.model
+        self.annotations = set(annotations)
+        self.extractors = []
+        lookups = {'id'}
+        for field in serializer._readable_fields:
+            extractor, field_lookups = self._compile(field)
+            self.extractors.append((field.field_name, extractor))
+            lookups.update(field_lookups)
+        self.lookups = sorted(lookups)
+
+    @classmethod
+    def for_serializer(cls, serializer, annotations=()):
+        """`annotations` are the names annotated on the queryset that will be read."""
+        if not getattr(serializer, 'read_from_values', False):
+            return None
+        try:
+            return cls(serializer, annotations)
+        except _Unsupported:
+            return None
+
+    def values(self, queryset, extra=()):
+        """Returns the queryset as .values() rows holding every column the extractors need."""
+        return queryset.values(*sorted(set(self.lookups) | set(extra)))
+
+    def read(self, rows):
+        data = []
+        for row in rows:
+            item = {}
+            for field_name, extractor in self.extractors:
+                value = extractor(row)
+                if value is not _SKIP:
+                    item[field_name] = value
+            data.append(item)
+        return data
+
+    def _compile(self, field):
+        if isinstance(field, (serializers.SerializerMethodField, serializers.ManyRelatedField, serializers.BaseSerializer)):
+            raise _Unsupported(field.field_name)
+        attrs = field.source_attrs
+        if not attrs:
+            raise _Unsupported(field.field_name)
+        if len(attrs) == 1 and attrs[0] in self.annotations:
+            return self._column(field, [], attrs[0], field.to_representation)
+
+        model, path, relations = self.model, [], []
+        for position, attr in enumerate(attrs):
+            last = position == len(attrs) - 1
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                if last and (model, attr) in COMPUTED_SOURCES:
+                    columns, compute = COMPUTED_SOURCES[(model, attr)]
+                    return self._computed(field, relations, ['__'.join(path + [c]) for c in columns], compute)
+                raise _Unsupported(field.field_name)
+            if not model_field.concrete or model_field.many_to_many:
+                raise _Unsupported(field.field_name)
+            path.append(attr)
+            if model_field.is_relation and attr == model_field.attname:
+                # The raw foreign key column (e.g. `user_id`), read like any other column
+                if not last:
+                    raise _Unsupported(field.field_name)
+            elif model_field.is_relation:
+                if last and isinstance(field, serializers.SlugRelatedField) and '__' not in field.slug_field:
+                    # A related field represented by one of its columns, as SlugRelatedField does
+                    if model_field.null:
+                        relations.append('__'.join(path))
+                    path.append(field.slug_field)
+                    return self._column(field, relations, '__'.join(path), None)
+                if last:
+                    # A related field represented by its primary key, as PrimaryKeyRelatedField does
+                    if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None:
+                        raise _Unsupported(field.field_name)
+                    break
+                relations.append('__'.join(path))
+                model = model_field.related_model
+            elif not last:
+                raise _Unsupported(field.field_name)
+
+        lookup = '__'.join(path)
+        convert = None if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation
+        return self._column(field, relations, lookup, convert)
+
+    @staticmethod
+    def _missing(field):
+        """What the serializer outputs when a relation along the source is empty."""
+        if field.default is not empty:
+            raise _Unsupported(field.field_name)
+        if field.allow_null:
+            return None
+        if not field.required:
+            return _SKIP
+        raise _Unsupported(field.field_name)
+
+    def _column(self, field, relations, lookup, convert):
+        missing = self._missing(field) if relations else None
+
+        def extract(row):
+            for relation in relations:
+                if row[relation] is None:
+                    return missing
+            value = row[lookup]
+            if value is None or convert is None:
+                return value
+            return convert(value)
+        return extract, [lookup, *relations]
+
+    def _computed(self, field, relations, columns, compute):
+        missing = self._missing(field) if relations else None
+
+        def extract(row):
+            for relation in relations:
+                if row[relation] is None:
+                    return missing
+            return compute(*(row[column] for column in columns))
+        return extract, [*columns, *relations]
@@ -0,0 +1,25 @@
+# performance_appraisal/scoping.py
+from django.db.models import Q
+
+
+def visible_rows(user, owner='user'):
+    """
+    Returns the condition limiting rows to the ones `user` may see, or None when they may see
+    every row. `owner` is the path to the employee a row belongs to ('' for User rows).
+
+    - Admins (staff or superusers) see every row.
+    - Supervisors with a department see the rows of the employees in their department.
+    - Everyone else sees only their own rows.
+    """
+    if user.is_staff or user.is_superuser:
+        return None
+    prefix = f'{owner}__' if owner else ''
+    if user.is_supervisor and user.department_id:
+        return Q(**{f'{prefix}department_id': user.department_id})
+    return Q(**{f'{owner}_id' if owner else 'pk': user.pk})
+
+
+def scope_queryset(queryset, user, owner='user'):
+    """Filters `queryset` in SQL to the rows `user` may see, so no other row is ever fetched."""
+    condition = visible_rows(user, owner)
+    return queryset if condition is None else queryset.filter(condition)
@@ -0,0 +1,228 @@
+# performance_appraisal/scoring.py
+import hashlib
+import itertools
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Case, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Pillar, EmployeePerformance, SoftSkillRating
+
+
+# Used when settings.APPRAISAL_SECTIONS is not defined. Each section lists the names of the pillars
+# classified in it when they are saved without a section (see Pillar.section), the fact table whose
+# rows are scored in it (performance records or soft skill ratings; rows of the other table under
+# its pillars count in no section) and its share (in %) of the total score when no Metrics weight
+# applies. The shares add up to 100.
+DEFAULT_APPRAISAL_SECTIONS = {
+    'strategic': {
+        'pillars': ["SHARED PERFORMANCE AREAS", "ICT & BUSINESS PROCESSES"],
+        'rows': 'employee_performance',
+        'weight': 70,
+    },
+    'soft_skill': {
+        'pillars': ["SOFT SKILLS"],
+        'rows': 'soft_skill_ratings',
+        'weight': 30,
+    },
+}
+
+
+def appraisal_sections():
+    return getattr(settings, 'APPRAISAL_SECTIONS', DEFAULT_APPRAISAL_SECTIONS)
+
+
+def pillar_name_section(pillar_name, sections=None):
+    """Returns the section whose configured pillar names include pillar_name, or None."""
+    for key, section in (sections or appraisal_sections()).items():
+        if pillar_name in section['pillars']:
+            return key
+    return None
+
+
+def rescale_shares(shares):
+    """
+    Scales positive integer shares to add up to 100, keeping them integers: the shares with the
+    largest remainders get the points left over after rounding down.
+    """
+    total = sum(shares)
+    scaled = [share * 100 // total for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda index: (-(shares[index] * 100 % total), index))
+    for index in by_remainder[:100 - sum(scaled)]:
+        scaled[index] += 1
+    return scaled
+
+
+def compute_section_scores(user_index, section_index, weighted_averages, weights, n_users, section_weights):
+    """
+    Scores every employee in one vectorized pass.
+
+    The first four arguments are parallel arrays with one entry per fact row (performance
+    record or soft skill rating); rows with a negative section_index are ignored.
+    Returns (weighted_sums, weight_sums, section_scores, total_scores): the first three are
+    n_users x n_sections matrices, the last is one total per user where each section score
+    contributes section_weights[section] percent.
+    """
+    n_sections = len(section_weights)
+    in_section = section_index >= 0
+    cells = user_index[in_section] * n_sections + section_index[in_section]
+    size = n_users * n_sections
+
+    weighted_sums = np.bincount(cells, weights=weighted_averages[in_section], minlength=size).astype(np.float64).reshape(n_users, n_sections)
+    weight_sums = np.bincount(cells, weights=weights[in_section], minlength=size).astype(np.float64).reshape(n_users, n_sections)
+
+    section_scores = np.divide(
+        weighted_sums, weight_sums, out=np.zeros_like(weighted_sums), where=weight_sums > 0
+    )
+    total_scores = section_scores @ (np.asarray(section_weights, dtype=np.float64) / 100)
+    return weighted_sums, weight_sums, section_scores, total_scores
+
+
+class ScoringModel:
+    """
+    What scoring needs besides the fact rows, which carry their own section and weight: the
+    section of every pillar and each section's share of the total score. Loaded with one query.
+    """
+
+    def __init__(self, sections=None):
+        sections = sections or appraisal_sections()
+        self.section_keys = list(sections)
+        self.section_rows = [sections[key]['rows'] for key in self.section_keys]
+        configured = [sections[key]['weight'] for key in self.section_keys]
+        if sum(configured) != 100:
+            raise ImproperlyConfigured("The weights of the APPRAISAL_SECTIONS must add up to 100.")
+
+        pillars = list(Pillar.objects.order_by('id').values_list('id', 'section', 'metrics_id', 'metrics__weight'))
+        self.pillar_sections = [(pillar_id, self.section_index(section)) for pillar_id, section, _, _ in pillars]
+        pillar_section = dict(self.pillar_sections)
+
+        # A Metrics weight overrides the configured share of a section when every pillar
+        # under that Metrics belongs to the same section. Overridden shares that do not add up
+        # to 100 are rescaled; negative ones are ignored.
+        metrics_sections, metrics_weights = {}, {}
+        for pillar_id, _, metrics_id, metrics_weight in pillars:
+            if metrics_id is not None and metrics_weight is not None:
+                metrics_sections.setdefault(metrics_id, set()).add(pillar_section[pillar_id])
+                metrics_weights[metrics_id] = metrics_weight
+        overrides = {}
+        for metrics_id, section_set in metrics_sections.items():
+            if len(section_set) == 1 and -1 not in section_set:
+                section = section_set.pop()
+                overrides[section] = overrides.get(section, 0) + metrics_weights[metrics_id]
+        weights = [overrides.get(index, weight) for index, weight in enumerate(configured)]
+        if min(weights) < 0 or sum(weights) <= 0:
+            weights = configured
+        elif sum(weights) != 100:
+            weights = rescale_shares(weights)
+        self.section_weights = weights
+
+    def section_index(self, section):
+        """Returns the position of a section key in section_keys, or -1 for rows outside every section."""
+        return self.section_keys.index(section) if section in self.section_keys else -1
+
+    def section_index_expression(self, rows):
+        """
+        The same mapping as section_index(), as an expression over the section column of a row of
+        the fact table `rows`; sections scoring the other table's rows map to -1.
+        """
+        return Case(
+            *(
+                When(section=key, then=Value(index))
+                for index, key in enumerate(self.section_keys) if self.section_rows[index] == rows
+            ),
+            default=Value(-1),
+        )
+
+    def fingerprint(self):
+        """Returns a checksum of everything that determines how rows are scored."""
+        digest = hashlib.sha256()
+        digest.update(repr((self.section_keys, self.section_rows, self.section_weights, self.pillar_sections)).encode())
+        return digest.hexdigest()
+
+
+class PeriodScores:
+    """
+    Section and total scores of every employee with appraisal rows in a period.
+    """
+
+    def __init__(self, model, user_ids, weighted_sums, weight_sums, section_scores, total_scores):
+        self.model = model
+        self.user_ids = user_ids
+        self.row_by_user = {user_id: row for row, user_id in enumerate(user_ids.tolist())}
+        self.weighted_sums = weighted_sums
+        self.weight_sums = weight_sums
+        self.section_scores = section_scores
+        self.total_scores = total_scores
+
+    def decimal_scores(self, user_id):
+        """
+        Returns ({section_key: score}, total) for one user as Decimals derived from the exact
+        integer sums, so money calculations do not inherit floating point rounding.
+        """
+        row = self.row_by_user.get(user_id)
+        section_scores = {}
+        total = Decimal('0.00')
+        for index, key in enumerate(self.model.section_keys):
+            score = Decimal('0.00')
+            if row is not None and self.weight_sums[row, index] > 0:
+                score = Decimal(int(self.weighted_sums[row, index])) / Decimal(int(self.weight_sums[row, index]))
+            section_scores[key] = score
+            total += score * (Decimal(self.model.section_weights[index]) / Decimal(100))
+        return section_scores, total
+
+    def scores(self, user_id):
+        """Returns ({section_key: score}, total) for one user as floats; zeros when they have no rows."""
+        row = self.row_by_user.get(user_id)
+        if row is None:
+            return {key: 0.0 for key in self.model.section_keys}, 0.0
+        return (
+            dict(zip(self.model.section_keys, self.section_scores[row].tolist())),
+            float(self.total_scores[row]),
+        )
+
+
+def _fact_array(rows, width):
+    """Streams a values_list() queryset of integers into an (n, width) int64 array."""
+    flat = itertools.chain.from_iterable(rows.order_by().iterator(chunk_size=5000))
+    return np.fromiter(flat, dtype=np.int64).reshape(-1, width)
+
+
+def score_period(period_id, user_ids=None, model=None):
+    """
+    Scores every employee (or only user_ids) for a period: reads the period's performance
+    records and soft skill ratings, with the section and weight each row holds, as flat arrays
+    (one query each, no joins, answered from their covering indexes) and computes all section and
+    total scores with compute_section_scores(). Each table's rows count only in the sections that
+    score that table.
+    """
+    model = model or ScoringModel()
+
+    performances = EmployeePerformance.objects.filter(period_id=period_id)
+    ratings = SoftSkillRating.objects.filter(period_id=period_id)
+    if user_ids is not None:
+        performances = performances.filter(user_id__in=user_ids)
+        ratings = ratings.filter(user_id__in=user_ids)
+
+    performance_rows = _fact_array(performances.annotate(
+        section_index=model.section_index_expression('employee_performance'),
+        weight=Coalesce('target_weight', Value(0)),
+    ).values_list('user_id', 'section_index', 'weight', 'weighted_average'), 4)
+    rating_rows = _fact_array(ratings.annotate(
+        section_index=model.section_index_expression('soft_skill_ratings'),
+    ).values_list('user_id', 'section_index', 'weight', 'weighted_average'), 4)
+
+    fact_users = np.concatenate([performance_rows[:, 0], rating_rows[:, 0]])
+    fact_sections = np.concatenate([performance_rows[:, 1], rating_rows[:, 1]])
+    fact_weighted_averages = np.concatenate([performance_rows[:, 3], rating_rows[:, 3]]).astype(np.float64)
+    fact_weights = np.concatenate([performance_rows[:, 2], rating_rows[:, 2]]).astype(np.float64)
+
+    user_ids_array, user_index = np.unique(fact_users, return_inverse=True)
+    results = compute_section_scores(
+        user_index, fact_sections, fact_weighted_averages, fact_weights,
+        len(user_ids_array), model.section_weights,
+    )
+    return PeriodScores(model, user_ids_array, *results)
+
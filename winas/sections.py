@@ -0,0 +1,65 @@
+# performance_appraisal/sections.py
+from django.db.models import F, OuterRef, Q, Subquery
+
+from .models import Pillar, KeyResultArea, PerformanceTarget, EmployeePerformance, SoftSkillRating
+from .versioning import bump_table_versions
+
+
+# The section each fact table copies, as the path from a row to its pillar's section
+SECTION_SOURCES = {
+    EmployeePerformance: 'performance_target__kra__pillar__section',
+    SoftSkillRating: 'soft_skill_kra__pillar__section',
+}
+
+# For each level of the hierarchy: the lookup from each fact table's rows up to it
+_FACT_LOOKUPS = {
+    Pillar: {EmployeePerformance: 'performance_target__kra__pillar', SoftSkillRating: 'soft_skill_kra__pillar'},
+    KeyResultArea: {EmployeePerformance: 'performance_target__kra', SoftSkillRating: 'soft_skill_kra'},
+    PerformanceTarget: {EmployeePerformance: 'performance_target'},
+}
+
+# The correlated subquery reading a fact row's section from its hierarchy
+_SECTION_SUBQUERIES = {
+    EmployeePerformance: lambda: Subquery(
+        PerformanceTarget.objects.filter(pk=OuterRef('performance_target_id')).values('kra__pillar__section')[:1]
+    ),
+    SoftSkillRating: lambda: Subquery(
+        KeyResultArea.objects.filter(pk=OuterRef('soft_skill_kra_id')).values('pillar__section')[:1]
+    ),
+}
+
+
+def stale_sections(queryset):
+    """Returns the rows of a fact queryset whose section differs from their pillar's current one."""
+    current = F(SECTION_SOURCES[queryset.model])
+    return queryset.alias(current_section=current).filter(
+        Q(section__isnull=True, current_section__isnull=False)
+        | Q(section__isnull=False, current_section__isnull=True)
+        | (Q(section__isnull=False, current_section__isnull=False) & ~Q(section=F('current_section')))
+    )
+
+
+def sync_fact_sections(node=None):
+    """
+    Copies the pillar sections onto the performance records and soft skill ratings beneath a
+    pillar, KRA or performance target (every row when node is None), after the hierarchy above
+    them was edited. Each table takes one UPDATE, which only touches the rows whose section
+    changed. Returns the (user_id, period_id) pairs of the rows updated, whose summaries are stale.
+    """
+    keys = set()
+    for model in SECTION_SOURCES:
+        rows = model.objects.all()
+        if node is not None:
+            lookup = _FACT_LOOKUPS[type(node)].get(model)
+            if lookup is None:
+                continue
+            rows = rows.filter(**{lookup: node})
+        stale = stale_sections(rows)
+        stale_keys = set(stale.values_list('user_id', 'period_id').distinct())
+        if not stale_keys:
+            continue
+        model.objects.filter(pk__in=stale.values('pk')).update(section=_SECTION_SUBQUERIES[model]())
+        # .update() sends no signals: bump the version stamp the saves would have
+        bump_table_versions(model)
+        keys |= stale_keys
+    return keys
@@ -6,37 +6,173 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from django.utils.crypto import get_random_string
 from django.conf import settings
-from .utils import send_password_email
+from .utils import queue_password_emails
+from .hierarchy import annotate_hierarchy_counts
 
 from .models import (
     Department, Role, User, Metrics, Pillar, KeyResultArea, PerformanceTarget,
     EmployeePerformance, SoftSkillRating, OverallAppraisal, Training,
-    DevelopmentPlan, RatingKey
+    DevelopmentPlan, RatingKey, BonusRun, BonusResult, PeriodScoreSummary,
+    AppraisalPeriod, DeletionJob, normalize_period_label
 )
 
+# --- Sparse fieldsets ---
+
+class HierarchyCountField(serializers.IntegerField):
+    """
+    A descendant count or weight sum annotated by winas.hierarchy.annotate_hierarchy_counts().
+    Rows that were not loaded with the annotation, i.e. ones just created, have no descendants yet.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return getattr(instance, self.source, 0)
+
+
+class AppraisalPeriodField(serializers.SlugRelatedField):
+    """
+    An appraisal period given and shown by its label (e.g. "Jan-Jun 2024"), as the API did when
+    periods were free text. Labels are matched after normalizing their whitespace.
+    """
+    default_error_messages = {
+        'does_not_exist': 'Appraisal period "{value}" does not exist.',
+        'invalid': 'Invalid value.',
+    }
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('slug_field', 'label')
+        if not kwargs.get('read_only'):
+            kwargs.setdefault('queryset', AppraisalPeriod.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        return super().to_internal_value(normalize_period_label(data))
+
+
+class SparseFieldsMixin:
+    """
+    Lets clients choose which fields a response contains with ?fields=a,b or ?exclude=a,b.
+    `optional_fields` are left out unless named in ?fields or ?include.
+    The request is taken from the serializer context; without one every non-optional field is returned.
+    """
+    fields_query_param = 'fields'
+    exclude_query_param = 'exclude'
+    include_query_param = 'include'
+    optional_fields = ()
+    # List GETs are built from .values() rows instead of model instances (see winas.readers)
+    read_from_values = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            keep = [name for name in self.fields if name not in self.optional_fields]
+        else:
+            keep = self.selected_field_names(request.query_params, list(self.fields))
+        for field_name in list(self.fields):
+            if field_name not in keep:
+                self.fields.pop(field_name)
+
+    @classmethod
+    def selected_field_names(cls, query_params, available):
+        """Returns the names out of `available` that ?fields / ?include / ?exclude select."""
+        requested = _split_names(query_params.get(cls.fields_query_param))
+        included = _split_names(query_params.get(cls.include_query_param))
+        excluded = _split_names(query_params.get(cls.exclude_query_param))
+        unknown = [name for name in requested + included + excluded if name not in available]
+        if unknown:
+            raise serializers.ValidationError({
+                cls.fields_query_param: f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}."
+            })
+        keep = requested or [name for name in available if name not in cls.optional_fields or name in included]
+        return [name for name in available if name in keep and name not in excluded]
+
+    def annotate_queryset(self, queryset):
+        """Adds the annotations read by the selected fields (see HierarchyCountField) to a queryset."""
+        names = [field.source for field in self.fields.values() if isinstance(field, HierarchyCountField)]
+        return annotate_hierarchy_counts(queryset, names) if names else queryset
+
+    @classmethod
+    def project_queryset(cls, queryset, request, keep=()):
+        """
+        Defers the model columns (and drops the select_related joins) that the fields selected
+        by the request do not read, so unrequested columns are never fetched. Columns named in
+        `keep`, such as the pagination ordering field, are always loaded.
+        """
+        params = request.query_params
+        if not (params.get(cls.fields_query_param) or params.get(cls.exclude_query_param)):
+            return queryset
+
+        serializer = cls(context={'request': request})
+        sources = set(keep)
+        for field in serializer.fields.values():
+            if not field.source_attrs:
+                return queryset  # source='*' (e.g. a method field) may read anything from the instance
+            sources.add(field.source_attrs[0])
+
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            joins = [path for path in _relation_paths(select_related) if path.split('__')[0] in sources]
+            queryset = queryset.select_related(None)
+            if joins:
+                queryset = queryset.select_related(*joins)
+
+        deferred = [
+            field.name for field in queryset.model._meta.concrete_fields
+            if not field.primary_key and field.name not in sources and field.attname not in sources
+        ]
+        return queryset.defer(*deferred) if deferred else queryset
+
+
+def _split_names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def _relation_paths(select_related, prefix=''):
+    """Flattens a query's nested select_related dict into 'a__b' paths."""
+    paths = []
+    for name, nested in select_related.items():
+        path = f'{prefix}{name}'
+        paths.extend(_relation_paths(nested, f'{path}__') if nested else [path])
+    return paths
+
 # --- Existing Serializers (No major changes, just ensure they use 'email' for user-related fields if needed) ---
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
+
     class Meta:
         model = Department
         fields = '__all__'
 
-class RoleSerializer(serializers.ModelSerializer):
+class RoleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
+
     class Meta:
         model = Role
         fields = '__all__'
 
-class MetricsSerializer(serializers.ModelSerializer):
-    pillars_count = serializers.SerializerMethodField()
-    
+class MetricsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
+    optional_fields = ['kras_count', 'kpis_count', 'targets_count', 'kpis_weight', 'targets_weight']
+    pillars_count = HierarchyCountField()
+    kras_count = HierarchyCountField()
+    kpis_count = HierarchyCountField()
+    targets_count = HierarchyCountField()
+    kpis_weight = HierarchyCountField()
+    targets_weight = HierarchyCountField()
+
     class Meta:
         model = Metrics
         fields = '__all__'
-    
-    def get_pillars_count(self, obj):
-        return obj.pillars.count()
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
     department_name = serializers.CharField(source='department.department_name', read_only=True)
     role_name = serializers.CharField(source='role.role_name', read_only=True)
 
@@ -59,22 +195,36 @@ class UserSerializer(serializers.ModelSerializer):
 # ... (other existing serializers like PillarSerializer, KeyResultAreaSerializer, etc. remain largely the same) ...
 # Ensure they correctly handle user foreign keys.
 
-class PillarSerializer(serializers.ModelSerializer):
+class PillarSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
     metrics_name = serializers.CharField(source='metrics.metrics_name', read_only=True)
     performance_target_description = serializers.CharField(source='performance_target.target_description', read_only=True)
+    optional_fields = ['kras_count', 'kpis_count', 'targets_count', 'kpis_weight', 'targets_weight']
+    kras_count = HierarchyCountField()
+    kpis_count = HierarchyCountField()
+    targets_count = HierarchyCountField()
+    kpis_weight = HierarchyCountField()
+    targets_weight = HierarchyCountField()
     
     class Meta:
         model = Pillar
         fields = '__all__'
 
-class KeyResultAreaSerializer(serializers.ModelSerializer):
+class KeyResultAreaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
     pillar_name = serializers.CharField(source='pillar.pillar_name', read_only=True)
+    optional_fields = ['kpis_count', 'targets_count', 'kpis_weight', 'targets_weight']
+    kpis_count = HierarchyCountField()
+    targets_count = HierarchyCountField()
+    kpis_weight = HierarchyCountField()
+    targets_weight = HierarchyCountField()
 
     class Meta:
         model = KeyResultArea
         fields = '__all__'
 
-class PerformanceTargetSerializer(serializers.ModelSerializer):
+class PerformanceTargetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
     kra_name = serializers.CharField(source='kra.kra_name', read_only=True)
     pillar_name = serializers.CharField(source='kra.pillar.pillar_name', read_only=True)
 
@@ -82,51 +232,118 @@ class PerformanceTargetSerializer(serializers.ModelSerializer):
         model = PerformanceTarget
         fields = '__all__'
 
-class EmployeePerformanceSerializer(serializers.ModelSerializer):
+class AppraisalPeriodSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
+
+    class Meta:
+        model = AppraisalPeriod
+        fields = '__all__'
+
+class EmployeePerformanceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
+    period_under_review = AppraisalPeriodField(source='period')
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     kra_name = serializers.CharField(source='performance_target.kra.kra_name', read_only=True)
     target_description = serializers.CharField(source='performance_target.target_description', read_only=True)
     target_value = serializers.DecimalField(source='performance_target.target_value', max_digits=15, decimal_places=2, read_only=True)
     weight = serializers.DecimalField(source='performance_target.weight', max_digits=5, decimal_places=2, read_only=True)
+    # Generated by the database from the row and the target inputs it copies
+    percentage_achieved = serializers.IntegerField(read_only=True)
+    weighted_average = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = EmployeePerformance
-        fields = '__all__'
-        read_only_fields = ['percentage_achieved', 'weighted_average']
-
-class SoftSkillRatingSerializer(serializers.ModelSerializer):
+        exclude = ['target_value_cents', 'target_weight']
+        read_only_fields = ['period']
+
+class EmployeePerformanceRowSerializer(serializers.Serializer):
+    """
+    One record of a bulk upload. Related objects are given by id and looked up for all rows
+    at once by winas.bulk, instead of one query per row and field.
+    """
+    user = serializers.IntegerField()
+    performance_target = serializers.IntegerField()
+    kpi = serializers.IntegerField(required=False, allow_null=True)
+    period_under_review = serializers.CharField(max_length=100)
+    actual_achievement = serializers.IntegerField(min_value=-2147483648, max_value=2147483647)
+    actual_rating = serializers.IntegerField(required=False, allow_null=True, min_value=-2147483648, max_value=2147483647)
+    comments = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+class SoftSkillRatingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
+    period_under_review = AppraisalPeriodField(source='period')
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     soft_skill_kra_name = serializers.CharField(source='soft_skill_kra.kra_name', read_only=True)
+    weighted_average = serializers.IntegerField(read_only=True)  # Generated by the database
 
     class Meta:
         model = SoftSkillRating
         fields = '__all__'
-        read_only_fields = ['weighted_average']
-
-class OverallAppraisalSerializer(serializers.ModelSerializer):
+        read_only_fields = ['period']
+
+class SoftSkillRatingGridSerializer(serializers.Serializer):
+    """The period (and optionally the department) a grid of soft skill ratings is entered for."""
+    period_under_review = AppraisalPeriodField()
+    department = serializers.IntegerField(required=False, allow_null=True)
+
+class SoftSkillRatingGridRowSerializer(serializers.Serializer):
+    """
+    One cell of a soft skill ratings grid. The KRA and weight default to the KPI's own;
+    related objects are looked up for the whole grid at once by winas.bulk.
+    """
+    user = serializers.IntegerField()
+    soft_skill_kpi = serializers.IntegerField()
+    soft_skill_kra = serializers.IntegerField(required=False, allow_null=True)
+    rating = serializers.IntegerField(min_value=-2147483648, max_value=2147483647)
+    weight = serializers.IntegerField(required=False, allow_null=True, min_value=-2147483648, max_value=2147483647)
+    comments = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+class OverallAppraisalSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
+    period_under_review = AppraisalPeriodField(source='period')
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     appraiser_name = serializers.CharField(source='appraiser.get_full_name', read_only=True)
+    total_performance_rating = serializers.IntegerField(read_only=True)  # Generated by the database
 
     class Meta:
         model = OverallAppraisal
         fields = '__all__'
-        read_only_fields = ['total_performance_rating']
+        read_only_fields = ['period']
+        extra_kwargs = {
+            # Calculated by the scoring engine when not given explicitly
+            'strategic_objectives_score': {'required': False},
+            'soft_skills_score': {'required': False},
+        }
+
+class PeriodScoreSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
+    period_under_review = AppraisalPeriodField(source='period', read_only=True)
+    user_name = serializers.CharField(source='user.get_full_name', read_only=True)
+    department = serializers.IntegerField(source='user.department_id', read_only=True)
+
+    class Meta:
+        model = PeriodScoreSummary
+        fields = '__all__'
 
-class TrainingSerializer(serializers.ModelSerializer):
+class TrainingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
 
     class Meta:
         model = Training
         fields = '__all__'
 
-class DevelopmentPlanSerializer(serializers.ModelSerializer):
+class DevelopmentPlanSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
 
     class Meta:
         model = DevelopmentPlan
         fields = '__all__'
 
-class RatingKeySerializer(serializers.ModelSerializer):
+class RatingKeySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
+
     class Meta:
         model = RatingKey
         fields = '__all__'
@@ -209,6 +426,7 @@ class SupervisorCreationSerializer(serializers.ModelSerializer):
             'annual_salary': {'required': True},
         }
 
+    @transaction.atomic # The account and its password email are saved together
     def create(self, validated_data):
         # Generate a temporary password
         temp_password = get_random_string(length=12)
@@ -234,22 +452,32 @@ class SupervisorCreationSerializer(serializers.ModelSerializer):
         user.role = supervisor_role
         user.save()
 
-        # Send email with temporary password
-        email_sent = send_password_email(
-            user_email=user.email,
-            password=temp_password,
-            first_name=user.first_name,
-            last_name=user.last_name
-        )
+        # Queue the email with the temporary password; the worker sends it once the account is committed
+        queue_password_emails([(user, temp_password)])
 
         print(f"--- Supervisor Account Created ---")
         print(f"Email: {user.email}")
         print(f"Temporary Password: {temp_password}")
-        print(f"Email sent: {'Yes' if email_sent else 'No'}")
+        print("Email queued: Yes")
         print(f"----------------------------------")
 
         return user
 
+class OnboardingRowSerializer(serializers.Serializer):
+    """
+    One new employee of a bulk onboarding upload (JSON or CSV). Uniqueness and the department
+    are checked for all rows at once by winas.bulk.
+    """
+    email = serializers.EmailField(max_length=255)
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    employee_number = serializers.CharField(max_length=50)
+    annual_salary = serializers.DecimalField(max_digits=10, decimal_places=2)
+    department = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
 class EmployeeCreationSerializer(serializers.ModelSerializer):
     # Password will be auto-generated
     password = serializers.CharField(write_only=True, required=False)
@@ -265,6 +493,7 @@ class EmployeeCreationSerializer(serializers.ModelSerializer):
             'annual_salary': {'required': True},
         }
 
+    @transaction.atomic # The account and its password email are saved together
     def create(self, validated_data):
         # Generate a temporary password
         temp_password = get_random_string(length=12)
@@ -283,24 +512,20 @@ class EmployeeCreationSerializer(serializers.ModelSerializer):
             last_name=validated_data.get('last_name'),
             employee_number=validated_data.get('employee_number'),
             annual_salary=validated_data.get('annual_salary'),
+            department_id=validated_data.get('department_id'),
             is_active=True # Active by default
         )
         employee_role, created = Role.objects.get_or_create(role_name='Employee')
         user.role = employee_role
         user.save()
 
-        # Send email with temporary password
-        email_sent = send_password_email(
-            user_email=user.email,
-            password=temp_password,
-            first_name=user.first_name,
-            last_name=user.last_name
-        )
+        # Queue the email with the temporary password; the worker sends it once the account is committed
+        queue_password_emails([(user, temp_password)])
 
         print(f"--- Employee Account Created ---")
         print(f"Email: {user.email}")
         print(f"Temporary Password: {temp_password}")
-        print(f"Email sent: {'Yes' if email_sent else 'No'}")
+        print("Email queued: Yes")
         print(f"----------------------------------")
 
         return user
@@ -357,4 +582,57 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
 # Serializer for Bonus Calculation (no changes)
 class BonusCalculationSerializer(serializers.Serializer):
     total_bonus_pool = serializers.DecimalField(max_digits=15, decimal_places=2, help_text="Total bonus amount available for distribution.")
-    period_under_review = serializers.CharField(max_length=100, help_text="The appraisal period for which bonus is being calculated.")
\ No newline at end of file
+    period_under_review = AppraisalPeriodField(help_text="The appraisal period for which bonus is being calculated.")
+
+class BonusRunSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    period_under_review = AppraisalPeriodField(source='period', read_only=True)
+    requested_by_name = serializers.CharField(source='requested_by.get_full_name', read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BonusRun
+        fields = [
+            'id', 'total_bonus_pool', 'period', 'period_under_review', 'status', 'progress',
+            'total_employees', 'processed_employees', 'error', 'requested_by', 'requested_by_name',
+            'created_at', 'started_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        if obj.status == BonusRun.STATUS_COMPLETED:
+            return 100
+        if not obj.total_employees:
+            return 0
+        return int(obj.processed_employees * 100 / obj.total_employees)
+
+class DeletionJobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    requested_by_name = serializers.CharField(source='requested_by.get_full_name', read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DeletionJob
+        fields = [
+            'id', 'object_type', 'object_id', 'object_name', 'status', 'progress', 'plan',
+            'total_rows', 'deleted_rows', 'error', 'requested_by', 'requested_by_name',
+            'created_at', 'started_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        if obj.status == DeletionJob.STATUS_COMPLETED:
+            return 100
+        if not obj.total_rows:
+            return 0
+        return int(obj.deleted_rows * 100 / obj.total_rows)
+
+class BonusResultSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    read_from_values = True
+    user_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = BonusResult
+        fields = [
+            'user_id', 'username', 'employee_name', 'department', 'role', 'annual_salary',
+            'strategic_score', 'soft_skill_score', 'total_employee_score', 'performance_rating',
+            'calculated_bonus', 'warnings'
+        ]
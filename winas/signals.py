@@ -0,0 +1,168 @@
+# performance_appraisal/signals.py
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import (
+    Department, Role, User, Metrics, Pillar, KeyResultArea, KPI, PerformanceTarget,
+    EmployeePerformance, SoftSkillRating, OverallAppraisal, Training, DevelopmentPlan, RatingKey, BonusRun,
+    AppraisalPeriod, DeletionJob
+)
+from .scoring import pillar_name_section
+from .sections import sync_fact_sections
+from .summaries import refresh_score_summaries, refresh_section_shares
+from .targets import recompute_target_records
+from .versioning import bump_table_versions
+from .hierarchy import HIERARCHY_MODELS, invalidate_hierarchy_snapshot
+from .authentication import record_authorization_change, record_authorization_changes, record_user_deletions
+
+
+# Models whose writes bump their TableVersion. PeriodScoreSummary is written in bulk and
+# bumped by winas.summaries itself.
+VERSIONED_MODELS = [
+    Department, Role, User, Metrics, Pillar, KeyResultArea, KPI, PerformanceTarget,
+    EmployeePerformance, SoftSkillRating, OverallAppraisal, Training, DevelopmentPlan, RatingKey, BonusRun,
+    AppraisalPeriod, DeletionJob,
+]
+
+
+def _deleted_by(origin):
+    """Returns the model whose deletion (of an instance or a queryset) started a cascade."""
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return type(origin) if origin is not None else None
+
+
+# --- Period score summaries ---
+
+@receiver(post_save, sender=EmployeePerformance)
+@receiver(post_save, sender=SoftSkillRating)
+@receiver(post_delete, sender=EmployeePerformance)
+@receiver(post_delete, sender=SoftSkillRating)
+def refresh_summary_for_scored_row(sender, instance, origin=None, raw=False, **kwargs):
+    # Runs inside the row's transaction (see EmployeePerformance.save / the delete collector).
+    # When a user is deleted their summaries are cascaded away along with the rows.
+    if raw or _deleted_by(origin) is User:
+        return
+    keys = {(instance.user_id, instance.period_id)}
+    loaded_key = getattr(instance, '_loaded_score_key', None)
+    if loaded_key:
+        keys.add(loaded_key)
+    refresh_score_summaries(keys)
+    instance._loaded_score_key = (instance.user_id, instance.period_id)
+
+
+@receiver(pre_save, sender=Pillar)
+def classify_pillar_by_name(sender, instance, raw=False, **kwargs):
+    if not raw and not instance.section:
+        instance.section = pillar_name_section(instance.pillar_name)
+
+
+@receiver(post_save, sender=Metrics)
+@receiver(post_delete, sender=Metrics)
+@receiver(post_save, sender=Pillar)
+@receiver(post_delete, sender=Pillar)
+@receiver(post_save, sender=KeyResultArea)
+@receiver(post_delete, sender=KeyResultArea)
+@receiver(post_save, sender=PerformanceTarget)
+@receiver(post_delete, sender=PerformanceTarget)
+def refresh_summaries_for_hierarchy_change(sender, instance, created=False, origin=None, raw=False, **kwargs):
+    if raw:
+        return
+    # Refresh once per cascading delete, when the deleted root object itself is signalled
+    if origin is not None and origin is not instance and _deleted_by(origin) is not sender:
+        return
+    # Deletions leave no rows behind, the fact tables protect them; but the pillars deleted with
+    # a Metrics, KRA or target (through Pillar.performance_target) may change the sections' shares
+    if origin is not None:
+        refresh_section_shares()
+        return
+    # New KRAs, targets and Metrics have no rows or pillars beneath them yet
+    if created and sender is not Pillar:
+        return
+    # An edited target only affects its own records: update and rescore just those, and tell the
+    # view how many there were
+    if sender is PerformanceTarget:
+        instance._records_recomputed = recompute_target_records(instance)
+        return
+    # Renames and descriptions do not affect any score
+    if not instance.scoring_inputs_changed:
+        return
+    instance._loaded_scoring_inputs = instance.scoring_inputs()
+    # The rows beneath a moved KRA or reclassified pillar take its new section; a pillar or Metrics
+    # weight may also change the sections' shares of the total score, which every summary uses
+    keys = sync_fact_sections(instance) if sender is not Metrics else set()
+    if not refresh_section_shares():
+        refresh_score_summaries(keys)
+
+
+# --- Table versions (ETags) ---
+
+def bump_version_on_write(sender, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which no response shows
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_table_versions(sender)
+
+
+for versioned_model in VERSIONED_MODELS:
+    post_save.connect(bump_version_on_write, sender=versioned_model, dispatch_uid=f'version-save-{versioned_model.__name__}')
+    post_delete.connect(bump_version_on_write, sender=versioned_model, dispatch_uid=f'version-delete-{versioned_model.__name__}')
+
+
+# --- Hierarchy snapshot ---
+
+def invalidate_hierarchy_on_write(sender, **kwargs):
+    # Now, so this process stops serving the old tree, and again once committed, in case another
+    # request rebuilt it in between from the data as it was before this transaction
+    invalidate_hierarchy_snapshot()
+    transaction.on_commit(invalidate_hierarchy_snapshot)
+
+
+for hierarchy_model in HIERARCHY_MODELS:
+    post_save.connect(invalidate_hierarchy_on_write, sender=hierarchy_model, dispatch_uid=f'hierarchy-save-{hierarchy_model.__name__}')
+    post_delete.connect(invalidate_hierarchy_on_write, sender=hierarchy_model, dispatch_uid=f'hierarchy-delete-{hierarchy_model.__name__}')
+
+
+# --- Access token claims ---
+
+@receiver(post_save, sender=User)
+def reject_tokens_with_outdated_claims(sender, instance, raw=False, **kwargs):
+    # User.save stamps authorization_changed_at when a claimed field changes; other processes
+    # see the stamp on their next reload (see winas.authentication)
+    if raw or not getattr(instance, '_authorization_changed', False):
+        return
+    transaction.on_commit(lambda: record_authorization_change(instance))
+
+
+@receiver(post_save, sender=Role)
+def reject_tokens_with_outdated_role_name(sender, instance, raw=False, **kwargs):
+    # Role.save stamps the change on every user of a renamed role
+    if raw or not getattr(instance, '_authorization_changed', False):
+        return
+    user_ids = list(instance.users.values_list('id', flat=True))
+    changed_at = instance._authorization_changed_at
+    transaction.on_commit(lambda: record_authorization_changes(user_ids, changed_at))
+
+
+@receiver(post_delete, sender=User)
+def reject_tokens_of_deleted_users(sender, instance, **kwargs):
+    # Other processes find the user missing once they reload the user ids
+    user_id = instance.pk
+    transaction.on_commit(lambda: record_user_deletions([user_id]))
+
+
+@receiver(pre_delete, sender=Role)
+@receiver(pre_delete, sender=Department)
+def reject_tokens_with_deleted_role_or_department(sender, instance, **kwargs):
+    # The deletion sets the users' role or department to NULL with an update() that sends no
+    # signals: stamp the change on those users here, in the deletion's transaction
+    user_ids = list(instance.users.values_list('id', flat=True))
+    if not user_ids:
+        return
+    changed_at = timezone.now()
+    User.objects.filter(pk__in=user_ids).update(authorization_changed_at=changed_at)
+    bump_table_versions(User)
+    transaction.on_commit(lambda: record_authorization_changes(user_ids, changed_at))
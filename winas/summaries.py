@@ -0,0 +1,151 @@
+# performance_appraisal/summaries.py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import EmployeePerformance, SoftSkillRating, PeriodScoreSummary
+from .scoring import ScoringModel, score_period
+from .versioning import bump_table_versions
+
+
+SUMMARY_BATCH_SIZE = 1000
+# The columns summary_scores() needs to calculate the section and total scores
+SUMMARY_SCORE_FIELDS = [
+    'strategic_weight', 'strategic_weighted_sum', 'strategic_share',
+    'soft_skill_weight', 'soft_skill_weighted_sum', 'soft_skill_share',
+]
+SUMMARY_UPDATE_FIELDS = [
+    'strategic_weight', 'strategic_weighted_sum', 'soft_skill_weight', 'soft_skill_weighted_sum',
+    'strategic_share', 'soft_skill_share', 'strategic_score', 'soft_skill_score', 'total_score', 'updated_at',
+]
+
+
+def _summaries(period_scores, period_id):
+    """Builds unsaved PeriodScoreSummary rows from a PeriodScores result."""
+    model = period_scores.model
+    strategic = model.section_keys.index('strategic')
+    soft_skill = model.section_keys.index('soft_skill')
+
+    for row, user_id in enumerate(period_scores.user_ids.tolist()):
+        section_scores, total = period_scores.decimal_scores(user_id)
+        yield PeriodScoreSummary(
+            user_id=user_id,
+            period_id=period_id,
+            strategic_weight=int(period_scores.weight_sums[row, strategic]),
+            strategic_weighted_sum=int(period_scores.weighted_sums[row, strategic]),
+            soft_skill_weight=int(period_scores.weight_sums[row, soft_skill]),
+            soft_skill_weighted_sum=int(period_scores.weighted_sums[row, soft_skill]),
+            strategic_share=model.section_weights[strategic],
+            soft_skill_share=model.section_weights[soft_skill],
+            strategic_score=round(section_scores['strategic'], 4),
+            soft_skill_score=round(section_scores['soft_skill'], 4),
+            total_score=round(total, 4),
+        )
+
+
+def _upsert(summaries):
+    summaries = list(summaries)
+    for start in range(0, len(summaries), SUMMARY_BATCH_SIZE):
+        PeriodScoreSummary.objects.bulk_create(
+            summaries[start:start + SUMMARY_BATCH_SIZE],
+            update_conflicts=True,
+            unique_fields=['user', 'period'],
+            update_fields=SUMMARY_UPDATE_FIELDS,
+        )
+
+
+def refresh_score_summaries(keys, model=None):
+    """
+    Recalculates the summaries of the given (user_id, period_id) pairs from their
+    performance records and soft skill ratings. Pairs left without any rows lose their summary.
+    Callers run this inside the transaction that changed the rows.
+    """
+    users_by_period = defaultdict(set)
+    for user_id, period_id in keys:
+        if user_id is not None and period_id is not None:
+            users_by_period[period_id].add(user_id)
+    if not users_by_period:
+        return
+
+    model = model or ScoringModel()
+    with transaction.atomic():
+        for period_id, user_ids in users_by_period.items():
+            period_scores = score_period(period_id, user_ids=user_ids, model=model)
+            _upsert(_summaries(period_scores, period_id))
+            PeriodScoreSummary.objects.filter(
+                period_id=period_id, user_id__in=user_ids
+            ).exclude(user_id__in=period_scores.user_ids.tolist()).delete()
+        bump_table_versions(PeriodScoreSummary)
+
+
+def rebuild_score_summaries(period_id=None):
+    """
+    Regenerates the summaries from scratch, for every period or only the given one.
+    Returns the number of summaries written.
+    """
+    if period_id is None:
+        periods = set(EmployeePerformance.objects.values_list('period_id', flat=True).distinct())
+        periods |= set(SoftSkillRating.objects.values_list('period_id', flat=True).distinct())
+    else:
+        periods = {period_id}
+
+    model = ScoringModel()
+    written = 0
+    with transaction.atomic():
+        stale = PeriodScoreSummary.objects.all()
+        if period_id is not None:
+            stale = stale.filter(period_id=period_id)
+        stale.delete()
+        for period in sorted(periods):
+            summaries = list(_summaries(score_period(period, model=model), period))
+            _upsert(summaries)
+            written += len(summaries)
+        bump_table_versions(PeriodScoreSummary)
+    return written
+
+
+def refresh_section_shares(model=None):
+    """
+    Rebuilds every summary when the sections' shares of the total score (see ScoringModel) differ
+    from the ones the summaries were calculated with, as after a Metrics weight or a pillar's
+    section changed. Returns whether it did; one EXISTS query when the shares are unchanged.
+    """
+    model = model or ScoringModel()
+    shares = dict(zip(model.section_keys, model.section_weights))
+    stale = PeriodScoreSummary.objects.exclude(
+        strategic_share=shares['strategic'], soft_skill_share=shares['soft_skill']
+    )
+    if not stale.exists():
+        return False
+    rebuild_score_summaries()
+    return True
+
+
+def summary_scores(summary):
+    """
+    Returns ({section_key: score}, total) from a dict of a summary's SUMMARY_SCORE_FIELDS as
+    exact Decimals, calculated the same way as PeriodScores.decimal_scores().
+    """
+    section_scores = {}
+    total = Decimal('0.00')
+    for key in ('strategic', 'soft_skill'):
+        score = Decimal('0.00')
+        if summary[f'{key}_weight'] > 0:
+            score = Decimal(summary[f'{key}_weighted_sum']) / Decimal(summary[f'{key}_weight'])
+        section_scores[key] = score
+        total += score * (Decimal(summary[f'{key}_share']) / Decimal(100))
+    return section_scores, total
+
+
+def appraisal_scores(user_id, period_id):
+    """
+    Returns an employee's (strategic_objectives_score, soft_skills_score) for an overall
+    appraisal, as whole percentages, from their period score summary.
+    """
+    summary = PeriodScoreSummary.objects.filter(
+        user_id=user_id, period_id=period_id
+    ).values('strategic_score', 'soft_skill_score').first()
+    if summary is None:
+        return 0, 0
+    return round(summary['strategic_score'] * 100), round(summary['soft_skill_score'] * 100)
@@ -0,0 +1,37 @@
+# performance_appraisal/targets.py
+import logging
+
+from django.db import transaction
+
+from .models import EmployeePerformance, kra_section, target_value_cents
+from .summaries import refresh_score_summaries
+from .versioning import bump_table_versions
+
+
+logger = logging.getLogger(__name__)
+
+
+def recompute_target_records(target):
+    """
+    Copies a performance target's current value, weight and section onto its performance
+    records after the target was edited. One UPDATE rewrites every record still holding the old
+    copy, the database regenerates their percentage_achieved and weighted_average, and only the
+    score summaries of the affected (user, period) pairs are refreshed.
+    Returns the number of records updated.
+    """
+    copy = {
+        'target_value_cents': target_value_cents(target.target_value),
+        'target_weight': target.weight,
+        'section': kra_section(target.kra_id),
+    }
+    with transaction.atomic():
+        stale = EmployeePerformance.objects.filter(performance_target=target).exclude(**copy)
+        keys = set(stale.values_list('user_id', 'period_id').distinct())
+        if not keys:
+            return 0
+        updated = stale.update(**copy)
+        # .update() sends no signals: refresh the summaries and version stamps the saves would have
+        refresh_score_summaries(keys)
+        bump_table_versions(EmployeePerformance)
+    logger.info("Recomputed %d performance records of target %s", updated, target.pk)
+    return updated
@@ -1,3 +1,1347 @@
-from django.test import TestCase
+import re
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail.backends import locmem
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .authentication import reset_authorization_changes
+from .bulk import PARALLEL_HASHING_MIN_PASSWORDS, hash_passwords
+from .consistency import check_derived_fields
+from .deletion import claim_next_deletion_job, execute_deletion_job, plan_deletion
+from .hierarchy import invalidate_hierarchy_snapshot
+from .outbox import drain_outbox, send_outbox_batch
+from .querycount import QueryBudgetExceeded, record_queries
+from .readers import ValuesReader
+from .scoring import ScoringModel, rescale_shares, score_period
+from .sections import stale_sections
+from .summaries import appraisal_scores, rebuild_score_summaries
+from .targets import recompute_target_records
+from .bonus import calculate_bonuses, request_bonus_run, claim_next_bonus_run, execute_bonus_run, BonusCalculationError
+from .models import (
+    Department, Role, User, Metrics, Pillar, KeyResultArea, KPI, PerformanceTarget,
+    EmployeePerformance, SoftSkillRating, OverallAppraisal, Training, DevelopmentPlan, RatingKey,
+    BonusRun, PeriodScoreSummary, OutboundEmail, AppraisalPeriod, DeletionJob
+)
+from . import serializers as winas_serializers
+
+
+PERIOD = "Jan-Jun 2024"
+
+
+def appraisal_period(label=PERIOD):
+    return AppraisalPeriod.objects.get_or_create(label=label)[0]
+
+
+def create_appraisal_hierarchy():
+    """Creates one strategic and one soft-skill pillar, each with a KRA, plus a target."""
+    metrics = Metrics.objects.create(metrics_name="Balanced Scorecard")
+    strategic_pillar = Pillar.objects.create(metrics=metrics, pillar_name="SHARED PERFORMANCE AREAS")
+    soft_skill_pillar = Pillar.objects.create(metrics=metrics, pillar_name="SOFT SKILLS")
+    strategic_kra = KeyResultArea.objects.create(pillar=strategic_pillar, kra_name="Membership")
+    soft_skill_kra = KeyResultArea.objects.create(pillar=soft_skill_pillar, kra_name="Teamwork")
+    target = PerformanceTarget.objects.create(
+        kra=strategic_kra, target_description="Recruit 40 new members", target_value=Decimal('40'), weight=20
+    )
+    return target, soft_skill_kra
+
+
+def create_employees(count, department=None, role=None, start=0):
+    return [
+        User.objects.create_user(
+            email=f"employee{i}@example.com",
+            password=None,
+            first_name="Employee",
+            last_name=str(i),
+            employee_number=f"EMP{i:05d}",
+            annual_salary=Decimal('50000.00') + i,
+            department=department,
+            role=role,
+        )
+        for i in range(start, start + count)
+    ]
+
+
+class BonusCalculationTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(department_name="Finance")
+        self.role = Role.objects.create(role_name="Employee")
+        self.target, self.soft_skill_kra = create_appraisal_hierarchy()
+
+    def seed(self, count, start=0):
+        for i, user in enumerate(create_employees(count, self.department, self.role, start)):
+            EmployeePerformance.objects.create(
+                user=user, performance_target=self.target, period=appraisal_period(),
+                actual_achievement=40 * (1 + i % 3),
+            )
+            SoftSkillRating.objects.create(
+                user=user, soft_skill_kra=self.soft_skill_kra, period=appraisal_period(),
+                rating=60 + i % 40, weight=10,
+            )
+
+    def test_matches_per_user_formula(self):
+        self.seed(3)
+        results = {row['user_id']: row for row in calculate_bonuses(Decimal('100000'), appraisal_period().id)}
+        salary_total = sum(User.objects.values_list('annual_salary', flat=True))
+
+        for user in User.objects.all():
+            performance = EmployeePerformance.objects.get(user=user)
+            rating = SoftSkillRating.objects.get(user=user)
+            strategic_score = Decimal(performance.weighted_average) / Decimal(self.target.weight)
+            soft_skill_score = Decimal(rating.weighted_average) / Decimal(rating.weight)
+            total = strategic_score * Decimal('0.70') + soft_skill_score * Decimal('0.30')
+            bonus = (user.annual_salary / salary_total) * (total * Decimal('100000'))
+
+            row = results[user.id]
+            self.assertEqual(row['strategic_score'], round(strategic_score, 2))
+            self.assertEqual(row['soft_skill_score'], round(soft_skill_score, 2))
+            self.assertEqual(row['calculated_bonus'], round(bonus, 2))
+            self.assertEqual(row['department'], "Finance")
+            self.assertEqual(row['role'], "Employee")
+
+    def test_query_count_does_not_grow_with_head_count(self):
+        period_id = appraisal_period().id
+        self.seed(2)
+        with self.assertNumQueries(2):
+            calculate_bonuses(Decimal('100000'), period_id)
+        self.seed(20, start=2)
+        with self.assertNumQueries(2):
+            calculate_bonuses(Decimal('100000'), period_id)
+
+    def test_zero_salary_pool_is_an_error(self):
+        with self.assertRaises(BonusCalculationError):
+            calculate_bonuses(Decimal('100000'), appraisal_period().id)
+
+    def test_stored_run_is_reused_until_inputs_change(self):
+        self.seed(3)
+        run, created = request_bonus_run(Decimal('100000'), appraisal_period().id)
+        self.assertTrue(created)
+        claimed = claim_next_bonus_run()
+        self.assertEqual(claimed, run)
+        execute_bonus_run(claimed)
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, BonusRun.STATUS_COMPLETED)
+        self.assertEqual(run.processed_employees, 3)
+        self.assertEqual(
+            list(run.results.values_list('calculated_bonus', flat=True)),
+            [row['calculated_bonus'] for row in calculate_bonuses(Decimal('100000'), appraisal_period().id)],
+        )
+
+        self.assertEqual(request_bonus_run(Decimal('100000'), appraisal_period().id), (run, False))
+
+        rating = SoftSkillRating.objects.first()
+        rating.rating += 10
+        rating.save()
+        self.assertTrue(request_bonus_run(Decimal('100000'), appraisal_period().id)[1])
+
+    def test_a_run_left_by_a_dead_worker_is_taken_over(self):
+        self.seed(2)
+        run, _ = request_bonus_run(Decimal('100000'), appraisal_period().id)
+        dead_worker_run = claim_next_bonus_run()
+        self.assertEqual(request_bonus_run(Decimal('100000'), appraisal_period().id), (run, False))
+        self.assertIsNone(claim_next_bonus_run())  # Still claimed
+
+        BonusRun.objects.filter(pk=run.pk).update(claimed_until=timezone.now() - timedelta(seconds=1))
+        taken_over = claim_next_bonus_run()
+        self.assertEqual(taken_over, run)
+        # The first worker, had it only stalled, stops without writing anything
+        self.assertEqual(execute_bonus_run(dead_worker_run).processed_employees, 0)
+        self.assertFalse(run.results.exists())
+
+        execute_bonus_run(taken_over)
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.results.count()), (BonusRun.STATUS_COMPLETED, 2))
+
+    def test_renaming_an_employee_invalidates_a_stored_run(self):
+        self.seed(2)
+        run, _ = request_bonus_run(Decimal('100000'), appraisal_period().id)
+        execute_bonus_run(claim_next_bonus_run())
+        self.assertEqual(request_bonus_run(Decimal('100000'), appraisal_period().id), (run, False))
+
+        # Names are copied into the results, so the stored ones are outdated
+        user = User.objects.filter(is_active=True).first()
+        user.first_name = "Renamed"
+        user.save()
+        self.assertTrue(request_bonus_run(Decimal('100000'), appraisal_period().id)[1])
+
+
+class ScoringEngineTests(TestCase):
+    def setUp(self):
+        self.target, self.soft_skill_kra = create_appraisal_hierarchy()
+        self.user = create_employees(1)[0]
+        EmployeePerformance.objects.create(
+            user=self.user, performance_target=self.target, period=appraisal_period(), actual_achievement=80
+        )
+        SoftSkillRating.objects.create(
+            user=self.user, soft_skill_kra=self.soft_skill_kra, period=appraisal_period(), rating=50, weight=10
+        )
+
+    def test_default_section_weights(self):
+        section_scores, total = score_period(appraisal_period().id).scores(self.user.id)
+        self.assertEqual(section_scores, {'strategic': 2.0, 'soft_skill': 0.5})
+        self.assertAlmostEqual(total, 2.0 * 0.7 + 0.5 * 0.3)
+
+    def test_metrics_weight_overrides_section_share(self):
+        strategic = Metrics.objects.create(metrics_name="Strategic Objectives", weight=60)
+        soft_skills = Metrics.objects.create(metrics_name="Soft Skills", weight=40)
+        Pillar.objects.filter(pillar_name="SHARED PERFORMANCE AREAS").update(metrics=strategic)
+        Pillar.objects.filter(pillar_name="SOFT SKILLS").update(metrics=soft_skills)
+
+        _, total = score_period(appraisal_period().id).scores(self.user.id)
+        self.assertAlmostEqual(total, 2.0 * 0.6 + 0.5 * 0.4)
+
+        # Shares that do not add up to 100 are rescaled
+        soft_skills.weight = 20
+        soft_skills.save()
+        model = ScoringModel()
+        self.assertEqual(model.section_weights, [75, 25])
+        _, total = score_period(appraisal_period().id, model=model).scores(self.user.id)
+        self.assertAlmostEqual(total, 2.0 * 0.75 + 0.5 * 0.25)
+        self.assertEqual(rescale_shares([1, 1, 1]), [34, 33, 33])
+
+    def test_appraisal_scores_are_percentages(self):
+        self.assertEqual(appraisal_scores(self.user.id, appraisal_period().id), (200, 50))
+
+    def test_derived_columns_follow_queryset_updates(self):
+        EmployeePerformance.objects.update(actual_achievement=30)
+        SoftSkillRating.objects.update(rating=-55)
+        self.assertEqual(
+            list(EmployeePerformance.objects.values_list('percentage_achieved', 'weighted_average')), [(0, 15)]
+        )
+        self.assertEqual(list(SoftSkillRating.objects.values_list('weighted_average', flat=True)), [-5])
+
+    def test_editing_a_target_recomputes_its_records(self):
+        for user in create_employees(3, start=1):
+            EmployeePerformance.objects.create(
+                user=user, performance_target=self.target, period=appraisal_period(), actual_achievement=20
+            )
+        self.target.target_value, self.target.weight = Decimal('80'), 40
+        self.target.save()
+        self.assertEqual(
+            sorted(EmployeePerformance.objects.values_list('weighted_average', flat=True)), [10, 10, 10, 40]
+        )
+        self.assertEqual(appraisal_scores(self.user.id, appraisal_period().id), (100, 50))
+
+        # The API reports how many records an edit recomputed
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+        payload = {'kra': self.target.kra_id, 'target_description': "Recruit new members", 'target_value': "80.00", 'weight': 40}
+        response = client.put(f'/api/performance-targets/{self.target.pk}/', payload, format='json')
+        self.assertEqual((response.status_code, response.data['records_recomputed']), (200, 0))
+        response = client.put(f'/api/performance-targets/{self.target.pk}/', {**payload, 'weight': 20}, format='json')
+        self.assertEqual(response.data['records_recomputed'], 4)
+        client.put(f'/api/performance-targets/{self.target.pk}/', payload, format='json')
+
+        PerformanceTarget.objects.update(target_value=Decimal('160'))  # Sends no signal
+        self.assertEqual(recompute_target_records(PerformanceTarget.objects.get()), 4)
+        self.assertEqual(recompute_target_records(PerformanceTarget.objects.get()), 0)
+        self.assertEqual(appraisal_scores(self.user.id, appraisal_period().id), (50, 50))
+
+    def test_rows_follow_their_pillar_to_another_section(self):
+        self.assertEqual(EmployeePerformance.objects.get().section, 'strategic')
+        soft_skill_pillar = self.soft_skill_kra.pillar
+        self.target.kra.pillar = soft_skill_pillar  # Move the KRA, and the record under it
+        self.target.kra.save()
+        self.assertEqual(EmployeePerformance.objects.get().section, 'soft_skill')
+        # Soft skills are scored from ratings only: the record no longer counts anywhere
+        self.assertEqual(score_period(appraisal_period().id).scores(self.user.id)[0], {'strategic': 0.0, 'soft_skill': 0.5})
+        self.assertEqual(appraisal_scores(self.user.id, appraisal_period().id), (0, 50))
+
+        soft_skill_pillar.section = 'strategic'
+        soft_skill_pillar.save()
+        self.assertEqual(set(SoftSkillRating.objects.values_list('section', flat=True)), {'strategic'})
+        self.assertFalse(stale_sections(EmployeePerformance.objects.all()).exists())
+        self.assertEqual(appraisal_scores(self.user.id, appraisal_period().id), (200, 0))
+
+
+class PeriodScoreSummaryTests(TestCase):
+    def setUp(self):
+        self.target, self.soft_skill_kra = create_appraisal_hierarchy()
+        self.user = create_employees(1)[0]
+
+    def summary(self, period=PERIOD):
+        return PeriodScoreSummary.objects.get(user=self.user, period__label=period)
+
+    def test_maintained_on_create_update_and_delete(self):
+        performance = EmployeePerformance.objects.create(
+            user=self.user, performance_target=self.target, period=appraisal_period(), actual_achievement=80
+        )
+        rating = SoftSkillRating.objects.create(
+            user=self.user, soft_skill_kra=self.soft_skill_kra, period=appraisal_period(), rating=50, weight=10
+        )
+        summary = self.summary()
+        self.assertEqual((summary.strategic_weight, summary.strategic_weighted_sum), (20, 40))
+        self.assertEqual((summary.soft_skill_weight, summary.soft_skill_weighted_sum), (10, 5))
+        self.assertEqual(summary.total_score, Decimal('1.55'))
+
+        rating = SoftSkillRating.objects.get(pk=rating.pk)
+        rating.period = appraisal_period("Jul-Dec 2024")
+        rating.save()
+        self.assertEqual(self.summary().soft_skill_weight, 0)
+        self.assertEqual(self.summary("Jul-Dec 2024").soft_skill_weighted_sum, 5)
+
+        performance.delete()
+        self.assertFalse(PeriodScoreSummary.objects.filter(user=self.user, period=appraisal_period()).exists())
+        rating.delete()
+        self.assertFalse(PeriodScoreSummary.objects.filter(user=self.user).exists())
+
+    def test_rebuild_matches_incremental_summaries(self):
+        for i, user in enumerate(create_employees(5, start=1)):
+            EmployeePerformance.objects.create(
+                user=user, performance_target=self.target, period=appraisal_period(), actual_achievement=40 * i
+            )
+        incremental = list(PeriodScoreSummary.objects.order_by('user_id').values_list('user_id', 'total_score'))
+        PeriodScoreSummary.objects.all().delete()
+
+        self.assertEqual(rebuild_score_summaries(), 5)
+        self.assertEqual(
+            list(PeriodScoreSummary.objects.order_by('user_id').values_list('user_id', 'total_score')), incremental
+        )
+
+
+    def test_only_scoring_edits_of_the_hierarchy_rescore(self):
+        EmployeePerformance.objects.create(
+            user=self.user, performance_target=self.target, period=appraisal_period(), actual_achievement=80
+        )
+        summary_writes = re.compile(r'^(INSERT INTO|UPDATE|DELETE FROM) "winas_periodscoresummary"')
+        pillar = Pillar.objects.get(pk=self.target.kra.pillar_id)
+        metrics = Metrics.objects.get(pk=pillar.metrics_id)
+        with CaptureQueriesContext(connection) as queries:
+            pillar.pillar_name = "Shared performance areas"
+            pillar.save()
+            metrics.description = "Reworded"
+            metrics.save()
+            kra = KeyResultArea.objects.get(pk=self.target.kra_id)
+            kra.description = "Reworded"
+            kra.save()
+        self.assertFalse([query['sql'] for query in queries if summary_writes.match(query['sql'])])
+
+        # Moving the pillar to the soft skills section rescores the employee, whose record no
+        # longer counts: soft skills are scored from ratings only
+        self.assertEqual(self.summary().strategic_weight, 20)
+        pillar.section = 'soft_skill'
+        pillar.save()
+        summary = self.summary()
+        self.assertEqual((summary.strategic_weight, summary.soft_skill_weight), (0, 0))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+        # Few distinct scale values, so pages have to break ties on id
+        for i in range(23):
+            RatingKey.objects.create(point_scale_min=i % 4, point_scale_max=100, description=f"Key {i}")
+
+    def walk(self, url, link='next'):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            self.assertLess(len(ids), 1000, "the pages never end")
+            url = response.data[link]
+        return ids
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get('/api/rating-keys/')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 23)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(RatingKey.objects.order_by('-point_scale_min', '-id').values_list('id', flat=True))
+        ids = self.walk('/api/rating-keys/?page_size=5&ordering=-point_scale_min')
+        self.assertEqual(ids, expected)
+
+    def test_previous_links_walk_back(self):
+        url = '/api/rating-keys/?page_size=5&ordering=point_scale_min'
+        for _ in range(3):
+            url = self.client.get(url).data['next']
+        last_page = self.client.get(url).data
+        ids = self.walk(last_page['previous'], link='previous')
+        expected = list(RatingKey.objects.order_by('point_scale_min', 'id').values_list('id', flat=True))
+        self.assertEqual(sorted(ids, key=expected.index), expected[:15])
+
+    def test_count_and_page_size_cap(self):
+        response = self.client.get('/api/rating-keys/?page_size=100000&count=exact')
+        self.assertEqual(response.data['count'], 23)
+        self.assertEqual(len(response.data['results']), 23)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/rating-keys/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_datetime_cursors_keep_microseconds(self):
+        ceo = User.objects.create_superuser(email="ceo@example.com", password=None, role=Role.objects.create(role_name="CEO"))
+        self.client.force_authenticate(ceo)
+        # Timestamps closer together than a millisecond, with ties, in an order unrelated to id
+        joined = timezone.now()
+        for i, offset in enumerate([300, 100, 100, 200, 0, 400, 250]):
+            User.objects.create_user(
+                email=f"user{i}@example.com", password=None, employee_number=f"EMP{i:05d}",
+                date_joined=joined + timedelta(microseconds=offset),
+            )
+        for prefix in ['', '-']:
+            expected = list(User.objects.order_by(f'{prefix}date_joined', f'{prefix}id').values_list('id', flat=True))
+            self.assertEqual(self.walk(f'/api/users/?page_size=2&ordering={prefix}date_joined'), expected)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+        target, _ = create_appraisal_hierarchy()
+        for user in create_employees(3):
+            EmployeePerformance.objects.create(
+                user=user, performance_target=target, period=appraisal_period(),
+                actual_achievement=40, comments="A long appraisal comment " * 50,
+            )
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_fields_limits_response_and_columns(self):
+        rows, sql = self.get('/api/employee-performance/?fields=id,actual_achievement')
+        self.assertEqual(set(rows[0]), {'id', 'actual_achievement'})
+        self.assertNotIn('"comments"', sql)
+        self.assertNotIn('winas_user', sql)
+
+    def test_exclude_drops_text_columns(self):
+        rows, sql = self.get('/api/employee-performance/?exclude=comments')
+        self.assertNotIn('comments', rows[0])
+        self.assertIn('user_name', rows[0])
+        self.assertNotIn('"comments"', sql)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/employee-performance/?fields=id,salary')
+        self.assertEqual(response.status_code, 400)
+
+
+class ListFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+        self.finance = Department.objects.create(department_name="Finance")
+        self.credit = Department.objects.create(department_name="Credit")
+        target, soft_skill_kra = create_appraisal_hierarchy()
+        users = create_employees(2, self.finance) + create_employees(2, self.credit, start=2)
+        for user in users:
+            for period in (PERIOD, "Jul-Dec 2024"):
+                EmployeePerformance.objects.create(
+                    user=user, performance_target=target, period=appraisal_period(period), actual_achievement=40
+                )
+                SoftSkillRating.objects.create(
+                    user=user, soft_skill_kra=soft_skill_kra, period=appraisal_period(period), rating=70, weight=10
+                )
+
+    def plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Test tables are tiny, so make the planner show which index it would use at scale
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+        return queryset.explain()
+
+    def index_name(self, model, fields):
+        return next(index.name for index in model._meta.indexes if index.fields == fields)
+
+    def test_filters_by_period_and_department(self):
+        response = self.client.get(
+            f'/api/employee-performance/?period_under_review={PERIOD}&department={self.finance.pk}'
+        )
+        self.assertEqual(len(response.data), 2)
+        self.assertTrue(all(row['period_under_review'] == PERIOD for row in response.data))
+
+        response = self.client.get(f'/api/soft-skill-ratings/?user={self.credit.users.first().pk}')
+        self.assertEqual(len(response.data), 2)
+
+    def test_invalid_filter_value_is_rejected(self):
+        self.assertEqual(self.client.get('/api/employee-performance/?pillar=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/overall-appraisals/?date_of_appraisal_after=2024-02-30').status_code, 400)
+
+    def test_query_plans_use_composite_indexes(self):
+        for model in (EmployeePerformance, SoftSkillRating):
+            plan = self.plan(model.objects.filter(period=appraisal_period()))
+            self.assertIn(self.index_name(model, ['period', 'user']), plan)
+            plan = self.plan(model.objects.filter(user_id=self.finance.users.first().pk, period=appraisal_period()))
+            self.assertIn(self.index_name(model, ['user', 'period']), plan)
+
+        plan = self.plan(OverallAppraisal.objects.filter(period=appraisal_period(), date_of_appraisal__gte='2024-01-01'))
+        self.assertIn(self.index_name(OverallAppraisal, ['period', 'date_of_appraisal']), plan)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+        self.department = Department.objects.create(department_name="Finance")
+
+    def test_unchanged_list_is_answered_with_304_from_the_version_stamp_alone(self):
+        etag = self.client.get('/api/departments/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/departments/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        Department.objects.create(department_name="Credit")
+        response = self.client.get('/api/departments/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_detail_etag_follows_its_own_row(self):
+        url = f'/api/departments/{self.department.pk}/'
+        etag = self.client.get(url)['ETag']
+        Department.objects.create(department_name="Credit")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.department.department_name = "Finance & Accounts"
+        self.department.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_depends_on_related_tables(self):
+        target, _ = create_appraisal_hierarchy()
+        etag = self.client.get('/api/performance-targets/')['ETag']
+        kra = target.kra
+        kra.kra_name = "Membership growth"
+        kra.save()
+        self.assertEqual(self.client.get('/api/performance-targets/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ValuesReaderParityTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(department_name="Finance")
+        role = Role.objects.create(role_name="Employee")
+        target, soft_skill_kra = create_appraisal_hierarchy()
+        RatingKey.objects.create(point_scale_min=0, point_scale_max=49, description="Poor")
+        # One employee with and one without a department and role; the pillars have no target
+        staffed, unassigned = create_employees(1, department, role) + create_employees(1, start=1)
+        for user in (staffed, unassigned):
+            EmployeePerformance.objects.create(
+                user=user, performance_target=target, period=appraisal_period(), actual_achievement=33, comments="Good"
+            )
+            SoftSkillRating.objects.create(user=user, soft_skill_kra=soft_skill_kra, period=appraisal_period(), rating=70, weight=10)
+            Training.objects.create(user=user, course_name="Credit analysis", completion_date="2024-05-01")
+            DevelopmentPlan.objects.create(user=user, activity_description="Mentoring")
+        Pillar.objects.create(pillar_name="OTHER")  # Without Metrics either
+        OverallAppraisal.objects.create(
+            user=staffed, period=appraisal_period(), strategic_objectives_score=60, soft_skills_score=25,
+            date_of_appraisal="2024-07-15", appraiser=unassigned,
+        )
+
+    def test_matches_model_serializers(self):
+        serializer_classes = [
+            cls for cls in vars(winas_serializers).values()
+            if isinstance(cls, type) and getattr(cls, 'read_from_values', False)
+        ]
+        self.assertGreaterEqual(len(serializer_classes), 10)
+        for serializer_class in serializer_classes:
+            with self.subTest(serializer=serializer_class.__name__):
+                serializer = serializer_class()
+                queryset = serializer.annotate_queryset(serializer_class.Meta.model.objects.order_by('id'))
+                reader = ValuesReader.for_serializer(serializer, annotations=queryset.query.annotations)
+                self.assertIsNotNone(reader)
+                expected = serializer_class(queryset, many=True).data
+                self.assertEqual(reader.read(reader.values(queryset)), [dict(item) for item in expected])
+
+    def test_serializers_with_method_fields_fall_back(self):
+        self.assertIsNone(ValuesReader.for_serializer(winas_serializers.BonusRunSerializer()))
+
+
+class HierarchyCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+        for i in range(3):
+            metrics = Metrics.objects.create(metrics_name=f"Scorecard {i}")
+            for j in range(i + 1):
+                pillar = Pillar.objects.create(metrics=metrics, pillar_name=f"Pillar {j}")
+                kra = KeyResultArea.objects.create(pillar=pillar, kra_name="Membership")
+                KPI.objects.create(kra=kra, kpi_name="New members", weight=5)
+                PerformanceTarget.objects.create(kra=kra, target_description="Recruit", weight=10)
+                PerformanceTarget.objects.create(kra=kra, target_description="Retain", weight=15)
+
+    def test_counts_come_from_a_single_query(self):
+        with self.assertNumQueries(2):  # version stamps + the annotated list
+            response = self.client.get('/api/metrics/?include=kras_count,targets_count,targets_weight,kpis_weight')
+        counts = {
+            row['metrics_name']: (row['pillars_count'], row['kras_count'], row['targets_count'], row['targets_weight'], row['kpis_weight'])
+            for row in response.data
+        }
+        self.assertEqual(counts["Scorecard 0"], (1, 1, 2, 25, 5))
+        self.assertEqual(counts["Scorecard 2"], (3, 3, 6, 75, 15))
+
+    def test_optional_counts_are_left_out_by_default(self):
+        row = self.client.get('/api/pillars/').data[0]
+        self.assertNotIn('targets_count', row)
+        row = self.client.get('/api/kras/?fields=id,targets_count').data[0]
+        self.assertEqual(row, {'id': row['id'], 'targets_count': 2})
+
+
+class HierarchyTreeTests(TestCase):
+    def setUp(self):
+        invalidate_hierarchy_snapshot()  # The snapshot lives in the process, across test transactions
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+        self.target, _ = create_appraisal_hierarchy()
+        KPI.objects.create(kra=self.target.kra, kpi_name="New members", weight=5)
+
+    def test_tree_is_nested_and_built_with_a_fixed_number_of_queries(self):
+        for i in range(5):
+            Pillar.objects.create(metrics=self.target.kra.pillar.metrics, pillar_name=f"Extra {i}")
+        invalidate_hierarchy_snapshot()
+        with self.assertNumQueries(8):  # savepoint, version stamps, one query per level, release
+            tree = self.client.get('/api/hierarchy/').json()
+        pillar = tree['metrics'][0]['pillars'][0]
+        self.assertEqual(pillar['pillar_name'], "SHARED PERFORMANCE AREAS")
+        self.assertEqual(pillar['kras'][0]['performance_targets'][0]['id'], self.target.pk)
+        self.assertEqual(pillar['kras'][0]['kpis'][0]['kpi_name'], "New members")
+        self.assertEqual(len(tree['metrics'][0]['pillars']), 7)
+
+    def test_repeat_requests_are_served_from_the_snapshot_until_the_hierarchy_changes(self):
+        first = self.client.get('/api/hierarchy/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/hierarchy/')
+        self.assertEqual(first.content, second.content)
+
+        KeyResultArea.objects.create(pillar=self.target.kra.pillar, kra_name="Loans")
+        response = self.client.get('/api/hierarchy/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        kras = response.json()['metrics'][0]['pillars'][0]['kras']
+        self.assertEqual([kra['kra_name'] for kra in kras], ["Membership", "Loans"])
+
+
+@modify_settings(MIDDLEWARE={'append': 'winas.querycount.QueryCountMiddleware'})
+@override_settings(QUERY_COUNT_STRICT=True, QUERY_COUNT_REPEAT_THRESHOLD=5)
+class QueryScalingTests(TestCase):
+    """Seeds N and then 10N rows behind every list endpoint; the number of queries must not change."""
+    N = 3
+    LIST_URLS = [
+        '/api/users/', '/api/departments/', '/api/roles/', '/api/metrics/', '/api/pillars/', '/api/kras/',
+        '/api/performance-targets/', '/api/employee-performance/', '/api/soft-skill-ratings/',
+        '/api/overall-appraisals/', '/api/score-summaries/', '/api/trainings/', '/api/development-plans/',
+        '/api/rating-keys/', '/api/bonus-runs/',
+    ]
+
+    def setUp(self):
+        self.department = Department.objects.create(department_name="Finance")
+        self.role = Role.objects.create(role_name="Employee")
+        self.target, self.soft_skill_kra = create_appraisal_hierarchy()
+        ceo = User.objects.create_superuser(email="ceo@example.com", password=None, role=Role.objects.create(role_name="CEO"))
+        self.client = APIClient()
+        self.client.force_authenticate(ceo)
+        self.seeded = 0
+
+    def seed(self, count):
+        for user in create_employees(count, self.department, self.role, start=self.seeded):
+            i = self.seeded = self.seeded + 1
+            Department.objects.create(department_name=f"Branch {i}")
+            Role.objects.create(role_name=f"Officer {i}")
+            metrics = Metrics.objects.create(metrics_name=f"Scorecard {i}")
+            pillar = Pillar.objects.create(metrics=metrics, pillar_name=f"Pillar {i}", performance_target=self.target)
+            kra = KeyResultArea.objects.create(pillar=pillar, kra_name=f"KRA {i}")
+            PerformanceTarget.objects.create(kra=kra, target_description=f"Target {i}", weight=5)
+            RatingKey.objects.create(point_scale_min=i, point_scale_max=100, description=f"Key {i}")
+            EmployeePerformance.objects.create(user=user, performance_target=self.target, period=appraisal_period(), actual_achievement=20)
+            SoftSkillRating.objects.create(user=user, soft_skill_kra=self.soft_skill_kra, period=appraisal_period(), rating=70, weight=10)
+            OverallAppraisal.objects.create(
+                user=user, period=appraisal_period(), strategic_objectives_score=50, soft_skills_score=20,
+                date_of_appraisal="2024-07-15", appraiser=user,
+            )
+            Training.objects.create(user=user, course_name="Credit analysis")
+            DevelopmentPlan.objects.create(user=user, activity_description="Mentoring")
+            BonusRun.objects.create(total_bonus_pool=1000 * i, period=appraisal_period(), input_fingerprint=str(i), requested_by=user)
+
+    def query_counts(self):
+        counts = {}
+        for url in self.LIST_URLS:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            counts[url] = int(response['X-Query-Count'])
+        return counts
+
+    def assert_counts_do_not_grow(self):
+        self.seed(self.N)
+        few = self.query_counts()
+        self.seed(9 * self.N)
+        self.assertEqual(self.query_counts(), few)
+
+    def test_values_rows(self):
+        self.assert_counts_do_not_grow()
+
+    def test_model_instances(self):
+        # Serializing instances instead of .values() rows relies on the views' select_related
+        with mock.patch.object(ValuesReader, 'for_serializer', return_value=None):
+            self.assert_counts_do_not_grow()
+
+    def test_queries_run_while_streaming_are_counted(self):
+        self.seed(self.N)
+        payload = {'total_bonus_pool': '100000.00', 'period_under_review': PERIOD}
+        response = self.client.post('/api/bonus-calculation/?export=csv', payload, format='json')
+        before_streaming = int(response['X-Query-Count'])
+        self.assertGreater(len(b''.join(response.streaming_content).splitlines()), self.N)
+
+        # The export reads the employees while the body is streamed, after the header was set
+        with override_settings(QUERY_COUNT_BUDGET=before_streaming):
+            response = self.client.post('/api/bonus-calculation/?export=csv', payload, format='json')
+            with self.assertRaisesMessage(QueryBudgetExceeded, f"over the budget of {before_streaming}"):
+                b''.join(response.streaming_content)
+
+    def test_repeated_statements_are_reported(self):
+        self.seed(self.N)
+        with override_settings(QUERY_COUNT_STRICT=False), record_queries() as log:
+            for user in User.objects.filter(department__isnull=False):
+                user.department
+        self.assertEqual(list(log.repeated(self.N).values()), [self.N])
+
+
+class DerivedFieldCheckTests(TestCase):
+    def setUp(self):
+        self.target, self.soft_skill_kra = create_appraisal_hierarchy()
+        for user in create_employees(5):
+            EmployeePerformance.objects.create(
+                user=user, performance_target=self.target, period=appraisal_period(), actual_achievement=20
+            )
+            SoftSkillRating.objects.create(
+                user=user, soft_skill_kra=self.soft_skill_kra, period=appraisal_period(), rating=50, weight=10
+            )
+
+    def test_stale_copies_are_found_in_chunks_and_repaired(self):
+        PerformanceTarget.objects.update(weight=40)  # Sends no signal, so the records keep weight 20
+        SoftSkillRating.objects.filter(pk__in=SoftSkillRating.objects.order_by('pk')[:2]).update(section=None)
+
+        reports = check_derived_fields(workers=1, chunk_size=2)
+        self.assertEqual([report.checked for report in reports], [5, 5])
+        self.assertEqual([report.mismatches for report in reports], [{'target_weight': 5}, {'section': 2}])
+
+        reports = check_derived_fields(repair=True, workers=1, chunk_size=2)
+        self.assertEqual([report.repaired for report in reports], [5, 2])
+        self.assertEqual(set(EmployeePerformance.objects.values_list('weighted_average', flat=True)), {20})
+        self.assertEqual(appraisal_scores(EmployeePerformance.objects.first().user_id, appraisal_period().id), (50, 50))
+
+        out = StringIO()
+        call_command('check_derived_fields', workers=1, stdout=out)
+        self.assertIn("All stored copies are consistent.", out.getvalue())
+
+
+class DeletionJobTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+        self.target, self.soft_skill_kra = create_appraisal_hierarchy()
+        self.pillar = self.target.kra.pillar
+        KPI.objects.create(kra=self.target.kra, kpi_name="New members", weight=5)
+        # Pillar.performance_target cascades: this pillar goes with the target
+        Pillar.objects.create(pillar_name="Growth", performance_target=self.target)
+        self.record = EmployeePerformance.objects.create(
+            user=create_employees(1)[0], performance_target=self.target, period=appraisal_period(), actual_achievement=20
+        )
+
+    def test_plan_reports_blocking_records_and_the_worker_deletes_in_batches(self):
+        response = self.client.delete(f'/api/pillars/{self.pillar.pk}/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['plan']['blocked_by'], {'employee_performance': 1, 'soft_skill_ratings': 0})
+        self.assertFalse(DeletionJob.objects.exists())
+
+        self.record.delete()
+        plan = plan_deletion(self.pillar).as_dict()
+        self.assertEqual(plan['deletes'], {'kpis': 1, 'performance_targets': 1, 'key_result_areas': 1, 'pillars': 2})
+        self.assertTrue(plan['can_delete'])
+
+        response = self.client.delete(f'/api/pillars/{self.pillar.pk}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.data['status'], response.data['total_rows']), (DeletionJob.STATUS_QUEUED, 5))
+        self.assertTrue(Pillar.objects.filter(pk=self.pillar.pk).exists())  # Nothing is deleted until the worker runs
+
+        with mock.patch('winas.deletion.DELETE_BATCH_SIZE', 1):
+            call_command('run_worker', once=True, stdout=StringIO())
+        job = self.client.get(f'/api/deletion-jobs/{response.data["id"]}/').data
+        self.assertEqual((job['status'], job['deleted_rows'], job['progress']), (DeletionJob.STATUS_COMPLETED, 5, 100))
+        self.assertEqual(list(Pillar.objects.values_list('pillar_name', flat=True)), ["SOFT SKILLS"])
+        self.assertFalse(KPI.objects.exists() or PerformanceTarget.objects.exists())
+        self.assertEqual(list(KeyResultArea.objects.all()), [self.soft_skill_kra])
+
+    def test_records_created_while_deleting_stop_the_job_cleanly(self):
+        self.record.delete()
+        response = self.client.delete(f'/api/pillars/{self.pillar.pk}/')
+        user = User.objects.get(email="employee0@example.com")
+
+        def record_after_first_batch():
+            if not EmployeePerformance.objects.exists():
+                EmployeePerformance.objects.create(
+                    user=user, performance_target=self.target, period=appraisal_period(), actual_achievement=20
+                )
+
+        with mock.patch('winas.deletion.invalidate_hierarchy_snapshot', side_effect=record_after_first_batch), \
+                self.assertLogs('winas.deletion', 'WARNING'):
+            call_command('run_worker', once=True, stdout=StringIO())
+        job = DeletionJob.objects.get(pk=response.data['id'])
+        self.assertEqual((job.status, job.deleted_rows), (DeletionJob.STATUS_FAILED, 1))
+        self.assertIn("1 performance records", job.error)
+        self.assertFalse(KPI.objects.exists())  # The batch before the record was created
+        self.assertTrue(PerformanceTarget.objects.filter(pk=self.target.pk, kra__pillar=self.pillar).exists())
+        self.assertEqual(Pillar.objects.count(), 3)
+
+    def test_a_job_left_by_a_dead_worker_is_taken_over(self):
+        self.record.delete()
+        response = self.client.delete(f'/api/pillars/{self.pillar.pk}/')
+        dead_worker_job = claim_next_deletion_job()
+        self.assertEqual(self.client.delete(f'/api/pillars/{self.pillar.pk}/').data['id'], response.data['id'])
+        self.assertIsNone(claim_next_deletion_job())  # Still claimed
+
+        DeletionJob.objects.filter(pk=dead_worker_job.pk).update(claimed_until=timezone.now() - timedelta(seconds=1))
+        taken_over = claim_next_deletion_job()
+        self.assertEqual(taken_over, dead_worker_job)
+        # The first worker, had it only stalled, stops before its first batch
+        with self.assertLogs('winas.deletion', 'WARNING'):
+            self.assertEqual(execute_deletion_job(dead_worker_job).deleted_rows, 0)
+        self.assertTrue(KPI.objects.exists())
+
+        job = execute_deletion_job(taken_over)
+        self.assertEqual((job.status, job.deleted_rows), (DeletionJob.STATUS_COMPLETED, 5))
+        self.assertEqual(list(Pillar.objects.values_list('pillar_name', flat=True)), ["SOFT SKILLS"])
+
+
+class BulkPerformanceUploadTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(department_name="Finance")
+        self.target, _ = create_appraisal_hierarchy()
+        appraisal_period()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+
+    def rows(self, users, target=None, **extra):
+        target = target or self.target
+        return [
+            {'user': user.pk, 'performance_target': target.pk, 'period_under_review': PERIOD, 'actual_achievement': 30 + i, **extra}
+            for i, user in enumerate(users)
+        ]
+
+    def test_scores_match_single_saves_and_summaries_are_refreshed(self):
+        kra = self.target.kra
+        targets = [
+            self.target,
+            PerformanceTarget.objects.create(kra=kra, target_description="Thirds", target_value=Decimal('3'), weight=3),
+            PerformanceTarget.objects.create(kra=kra, target_description="Cents", target_value=Decimal('0.07'), weight=7),
+            PerformanceTarget.objects.create(kra=kra, target_description="Zero", target_value=Decimal('0'), weight=5),
+            PerformanceTarget.objects.create(kra=kra, target_description="Open", target_value=None, weight=5),
+        ]
+        bulk_user, single_user = create_employees(2, self.department)
+        rows = [
+            {'user': bulk_user.pk, 'performance_target': target.pk, 'period_under_review': PERIOD, 'actual_achievement': actual}
+            for target in targets for actual in (1, 29, -7)
+        ]
+        response = self.client.post('/api/employee-performance/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], len(rows))
+
+        for row in rows:
+            EmployeePerformance.objects.create(
+                user=single_user, performance_target_id=row['performance_target'],
+                period=appraisal_period(), actual_achievement=row['actual_achievement'],
+            )
+        def scores(user):
+            return list(
+                EmployeePerformance.objects.filter(user=user).order_by('id')
+                .values_list('performance_target', 'actual_achievement', 'percentage_achieved', 'weighted_average')
+            )
+        self.assertEqual(scores(bulk_user), scores(single_user))
+        self.assertTrue(PeriodScoreSummary.objects.filter(user=bulk_user, period=appraisal_period()).exists())
+
+    def test_query_count_does_not_grow_with_row_count(self):
+        users = create_employees(56, self.department)
+        self.client.post('/api/employee-performance/bulk/', self.rows(users[:1]), format='json')  # Creates the version stamps
+        with CaptureQueriesContext(connection) as few:
+            self.client.post('/api/employee-performance/bulk/', self.rows(users[1:6]), format='json')
+        with CaptureQueriesContext(connection) as many:
+            self.client.post('/api/employee-performance/bulk/', self.rows(users[6:]), format='json')
+        self.assertEqual(EmployeePerformance.objects.count(), 56)
+        self.assertEqual(len(many), len(few))
+
+    def test_errors_are_reported_per_row_and_nothing_is_saved(self):
+        kpi = KPI.objects.create(kra=self.target.kra, kpi_name="New members", weight=5)
+        users = create_employees(3, self.department)
+        rows = self.rows(users, kpi=kpi.pk)
+        rows[0]['user'] = 999999
+        rows[1]['actual_achievement'] = "lots"
+        rows.append(dict(rows[2]))  # Same user, KPI and period as the row before
+        response = self.client.post('/api/employee-performance/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([(row['row'], sorted(row['errors'])) for row in response.data['rows']], [
+            (0, ['user']), (1, ['actual_achievement']), (3, ['non_field_errors']),
+        ])
+        self.assertFalse(EmployeePerformance.objects.exists())
+
+    def test_supervisors_upload_for_their_department_only(self):
+        supervisor = User.objects.create_user(
+            email="supervisor@example.com", password=None, department=self.department,
+            role=Role.objects.create(role_name="Supervisor"),
+        )
+        own, = create_employees(1, self.department)
+        other, = create_employees(1, Department.objects.create(department_name="Loans"), start=1)
+        self.client.force_authenticate(supervisor)
+        response = self.client.post('/api/employee-performance/bulk/', self.rows([own, other]), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([row['row'] for row in response.data['rows']], [1])
+        self.assertEqual(self.client.post('/api/employee-performance/bulk/', self.rows([own]), format='json').status_code, 201)
+
+
+class SoftSkillGridUpsertTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(department_name="Finance")
+        _, self.soft_skill_kra = create_appraisal_hierarchy()
+        appraisal_period()
+        self.teamwork = KPI.objects.create(kra=self.soft_skill_kra, kpi_name="Teamwork", weight=10)
+        self.diligence = KPI.objects.create(kra=self.soft_skill_kra, kpi_name="Diligence", weight=20)
+        self.users = create_employees(3, self.department)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+
+    def upload(self, ratings, **grid):
+        return self.client.post(
+            '/api/soft-skill-ratings/bulk/', {'period_under_review': PERIOD, 'ratings': ratings, **grid}, format='json'
+        )
+
+    def grid(self, rating):
+        return [
+            {'user': user.pk, 'soft_skill_kpi': kpi.pk, 'rating': rating}
+            for user in self.users for kpi in (self.teamwork, self.diligence)
+        ]
+
+    def test_counts_created_updated_and_unchanged(self):
+        self.assertEqual(self.upload(self.grid(70)).data, {'created': 6, 'updated': 0, 'unchanged': 0})
+        rating = SoftSkillRating.objects.get(user=self.users[0], soft_skill_kpi=self.diligence)
+        self.assertEqual((rating.soft_skill_kra, rating.weight, rating.weighted_average), (self.soft_skill_kra, 20, 14))
+
+        grid = self.grid(70)
+        grid[0]['rating'] = 29
+        grid[1]['comments'] = "Reliable"
+        with self.assertNumQueries(16):  # lookups, locked read, one upsert, summary refresh, version stamps
+            response = self.upload(grid)
+        self.assertEqual(response.data, {'created': 0, 'updated': 2, 'unchanged': 4})
+        self.assertEqual(SoftSkillRating.objects.count(), 6)
+        self.assertEqual(SoftSkillRating.objects.get(user=self.users[0], soft_skill_kpi=self.teamwork).weighted_average, 2)
+        summary = PeriodScoreSummary.objects.get(user=self.users[0], period=appraisal_period())
+        self.assertEqual(summary.soft_skill_weighted_sum, 2 + 14)
+
+        with self.assertNumQueries(6):  # Nothing changed, nothing written
+            self.assertEqual(self.upload(grid).data, {'created': 0, 'updated': 0, 'unchanged': 6})
+
+    def test_invalid_cells_reject_the_grid(self):
+        other, = create_employees(1, Department.objects.create(department_name="Loans"), start=3)
+        grid = self.grid(70) + [
+            {'user': other.pk, 'soft_skill_kpi': self.teamwork.pk, 'rating': 70},
+            {'user': self.users[0].pk, 'soft_skill_kpi': self.teamwork.pk, 'rating': 80},
+        ]
+        response = self.upload(grid, department=self.department.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([row['row'] for row in response.data['rows']], [6, 7])
+        self.assertFalse(SoftSkillRating.objects.exists())
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class BulkOnboardingTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(department_name="Finance")
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+
+    def rows(self, count, start=0):
+        return [
+            {
+                'email': f"hire{i}@example.com", 'first_name': "New", 'last_name': f"Hire {i}",
+                'employee_number': f"NEW{i:05d}", 'annual_salary': "42000.00", 'department': self.department.pk,
+            }
+            for i in range(start, start + count)
+        ]
+
+    def test_csv_upload_creates_users_and_emails_their_passwords(self):
+        header = "email,first_name,last_name,employee_number,annual_salary,department\n"
+        lines = "".join(f"{row['email']},New,{row['last_name']},{row['employee_number']},42000,{self.department.pk}\n" for row in self.rows(3))
+        upload = SimpleUploadedFile("hires.csv", (header + lines).encode('utf-8'), content_type='text/csv')
+        response = self.client.post('/api/users/bulk/', {'file': upload}, format='multipart')
+        self.assertEqual(mail.outbox, [])  # Queued for the worker
+        drain_outbox()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        hire = User.objects.get(email="hire0@example.com")
+        self.assertEqual((hire.username, hire.department, hire.role.role_name), ("hire0", self.department, "Employee"))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [row['email'] for row in self.rows(3)])
+        password = re.search(r"Password: (\S+)", mail.outbox[0].body).group(1)
+        self.assertTrue(User.objects.get(email=mail.outbox[0].to[0]).check_password(password))
+
+    def test_parallel_hashing_matches_the_hasher(self):
+        passwords = [f"password-{i}" for i in range(PARALLEL_HASHING_MIN_PASSWORDS)]
+        with override_settings(ONBOARDING_HASH_WORKERS=2):
+            hashes = hash_passwords(passwords)
+        self.assertTrue(all(check_password(password, hashed) for password, hashed in zip(passwords, hashes)))
+
+    def test_duplicates_are_rejected_up_front(self):
+        create_employees(1, self.department)  # employee0@example.com, EMP00000
+        rows = self.rows(4)
+        rows[1]['email'] = "employee0@example.com"
+        rows[2]['employee_number'] = rows[0]['employee_number']
+        rows[3]['email'] = "hire0@example.org"  # Same username as the first row
+        response = self.client.post('/api/users/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([(row['row'], sorted(row['errors'])) for row in response.data['rows']], [
+            (1, ['email']), (2, ['employee_number']), (3, ['email']),
+        ])
+        self.assertEqual(User.objects.count(), 2)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+
+class FlakyBackend(locmem.EmailBackend):
+    """
+    A locmem backend whose first `failures` sends raise, like an unreachable SMTP server. It counts
+    connections the way the SMTP backend makes them: send_messages() connects (and disconnects)
+    itself unless the connection is already open.
+    """
+    failures = 0
+    connections = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connected = False
+
+    def open(self):
+        if self.connected:
+            return False
+        FlakyBackend.connections += 1
+        self.connected = True
+        return True
+
+    def close(self):
+        self.connected = False
+
+    def send_messages(self, messages):
+        new_connection = self.open()
+        try:
+            if FlakyBackend.failures:
+                FlakyBackend.failures -= 1
+                raise ConnectionRefusedError("Mail server unreachable")
+            return super().send_messages(messages)
+        finally:
+            if new_connection:
+                self.close()
+
+
+@override_settings(EMAIL_BACKEND='winas.tests.FlakyBackend', OUTBOX_RETRY_SECONDS=60, OUTBOX_MAX_ATTEMPTS=3)
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.supervisor = User.objects.create_user(
+            email="supervisor@example.com", password=None, is_staff=True,
+            department=Department.objects.create(department_name="Finance"),
+            role=Role.objects.create(role_name="Supervisor"),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.supervisor)
+
+    def create_employee(self, i):
+        return self.client.post('/api/users/', {
+            'email': f"hire{i}@example.com", 'first_name': "New", 'last_name': "Hire",
+            'employee_number': f"NEW{i:05d}", 'annual_salary': "42000.00",
+        }, format='json')
+
+    def test_account_creation_queues_the_email_instead_of_sending_it(self):
+        with mock.patch('builtins.print'):
+            self.assertEqual(self.create_employee(0).status_code, 201)
+        self.assertEqual(mail.outbox, [])
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.to, email.status), ("hire0@example.com", OutboundEmail.STATUS_PENDING))
+
+        self.assertEqual(send_outbox_batch(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ["hire0@example.com"])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.body), (OutboundEmail.STATUS_SENT, 1, ''))
+
+    def test_a_batch_is_sent_over_one_connection(self):
+        for i in range(3):
+            with mock.patch('builtins.print'):
+                self.create_employee(i)
+        FlakyBackend.connections = 0
+        self.assertEqual(send_outbox_batch(), (3, 0))
+        self.assertEqual(FlakyBackend.connections, 1)
+
+        # A failed send reconnects for the rest of the batch
+        for i in range(3, 6):
+            with mock.patch('builtins.print'):
+                self.create_employee(i)
+        FlakyBackend.connections, FlakyBackend.failures = 0, 1
+        self.assertEqual(send_outbox_batch(), (2, 1))
+        self.assertEqual(FlakyBackend.connections, 2)
+
+    def test_failures_back_off_and_give_up(self):
+        for i in range(2):
+            with mock.patch('builtins.print'):
+                self.create_employee(i)
+        FlakyBackend.failures = 1
+        start = timezone.now()
+        self.assertEqual(send_outbox_batch(), (1, 1))
+        self.assertEqual(send_outbox_batch(), (0, 0))  # The failed one is not due yet
+
+        failed = OutboundEmail.objects.get(status=OutboundEmail.STATUS_PENDING)
+        self.assertGreaterEqual(failed.next_attempt_at, start + timedelta(seconds=60))
+        self.assertIn("Mail server unreachable", failed.last_error)
+
+        # Retried when due: the second failure doubles the delay, the third is the last attempt
+        FlakyBackend.failures = 2
+        OutboundEmail.objects.filter(pk=failed.pk).update(next_attempt_at=timezone.now())
+        start = timezone.now()
+        self.assertEqual(send_outbox_batch(), (0, 1))
+        failed.refresh_from_db()
+        self.assertGreaterEqual(failed.next_attempt_at, start + timedelta(seconds=120))
+        OutboundEmail.objects.filter(pk=failed.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(send_outbox_batch(), (0, 1))
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), (OutboundEmail.STATUS_FAILED, 3))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class TokenClaimsTests(TestCase):
+    def setUp(self):
+        reset_authorization_changes()
+        self.addCleanup(reset_authorization_changes)
+        self.department = Department.objects.create(department_name="Credit")
+        self.supervisor = User.objects.create_user(
+            email="sup@example.com", password="s3cret-pass", department=self.department, is_staff=False,
+            role=Role.objects.create(role_name="Supervisor"),
+        )
+        self.client = APIClient()
+        response = self.client.post('/api/login/', {'email': "sup@example.com", 'password': "s3cret-pass"}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['tokens']['access']}")
+
+    def test_requests_are_authorized_from_the_claims(self):
+        with record_queries() as log:
+            response = self.client.get('/api/employee-performance/')
+        self.assertEqual(response.status_code, 200)
+        # Neither the user nor their role is loaded to authorize the request
+        self.assertFalse([sql for sql in log.statements if 'FROM "winas_role"' in sql])
+        self.assertFalse([sql for sql in log.statements if re.search(r'FROM "winas_user" WHERE "winas_user"."id" =', sql)])
+
+    def test_changing_the_role_rejects_older_tokens(self):
+        user = User.objects.get(pk=self.supervisor.pk)
+        user.role = Role.objects.create(role_name="Employee")
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertIsNotNone(user.authorization_changed_at)
+        self.assertEqual(self.client.get('/api/employee-performance/').status_code, 401)
+
+        # Another process picks the change up from the database
+        reset_authorization_changes()
+        self.assertEqual(self.client.get('/api/employee-performance/').status_code, 401)
+
+        # Signing in again issues a token with the new claims
+        self.client.credentials()
+        response = self.client.post('/api/login/', {'email': "sup@example.com", 'password': "s3cret-pass"}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['tokens']['access']}")
+        self.assertEqual(self.client.get('/api/employee-performance/').status_code, 200)
+
+
+    def test_renaming_the_role_rejects_older_tokens(self):
+        role = Role.objects.get(role_name="Supervisor")
+        role.role_name = "Team Lead"
+        with self.captureOnCommitCallbacks(execute=True):
+            role.save()
+        self.assertIsNotNone(User.objects.get(pk=self.supervisor.pk).authorization_changed_at)
+        self.assertEqual(self.client.get('/api/employee-performance/').status_code, 401)
+
+    def test_deleting_the_user_rejects_their_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.supervisor.pk).delete()
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+
+        # Another process finds the user missing after reloading the user ids
+        reset_authorization_changes()
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+
+    def test_deleting_the_department_or_role_rejects_older_tokens(self):
+        password = "s3cret-pass"
+        for deleted in [self.department, self.supervisor.role]:
+            with self.captureOnCommitCallbacks(execute=True):
+                deleted.delete()
+            user = User.objects.get(pk=self.supervisor.pk)
+            self.assertIsNotNone(user.authorization_changed_at)
+            self.assertEqual(self.client.get('/api/employee-performance/').status_code, 401)
+            reset_authorization_changes()
+            self.assertEqual(self.client.get('/api/employee-performance/').status_code, 401)
+
+            # The new token carries the NULL foreign key, so saving its principal writes no stale id
+            self.client.credentials()
+            response = self.client.post('/api/login/', {'email': "sup@example.com", 'password': password}, format='json')
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['tokens']['access']}")
+            new_password = password + "-1"
+            response = self.client.post('/api/password/change/', {
+                'old_password': password, 'new_password': new_password, 'new_password2': new_password,
+            }, format='json')
+            self.assertEqual(response.status_code, 200, response.data)
+            password = new_password
+
+
+class RowScopingTests(TestCase):
+    def setUp(self):
+        target, _ = create_appraisal_hierarchy()
+        credit, savings = Department.objects.create(department_name="Credit"), Department.objects.create(department_name="Savings")
+        employee_role = Role.objects.create(role_name="Employee")
+        self.supervisor = User.objects.create_user(
+            email="sup@example.com", password=None, department=credit, role=Role.objects.create(role_name="HOD-ICT")
+        )
+        self.colleague, self.outsider = create_employees(1, credit, employee_role) + create_employees(1, savings, employee_role, start=1)
+        self.records = {
+            user: EmployeePerformance.objects.create(user=user, performance_target=target, period=appraisal_period(), actual_achievement=20)
+            for user in [self.colleague, self.outsider]
+        }
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        self.client.force_authenticate(User.objects.select_related('role').get(pk=user.pk))
+
+    def test_lists_and_details_are_limited_to_the_requesters_rows(self):
+        self.authenticate(self.supervisor)
+        response = self.client.get('/api/employee-performance/')
+        self.assertEqual([row['id'] for row in response.data], [self.records[self.colleague].pk])
+        self.assertEqual(self.client.get(f'/api/employee-performance/{self.records[self.colleague].pk}/').status_code, 200)
+
+        # Another department's row is not fetched at all
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/employee-performance/{self.records[self.outsider].pk}/')
+        self.assertEqual(response.status_code, 404)
+
+        self.authenticate(self.outsider)
+        response = self.client.get('/api/employee-performance/')
+        self.assertEqual([row['id'] for row in response.data], [self.records[self.outsider].pk])
+        self.assertEqual(self.client.delete(f'/api/employee-performance/{self.records[self.colleague].pk}/').status_code, 404)
+        self.assertTrue(EmployeePerformance.objects.filter(pk=self.records[self.colleague].pk).exists())
+
+
+class AppraisalPeriodTests(TestCase):
+    def setUp(self):
+        self.target, _ = create_appraisal_hierarchy()
+        self.user = create_employees(1)[0]
+        self.period = appraisal_period()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password=None))
+
+    def test_api_takes_and_shows_the_label(self):
+        payload = {'user': self.user.pk, 'performance_target': self.target.pk, 'actual_achievement': 20}
+        response = self.client.post('/api/employee-performance/', {**payload, 'period_under_review': "Jan - Jun  2024"}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['period'], response.data['period_under_review']), (self.period.pk, PERIOD))
+
+        response = self.client.post('/api/employee-performance/', {**payload, 'period_under_review': "Jan-Jun 2042"}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('period_under_review', response.data)
+
+        response = self.client.get('/api/employee-performance/?period_under_review=Jan - Jun 2024')
+        self.assertEqual([row['period_under_review'] for row in response.data], [PERIOD])
+
+        response = self.client.delete(f'/api/appraisal-periods/{self.period.pk}/')
+        self.assertEqual(response.status_code, 400)
+
+
+class AppraisalPeriodMigrationTests(TransactionTestCase):
+    before = [('winas', '0017_appraisalperiod')]
+    after = [('winas', '0019_period_foreign_keys')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_period_labels_become_appraisal_periods(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old_apps = executor.loader.project_state(self.before).apps
+        OldUser = old_apps.get_model('winas', 'User')
+        OldPerformance = old_apps.get_model('winas', 'EmployeePerformance')
+        for i, label in enumerate(["Jan-Jun 2024", "Jan - Jun  2024", "2023 Q2"]):
+            user = OldUser.objects.create(username=f"user{i}", email=f"user{i}@example.com", password="!")
+            OldPerformance.objects.create(user=user, period_under_review=label, actual_achievement=10)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        new_apps = executor.loader.project_state(self.after).apps
+        periods = {
+            period.label: (period.start_date, period.end_date)
+            for period in new_apps.get_model('winas', 'AppraisalPeriod').objects.all()
+        }
+        self.assertEqual(periods, {
+            "Jan-Jun 2024": (date(2024, 1, 1), date(2024, 6, 30)),
+            "2023 Q2": (date(2023, 4, 1), date(2023, 6, 30)),
+        })
+        labels = new_apps.get_model('winas', 'EmployeePerformance').objects.order_by('user__username') \
+            .values_list('period__label', flat=True)
+        self.assertEqual(list(labels), ["Jan-Jun 2024", "Jan-Jun 2024", "2023 Q2"])
+
+
+class ScoreSummaryMigrationTests(TransactionTestCase):
+    before = [('winas', '0011_bonusrun_bonusresult')]
+    after = [('winas', '0012_periodscoresummary')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_migrations_fill_the_summaries(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old_apps = executor.loader.project_state(self.before).apps
+        Metrics = old_apps.get_model('winas', 'Metrics')
+        Pillar = old_apps.get_model('winas', 'Pillar')
+        KeyResultArea = old_apps.get_model('winas', 'KeyResultArea')
+        metrics = Metrics.objects.create(metrics_name="Balanced Scorecard")
+        strategic_kra = KeyResultArea.objects.create(
+            pillar=Pillar.objects.create(metrics=metrics, pillar_name="SHARED PERFORMANCE AREAS"), kra_name="Membership"
+        )
+        soft_skill_kra = KeyResultArea.objects.create(
+            pillar=Pillar.objects.create(metrics=metrics, pillar_name="SOFT SKILLS"), kra_name="Teamwork"
+        )
+        target = old_apps.get_model('winas', 'PerformanceTarget').objects.create(
+            kra=strategic_kra, target_description="Recruit 40 new members", target_value=Decimal('40'), weight=20
+        )
+        for i, label in enumerate(["Jan-Jun 2024", "Jan - Jun  2024"]):
+            user = old_apps.get_model('winas', 'User').objects.create(username=f"user{i}", email=f"user{i}@example.com", password="!")
+            old_apps.get_model('winas', 'EmployeePerformance').objects.create(
+                user=user, performance_target=target, period_under_review=label, actual_achievement=80,
+                percentage_achieved=2, weighted_average=40,
+            )
+            old_apps.get_model('winas', 'SoftSkillRating').objects.create(
+                user=user, soft_skill_kra=soft_skill_kra, period_under_review=label, rating=50, weight=10, weighted_average=5,
+            )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        summaries = executor.loader.project_state(self.after).apps.get_model('winas', 'PeriodScoreSummary').objects
+        self.assertEqual(
+            sorted(summaries.values_list('period_under_review', 'strategic_score', 'soft_skill_score', 'total_score')), [
+                ("Jan - Jun  2024", Decimal('2.0000'), Decimal('0.5000'), Decimal('1.5500')),
+                ("Jan-Jun 2024", Decimal('2.0000'), Decimal('0.5000'), Decimal('1.5500')),
+            ]
+        )
+
+        # Merging the spellings of the period rebuilds the summaries 0018 drops, as the app would
+        merged = [('winas', '0019_period_foreign_keys')]
+        executor = MigrationExecutor(connection)
+        executor.migrate(merged)
+        summaries = executor.loader.project_state(merged).apps.get_model('winas', 'PeriodScoreSummary').objects
+        self.assertEqual(list(summaries.values_list('period__label', flat=True)), ["Jan-Jun 2024"] * 2)
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        migrated = sorted(PeriodScoreSummary.objects.values_list('user_id', 'period__label', 'total_score'))
+        self.assertEqual(len(migrated), 2)
+        rebuild_score_summaries()
+        self.assertEqual(sorted(PeriodScoreSummary.objects.values_list('user_id', 'period__label', 'total_score')), migrated)
@@ -3,18 +3,21 @@ from django.urls import path
 from .views import (
     DepartmentListCreate, DepartmentDetail,
     RoleListCreate, RoleDetail,
-    UserManagementListCreate, UserManagementDetail, # Changed from UserListCreate, UserDetail
+    AppraisalPeriodListCreate, AppraisalPeriodDetail,
+    UserManagementListCreate, UserManagementDetail, UserBulkOnboarding, # Changed from UserListCreate, UserDetail
     MetricsListCreate, MetricsDetail,
-    PillarListCreate, PillarDetail,
-    KeyResultAreaListCreate, KeyResultAreaDetail,
+    PillarListCreate, PillarDetail, PillarDeletionPlan,
+    KeyResultAreaListCreate, KeyResultAreaDetail, KeyResultAreaDeletionPlan, HierarchyView,
+    DeletionJobList, DeletionJobDetail,
     PerformanceTargetListCreate, PerformanceTargetDetail,
-    EmployeePerformanceListCreate, EmployeePerformanceDetail,
-    SoftSkillRatingListCreate, SoftSkillRatingDetail,
+    EmployeePerformanceListCreate, EmployeePerformanceBulkCreate, EmployeePerformanceDetail,
+    SoftSkillRatingListCreate, SoftSkillRatingBulkUpsert, SoftSkillRatingDetail,
     OverallAppraisalListCreate, OverallAppraisalDetail,
+    PeriodScoreSummaryList,
     TrainingListCreate, TrainingDetail,
     DevelopmentPlanListCreate, DevelopmentPlanDetail,
     RatingKeyListCreate, RatingKeyDetail,
-    BonusCalculationAPIView,
+    BonusCalculationAPIView, BonusRunListCreate, BonusRunDetail, BonusRunResults,
     CEO_RegisterView, LoginView, PasswordChangeView,
     PasswordResetRequestView, PasswordResetConfirmView
 )
@@ -29,6 +32,7 @@ urlpatterns = [
 
     # User Management (CEO & Supervisors)
     path('users/', UserManagementListCreate.as_view(), name='user-management-list-create'),
+    path('users/bulk/', UserBulkOnboarding.as_view(), name='user-bulk-onboarding'),
     path('users/<int:pk>/', UserManagementDetail.as_view(), name='user-management-detail'),
 
     # Core Data Management (Departments, Roles, etc.)
@@ -38,27 +42,40 @@ urlpatterns = [
     path('roles/', RoleListCreate.as_view(), name='role-list-create'),
     path('roles/<int:pk>/', RoleDetail.as_view(), name='role-detail'),
 
+    path('appraisal-periods/', AppraisalPeriodListCreate.as_view(), name='appraisal-period-list-create'),
+    path('appraisal-periods/<int:pk>/', AppraisalPeriodDetail.as_view(), name='appraisal-period-detail'),
+
     path('metrics/', MetricsListCreate.as_view(), name='metrics-list-create'),
     path('metrics/<int:pk>/', MetricsDetail.as_view(), name='metrics-detail'),
 
     path('pillars/', PillarListCreate.as_view(), name='pillar-list-create'),
     path('pillars/<int:pk>/', PillarDetail.as_view(), name='pillar-detail'),
+    path('pillars/<int:pk>/deletion-plan/', PillarDeletionPlan.as_view(), name='pillar-deletion-plan'),
 
     path('kras/', KeyResultAreaListCreate.as_view(), name='kra-list-create'),
     path('kras/<int:pk>/', KeyResultAreaDetail.as_view(), name='kra-detail'),
+    path('kras/<int:pk>/deletion-plan/', KeyResultAreaDeletionPlan.as_view(), name='kra-deletion-plan'),
+    path('deletion-jobs/', DeletionJobList.as_view(), name='deletion-job-list'),
+    path('deletion-jobs/<int:pk>/', DeletionJobDetail.as_view(), name='deletion-job-detail'),
+
+    path('hierarchy/', HierarchyView.as_view(), name='hierarchy'),
 
     path('performance-targets/', PerformanceTargetListCreate.as_view(), name='performance-target-list-create'),
     path('performance-targets/<int:pk>/', PerformanceTargetDetail.as_view(), name='performance-target-detail'),
 
     path('employee-performance/', EmployeePerformanceListCreate.as_view(), name='employee-performance-list-create'),
+    path('employee-performance/bulk/', EmployeePerformanceBulkCreate.as_view(), name='employee-performance-bulk-create'),
     path('employee-performance/<int:pk>/', EmployeePerformanceDetail.as_view(), name='employee-performance-detail'),
 
     path('soft-skill-ratings/', SoftSkillRatingListCreate.as_view(), name='soft-skill-rating-list-create'),
+    path('soft-skill-ratings/bulk/', SoftSkillRatingBulkUpsert.as_view(), name='soft-skill-rating-bulk-upsert'),
     path('soft-skill-ratings/<int:pk>/', SoftSkillRatingDetail.as_view(), name='soft-skill-rating-detail'),
 
     path('overall-appraisals/', OverallAppraisalListCreate.as_view(), name='overall-appraisal-list-create'),
     path('overall-appraisals/<int:pk>/', OverallAppraisalDetail.as_view(), name='overall-appraisal-detail'),
 
+    path('score-summaries/', PeriodScoreSummaryList.as_view(), name='score-summary-list'),
+
     path('trainings/', TrainingListCreate.as_view(), name='training-list-create'),
     path('trainings/<int:pk>/', TrainingDetail.as_view(), name='training-detail'),
 
@@ -70,4 +87,7 @@ urlpatterns = [
 
     # Bonus Calculation
     path('bonus-calculation/', BonusCalculationAPIView.as_view(), name='bonus-calculation'),
+    path('bonus-runs/', BonusRunListCreate.as_view(), name='bonus-run-list-create'),
+    path('bonus-runs/<int:pk>/', BonusRunDetail.as_view(), name='bonus-run-detail'),
+    path('bonus-runs/<int:pk>/results/', BonusRunResults.as_view(), name='bonus-run-results'),
 ]
\ No newline at end of file
@@ -1,8 +1,13 @@
-from django.core.mail import send_mail
+from contextlib import contextmanager
+
+from django.core.mail import EmailMessage
 from django.conf import settings
+from django.db import connections, transaction
+
+from .outbox import queue_emails
 
-def send_password_email(user_email, password, first_name, last_name):
-    """Send an email with the temporary password to a new user."""
+def password_email(user_email, password, first_name, last_name):
+    """Builds the email carrying a new user's temporary password."""
     subject = "Your WinasSacco Account Password"
     message = f"""
 Hello {first_name} {last_name},
@@ -17,18 +22,30 @@ Please change your password after your first login for security reasons.
 Best regards,
 WinasSacco Team
 """
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [user_email]
-    
-    try:
-        sent = send_mail(
-            subject=subject,
-            message=message,
-            from_email=from_email,
-            recipient_list=recipient_list,
-            fail_silently=False
-        )
-        return sent > 0
-    except Exception as e:
-        print(f"Error sending email to {user_email}: {str(e)}")
-        return False
\ No newline at end of file
+    return EmailMessage(subject=subject, body=message, from_email=settings.DEFAULT_FROM_EMAIL, to=[user_email])
+
+def queue_password_emails(accounts):
+    """
+    Queues the temporary password emails of new accounts, given as (user, password) pairs, in
+    the outbox (see winas.outbox). Call it in the transaction that creates the accounts: the
+    emails are sent by the worker once it commits, so no request waits for the mail server.
+    """
+    queue_emails(
+        password_email(user.email, password, user.first_name, user.last_name) for user, password in accounts
+    )
+
+@contextmanager
+def consistent_snapshot(using='default'):
+    """
+    Opens a transaction in which every read sees the same snapshot of the database.
+    PostgreSQL needs REPEATABLE READ for that; SQLite transactions are already serializable.
+    Inside an already open transaction the isolation level can no longer change, so that
+    transaction's own guarantees apply.
+    """
+    connection = connections[using]
+    outermost = not connection.in_atomic_block
+    with transaction.atomic(using=using):
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        yield
@@ -0,0 +1,107 @@
+# performance_appraisal/versioning.py
+import hashlib
+from email.utils import parsedate_to_datetime
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import TableVersion
+
+
+def bump_table_versions(*models):
+    """
+    Marks the tables of the given models as changed. Called from the post_save/post_delete
+    receivers, and directly by code that writes with bulk_create()/update(), which send no signals.
+    """
+    now = timezone.now()
+    for label in sorted({model._meta.label_lower for model in models}):
+        if TableVersion.objects.filter(table=label).update(version=F('version') + 1, updated_at=now):
+            continue
+        _, created = TableVersion.objects.get_or_create(table=label, defaults={'version': 1, 'updated_at': now})
+        if not created:  # Created concurrently in the meantime
+            TableVersion.objects.filter(table=label).update(version=F('version') + 1, updated_at=now)
+
+
+def table_versions(models):
+    """Returns ({label: version}, last_modified) for the given models with a single query."""
+    labels = sorted({model._meta.label_lower for model in models})
+    versions = {label: 0 for label in labels}
+    last_modified = None
+    for label, version, updated_at in TableVersion.objects.filter(table__in=labels).values_list(
+        'table', 'version', 'updated_at'
+    ):
+        versions[label] = version
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+    return versions, last_modified
+
+
+def _viewer_key(request):
+    """What list scoping depends on besides the data: who is asking and in which role and department."""
+    user = request.user
+    return (
+        getattr(user, 'pk', None), getattr(user, 'role_id', None), getattr(user, 'department_id', None),
+        getattr(user, 'is_staff', False), getattr(user, 'is_superuser', False),
+    )
+
+
+def _etag(*parts):
+    return '"%s"' % hashlib.sha256(repr(parts).encode()).hexdigest()[:40]
+
+
+def list_etag(request, models):
+    """
+    Returns (etag, last_modified) for a list response. The ETag changes whenever any of the
+    tables the response reads from changes, and differs per viewer and per query string.
+    """
+    versions, last_modified = table_versions(models)
+    query = sorted(request.query_params.lists())
+    return _etag(request.path, query, _viewer_key(request), sorted(versions.items())), last_modified
+
+
+def row_etag(request, instance, related_models=()):
+    """
+    Returns (etag, last_modified) for a detail response: the row version is taken from the
+    values of the row itself, combined with the versions of the tables its related fields read from.
+    """
+    own_label = instance._meta.label_lower
+    versions, last_modified = table_versions([type(instance), *related_models])
+    # Writes to other rows of the same table must not change this row's ETag
+    versions.pop(own_label, None)
+    row = tuple(
+        (field.attname, getattr(instance, field.attname)) for field in instance._meta.concrete_fields
+    )
+    query = sorted(request.query_params.lists())
+    return _etag(own_label, row, query, sorted(versions.items())), last_modified
+
+
+def not_modified(request, etag, last_modified):
+    """Returns a 304 response when the client's cached copy is still current, otherwise None."""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        if etag in candidates or '*' in candidates:
+            return with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+        return None
+
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if since is not None and int(last_modified.timestamp()) <= since.timestamp():
+            return with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+    return None
+
+
+def with_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Responses vary per user; shared caches must revalidate them
+    response['Cache-Control'] = 'private, no-cache'
+    return response
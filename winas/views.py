@@ -3,18 +3,19 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.db.models import Sum
+from django.db.models import ProtectedError
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from django.db import models
+from django.utils.text import slugify
 
-from decimal import Decimal
 from django.contrib.auth import authenticate, login # Import login for session auth if needed
 
 from .models import (
-    Department, Role, User, Metrics, Pillar, KeyResultArea, PerformanceTarget,
+    Department, Role, User, Metrics, Pillar, KeyResultArea, KPI, PerformanceTarget,
     EmployeePerformance, SoftSkillRating, OverallAppraisal, Training,
-    DevelopmentPlan, RatingKey
+    DevelopmentPlan, RatingKey, BonusRun, PeriodScoreSummary, AppraisalPeriod, DeletionJob, normalize_period_label
 )
 from .serializers import (
     DepartmentSerializer, RoleSerializer, UserSerializer, MetricsSerializer, PillarSerializer,
@@ -23,19 +24,63 @@ from .serializers import (
     DevelopmentPlanSerializer, RatingKeySerializer, BonusCalculationSerializer,
     CEO_RegisterSerializer, LoginSerializer, SupervisorCreationSerializer,
     EmployeeCreationSerializer, PasswordChangeSerializer, PasswordResetRequestSerializer,
-    PasswordResetConfirmSerializer
+    PasswordResetConfirmSerializer, BonusRunSerializer, BonusResultSerializer, PeriodScoreSummarySerializer,
+    AppraisalPeriodSerializer, DeletionJobSerializer
 )
+from .authentication import add_authorization_claims
 from .permissions import IsAdminOrCEO, IsSupervisorOrAdmin, IsOwnerOrAdmin, IsCEO, IsDepartmentSupervisor
+from .bulk import (
+    create_performance_records, upsert_soft_skill_ratings, onboard_employees, parse_onboarding_csv, BulkUploadError
+)
+from .bonus import iter_bonuses, BONUS_RESULT_FIELDS, request_bonus_run, BonusCalculationError
+from .deletion import plan_deletion, request_deletion, blocked_message
+from .exports import EXPORT_FORMATS, streaming_export
+from .summaries import appraisal_scores
+from .pagination import wants_pagination
+from .readers import ValuesReader
+from .filters import QueryFilter, date_range_filters, filter_queryset, text
+from .versioning import list_etag, row_etag, not_modified, with_validators
+from .hierarchy import annotate_hierarchy_counts, hierarchy_snapshot
+from .scoping import scope_queryset
 
 
 # --- Helper function to get tokens after authentication ---
 def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = add_authorization_claims(RefreshToken.for_user(user), user)
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
     }
 
+
+def list_response(view, request, queryset, serializer_class):
+    """
+    Serializes a list view's queryset, one keyset page at a time when the client sends
+    `page_size` or `cursor`, otherwise as the plain array existing clients expect.
+    Only the columns behind the fields chosen with ?fields / ?exclude are loaded, and serializers
+    with `read_from_values` are built straight from .values() rows (see winas.readers).
+    """
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    context = {'request': request}
+    ordering_field, _ = paginator.get_ordering(request, view)
+
+    serializer = serializer_class(context=context)
+    if hasattr(serializer, 'annotate_queryset'):
+        queryset = serializer.annotate_queryset(queryset)
+    reader = ValuesReader.for_serializer(serializer, annotations=queryset.query.annotations)
+    if reader is not None:
+        queryset = reader.values(queryset, extra=[ordering_field])
+        serialize = reader.read
+    else:
+        if hasattr(serializer_class, 'project_queryset'):
+            queryset = serializer_class.project_queryset(queryset, request, keep=[ordering_field])
+        serialize = lambda rows: serializer_class(rows, many=True, context=context).data
+
+    if not wants_pagination(request, paginator):
+        return Response(serialize(queryset))
+    page = paginator.paginate_queryset(queryset, request, view=view)
+    return paginator.get_paginated_response(serialize(page))
+
 # --- Authentication & Registration Views ---
 
 class CEO_RegisterView(APIView):
@@ -153,21 +198,25 @@ class UserManagementListCreate(APIView):
     Handles listing and creating users (supervisors by CEO, employees by supervisor).
     """
     permission_classes = [IsAuthenticated] # Base permission
+    ordering_fields = ['username', 'date_joined']
 
     def get(self, request):
+        etag, last_modified = list_etag(request, [User, Department, Role])
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
         # CEO can view all users
         if request.user.is_superuser and hasattr(request.user, 'role') and request.user.role and request.user.role.role_name == 'CEO':
             users = User.objects.all().select_related('department', 'role')
         # Supervisors can only view users in their department
-        elif hasattr(request.user, 'role') and request.user.role and \
-             request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and request.user.department:
-            users = User.objects.filter(department=request.user.department).select_related('department', 'role')
+        elif request.user.is_supervisor and request.user.department_id:
+            users = User.objects.filter(department_id=request.user.department_id).select_related('department', 'role')
         else:
             # Other users (employees) can only view themselves
             users = User.objects.filter(pk=request.user.pk).select_related('department', 'role')
 
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        return with_validators(list_response(self, request, users, UserSerializer), etag, last_modified)
 
     def post(self, request):
         # CEO creates Supervisors
@@ -180,11 +229,10 @@ class UserManagementListCreate(APIView):
                 "user": UserSerializer(user).data
             }, status=status.HTTP_201_CREATED)
         # Supervisors create Employees in their department
-        elif hasattr(request.user, 'role') and request.user.role and \
-             request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and request.user.department:
+        elif request.user.is_supervisor and request.user.department_id:
             serializer = EmployeeCreationSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            user = serializer.save(department=request.user.department) # Assign to supervisor's department
+            user = serializer.save(department_id=request.user.department_id) # Assign to supervisor's department
             employee_role, created = Role.objects.get_or_create(role_name='Employee')
             user.role = employee_role
             user.save()
@@ -198,6 +246,32 @@ class UserManagementListCreate(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
+class UserBulkOnboarding(APIView):
+    """
+    Creates many employee accounts from a JSON array or an uploaded CSV file, all or nothing.
+    Each new employee receives their temporary password by email.
+    """
+    permission_classes = [IsSupervisorOrAdmin]
+
+    def post(self, request):
+        try:
+            if 'file' in request.FILES:
+                try:
+                    content = request.FILES['file'].read().decode('utf-8-sig')
+                except UnicodeDecodeError:
+                    raise BulkUploadError("The CSV file must be UTF-8 encoded.")
+                rows = parse_onboarding_csv(content)
+            else:
+                rows = request.data
+            users = onboard_employees(rows, request.user)
+        except BulkUploadError as e:
+            return Response({"error": str(e), "rows": e.rows}, status=status.HTTP_400_BAD_REQUEST)
+        created = User.objects.filter(pk__in=[user.pk for user in users]).select_related('department', 'role').order_by('id')
+        return Response({
+            "created": len(users),
+            "users": UserSerializer(created, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+
 class UserManagementDetail(APIView):
     """
     Handles retrieving, updating, and deleting specific users.
@@ -212,17 +286,19 @@ class UserManagementDetail(APIView):
             if obj.pk == request.user.pk:
                 return obj
             # If supervisor, check if user is in their department
-            if hasattr(request.user, 'role') and request.user.role and \
-               request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and \
-               request.user.department == obj.department:
+            if request.user.is_supervisor and request.user.department_id == obj.department_id:
                 return obj
             raise status.HTTP_403_FORBIDDEN("You do not have permission to access this user's data.")
         return obj
 
     def get(self, request, pk):
         user = self.get_object(pk, request)
-        serializer = UserSerializer(user)
-        return Response(serializer.data)
+        etag, last_modified = row_etag(request, user, [Department, Role])
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        serializer = UserSerializer(user, context={'request': request})
+        return with_validators(Response(serializer.data), etag, last_modified)
 
     def put(self, request, pk):
         user = self.get_object(pk, request)
@@ -264,14 +340,24 @@ class ListCreateAPIView(APIView):
     queryset = None
     serializer_class = None
     permission_classes = [IsAuthenticated]
+    filters = {} # {query parameter: QueryFilter} applied to GET lists
+    scope = None # Path to the employee each row belongs to, to limit rows to the requester's (see winas.scoping)
+    version_models = None # Tables the response reads from (default: the queryset's model), for the ETag
 
     def get(self, request, *args, **kwargs):
+        # Validators are taken before the query runs, so a concurrent write can only make them older than the data
+        etag, last_modified = list_etag(request, self.version_models or [self.queryset.model])
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
         queryset = self.queryset.all()
-        if hasattr(self, 'get_queryset_filtered_by_user_or_department'):
-            queryset = self.get_queryset_filtered_by_user_or_department(request, queryset)
-        
-        serializer = self.serializer_class(queryset, many=True)
-        return Response(serializer.data)
+        if self.scope is not None:
+            queryset = scope_queryset(queryset, request.user, self.scope)
+        queryset = filter_queryset(request, queryset, self.filters)
+
+        response = list_response(self, request, queryset, self.serializer_class)
+        return with_validators(response, etag, last_modified)
 
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
@@ -289,20 +375,29 @@ class RetrieveUpdateDestroyAPIView(APIView):
     queryset = None
     serializer_class = None
     permission_classes = [IsAuthenticated]
+    version_models = None # Related tables the response reads from, for the ETag
+    scope = None # Path to the employee each row belongs to, to limit rows to the requester's (see winas.scoping)
 
     def get_object(self, pk):
-        try:
-            obj = self.queryset.get(pk=pk)
-            # Apply object-level permission check
-            self.check_object_permissions(self.request, obj)
-            return obj
-        except self.queryset.model.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
+        queryset = self.queryset
+        if self.scope is not None:
+            # Rows the requester may not see are not found, in the same single query
+            queryset = scope_queryset(queryset, self.request.user, self.scope)
+        obj = get_object_or_404(queryset, pk=pk)
+        # Apply object-level permission check
+        self.check_object_permissions(self.request, obj)
+        return obj
 
     def get(self, request, pk, *args, **kwargs):
         obj = self.get_object(pk)
-        serializer = self.serializer_class(obj)
-        return Response(serializer.data)
+        if isinstance(obj, Response):
+            return obj
+        etag, last_modified = row_etag(request, obj, self.version_models or [])
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        serializer = self.serializer_class(obj, context={'request': request})
+        return with_validators(Response(serializer.data), etag, last_modified)
 
     def put(self, request, pk, *args, **kwargs):
         obj = self.get_object(pk)
@@ -344,14 +439,40 @@ class RoleDetail(RetrieveUpdateDestroyAPIView):
     serializer_class = RoleSerializer
     permission_classes = [IsAdminOrCEO]
 
+class AppraisalPeriodListCreate(ListCreateAPIView):
+    queryset = AppraisalPeriod.objects.all()
+    serializer_class = AppraisalPeriodSerializer
+    permission_classes = [IsAdminOrCEO] # CEO opens and closes appraisal periods
+    filters = {
+        'status': QueryFilter('status', text, many=False),
+    }
+
+class AppraisalPeriodDetail(RetrieveUpdateDestroyAPIView):
+    queryset = AppraisalPeriod.objects.all()
+    serializer_class = AppraisalPeriodSerializer
+    permission_classes = [IsAdminOrCEO]
+
+    def delete(self, request, pk, *args, **kwargs):
+        obj = self.get_object(pk)
+        try:
+            obj.delete()
+        except ProtectedError:
+            return Response(
+                {"error": "Cannot delete this appraisal period because records belong to it."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 class MetricsListCreate(ListCreateAPIView):
-    queryset = Metrics.objects.all().prefetch_related('pillars')
+    queryset = Metrics.objects.all()
     serializer_class = MetricsSerializer
+    version_models = [Metrics, Pillar, KeyResultArea, KPI, PerformanceTarget]
     permission_classes = [IsSupervisorOrAdmin]
 
 class MetricsDetail(RetrieveUpdateDestroyAPIView):
-    queryset = Metrics.objects.all().prefetch_related('pillars')
+    queryset = annotate_hierarchy_counts(Metrics.objects.all())
     serializer_class = MetricsSerializer
+    version_models = [Metrics, Pillar, KeyResultArea, KPI, PerformanceTarget]
     permission_classes = [IsSupervisorOrAdmin]
     
     def delete(self, request, pk, *args, **kwargs):
@@ -368,50 +489,104 @@ class MetricsDetail(RetrieveUpdateDestroyAPIView):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+
+def queue_deletion(request, obj):
+    """
+    Plans the deletion of a pillar or KRA and queues it for the worker, answering 202 with the job.
+    A deletion that performance records or soft skill ratings block is refused with 400 and the plan.
+    """
+    plan = plan_deletion(obj)
+    if plan.blocked:
+        return Response({"error": blocked_message(plan), "plan": plan.as_dict()}, status=status.HTTP_400_BAD_REQUEST)
+    job, _ = request_deletion(plan, requested_by=request.user)
+    return Response(DeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
 class PillarListCreate(ListCreateAPIView):
-    queryset = Pillar.objects.all()
+    queryset = Pillar.objects.all().select_related('metrics', 'performance_target')
     serializer_class = PillarSerializer
+    version_models = [Pillar, Metrics, KeyResultArea, KPI, PerformanceTarget]
     permission_classes = [IsSupervisorOrAdmin]
 
 class PillarDetail(RetrieveUpdateDestroyAPIView):
-    queryset = Pillar.objects.all()
+    queryset = annotate_hierarchy_counts(Pillar.objects.all().select_related('metrics', 'performance_target'))
     serializer_class = PillarSerializer
+    version_models = [Pillar, Metrics, KeyResultArea, KPI, PerformanceTarget]
     permission_classes = [IsSupervisorOrAdmin]
     
     def delete(self, request, pk, *args, **kwargs):
-        try:
-            obj = self.get_object(pk)
-            # Delete the Pillar which will cascade to delete associated KRAs and KPIs (PerformanceTargets)
-            obj.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # The Pillar cascades to its KRAs, KPIs and PerformanceTargets, deleted by the worker
+        return queue_deletion(request, self.get_object(pk))
 
 class KeyResultAreaListCreate(ListCreateAPIView):
     queryset = KeyResultArea.objects.all().select_related('pillar')
     serializer_class = KeyResultAreaSerializer
+    version_models = [KeyResultArea, Pillar, KPI, PerformanceTarget]
     permission_classes = [IsSupervisorOrAdmin]
 
 class KeyResultAreaDetail(RetrieveUpdateDestroyAPIView):
-    queryset = KeyResultArea.objects.all().select_related('pillar')
+    queryset = annotate_hierarchy_counts(KeyResultArea.objects.all().select_related('pillar'))
     serializer_class = KeyResultAreaSerializer
+    version_models = [KeyResultArea, Pillar, KPI, PerformanceTarget]
     permission_classes = [IsSupervisorOrAdmin]
     
     def delete(self, request, pk, *args, **kwargs):
-        obj = self.get_object(pk)
-        # Delete the KRA which will cascade to delete associated KPIs (PerformanceTargets)
-        obj.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        # The KRA cascades to its KPIs and PerformanceTargets, deleted by the worker
+        return queue_deletion(request, self.get_object(pk))
+
+
+class DeletionPlanView(APIView):
+    """
+    Reports what deleting a pillar or KRA would remove, and the records that would block it.
+    """
+    queryset = None
+    permission_classes = [IsSupervisorOrAdmin]
+
+    def get(self, request, pk):
+        plan = plan_deletion(get_object_or_404(self.queryset, pk=pk))
+        return Response(plan.as_dict())
+
+class PillarDeletionPlan(DeletionPlanView):
+    queryset = Pillar.objects.all()
+
+class KeyResultAreaDeletionPlan(DeletionPlanView):
+    queryset = KeyResultArea.objects.all()
+
+class HierarchyView(APIView):
+    """
+    Returns the whole Metrics -> Pillar -> KRA -> KPI / Performance Target tree in one response,
+    served from an in-process snapshot that is rebuilt only after the hierarchy changes.
+    """
+    permission_classes = [IsSupervisorOrAdmin]
+
+    def get(self, request):
+        snapshot = hierarchy_snapshot()
+        cached = not_modified(request, snapshot.etag, None)
+        if cached is not None:
+            return cached
+        response = HttpResponse(snapshot.content, content_type='application/json')
+        return with_validators(response, snapshot.etag, None)
+
 
 class PerformanceTargetListCreate(ListCreateAPIView):
-    queryset = PerformanceTarget.objects.all()
+    queryset = PerformanceTarget.objects.all().select_related('kra__pillar')
     serializer_class = PerformanceTargetSerializer
+    version_models = [PerformanceTarget, KeyResultArea, Pillar]
     permission_classes = [IsSupervisorOrAdmin]
 
 class PerformanceTargetDetail(RetrieveUpdateDestroyAPIView):
-    queryset = PerformanceTarget.objects.all()
+    queryset = PerformanceTarget.objects.all().select_related('kra__pillar')
     serializer_class = PerformanceTargetSerializer
+    version_models = [PerformanceTarget, KeyResultArea, Pillar]
     permission_classes = [IsSupervisorOrAdmin]
+
+    def put(self, request, pk, *args, **kwargs):
+        obj = self.get_object(pk)
+        serializer = self.serializer_class(obj, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.save()
+        # The performance records that took the target's new value, weight or section (see winas.targets)
+        return Response({**serializer.data, 'records_recomputed': getattr(target, '_records_recomputed', 0)})
     
     def delete(self, request, pk, *args, **kwargs):
         obj = self.get_object(pk)
@@ -427,205 +602,215 @@ class PerformanceTargetDetail(RetrieveUpdateDestroyAPIView):
 
 
 class EmployeePerformanceListCreate(ListCreateAPIView):
-    queryset = EmployeePerformance.objects.all().select_related('user', 'performance_target__kra__pillar')
+    queryset = EmployeePerformance.objects.all().select_related('user', 'period', 'performance_target__kra__pillar')
     serializer_class = EmployeePerformanceSerializer
+    version_models = [EmployeePerformance, User, AppraisalPeriod, PerformanceTarget, KeyResultArea]
     permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin] # Supervisors can edit all, owners can view their own
-
-    def get_queryset_filtered_by_user_or_department(self, request, queryset):
-        if request.user.is_staff or request.user.is_superuser:
-            return queryset.all()
-        
-        # Supervisors see performance of employees in their department
-        if hasattr(request.user, 'role') and request.user.role and \
-           request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and request.user.department:
-            return queryset.filter(user__department=request.user.department)
-        
-        # Normal users see only their own performance
-        return queryset.filter(user=request.user)
+    scope = 'user' # Rows are limited to the employee's own, or their department's for supervisors
+    filters = {
+        'period_under_review': QueryFilter('period__label', normalize_period_label, many=False),
+        'period': QueryFilter('period_id'),
+        'user': QueryFilter('user_id'),
+        'department': QueryFilter('user__department_id'),
+        'pillar': QueryFilter('performance_target__kra__pillar_id'),
+        'kra': QueryFilter('performance_target__kra_id'),
+        'section': QueryFilter('section', text),
+    }
 
     def perform_create_with_user_or_department_context(self, serializer, request):
         # Ensure the user assigned to performance is in the supervisor's department
         if not (request.user.is_staff or request.user.is_superuser):
             target_user = serializer.validated_data.get('user')
-            if not target_user or target_user.department != request.user.department:
+            if not target_user or target_user.department_id != request.user.department_id:
                 raise serializer.ValidationError("You can only create performance records for employees in your department.")
         serializer.save()
 
 
+class EmployeePerformanceBulkCreate(APIView):
+    """
+    Creates many performance records from one JSON array, all or nothing.
+    Supervisors can only upload records for employees in their department.
+    """
+    permission_classes = [IsSupervisorOrAdmin]
+
+    def post(self, request):
+        try:
+            records = create_performance_records(request.data, request.user)
+        except BulkUploadError as e:
+            return Response({"error": str(e), "rows": e.rows}, status=status.HTTP_400_BAD_REQUEST)
+        created = EmployeePerformance.objects.filter(pk__in=[record.pk for record in records]) \
+            .select_related('user', 'period', 'performance_target__kra').order_by('id')
+        return Response({
+            "created": len(records),
+            "records": EmployeePerformanceSerializer(created, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+
+
 class EmployeePerformanceDetail(RetrieveUpdateDestroyAPIView):
-    queryset = EmployeePerformance.objects.all().select_related('user', 'performance_target__kra__pillar')
+    queryset = EmployeePerformance.objects.all().select_related('user', 'period', 'performance_target__kra__pillar')
     serializer_class = EmployeePerformanceSerializer
+    version_models = [EmployeePerformance, User, AppraisalPeriod, PerformanceTarget, KeyResultArea]
     permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin]
-
-    def get_object(self, pk):
-        obj = get_object_or_404(self.queryset, pk=pk)
-        # Apply IsOwnerOrAdmin or IsDepartmentSupervisor
-        if not (self.request.user.is_staff or self.request.user.is_superuser):
-            if obj.user == self.request.user: # Owner
-                return obj
-            if hasattr(self.request.user, 'role') and self.request.user.role and \
-               self.request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and \
-               obj.user.department == self.request.user.department: # Department Supervisor
-                return obj
-            raise status.HTTP_403_FORBIDDEN("You do not have permission to access this performance record.")
-        return obj
+    scope = 'user'
 
 
 class SoftSkillRatingListCreate(ListCreateAPIView):
-    queryset = SoftSkillRating.objects.all().select_related('user', 'soft_skill_kra__pillar')
+    queryset = SoftSkillRating.objects.all().select_related('user', 'period', 'soft_skill_kra__pillar')
     serializer_class = SoftSkillRatingSerializer
+    version_models = [SoftSkillRating, User, AppraisalPeriod, KeyResultArea]
     permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin]
-
-    def get_queryset_filtered_by_user_or_department(self, request, queryset):
-        if request.user.is_staff or request.user.is_superuser:
-            return queryset.all()
-        if hasattr(request.user, 'role') and request.user.role and \
-           request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and request.user.department:
-            return queryset.filter(user__department=request.user.department)
-        return queryset.filter(user=request.user)
+    scope = 'user'
+    filters = {
+        'period_under_review': QueryFilter('period__label', normalize_period_label, many=False),
+        'period': QueryFilter('period_id'),
+        'user': QueryFilter('user_id'),
+        'department': QueryFilter('user__department_id'),
+        'pillar': QueryFilter('soft_skill_kra__pillar_id'),
+        'kra': QueryFilter('soft_skill_kra_id'),
+        'section': QueryFilter('section', text),
+    }
 
     def perform_create_with_user_or_department_context(self, serializer, request):
         if not (request.user.is_staff or request.user.is_superuser):
             target_user = serializer.validated_data.get('user')
-            if not target_user or target_user.department != request.user.department:
+            if not target_user or target_user.department_id != request.user.department_id:
                 raise serializer.ValidationError("You can only create soft skill ratings for employees in your department.")
         serializer.save()
 
+class SoftSkillRatingBulkUpsert(APIView):
+    """
+    Creates or replaces a grid of soft skill ratings for one period, all or nothing.
+    Supervisors can only rate employees in their department.
+    """
+    permission_classes = [IsSupervisorOrAdmin]
+
+    def post(self, request):
+        try:
+            counts = upsert_soft_skill_ratings(request.data, request.user)
+        except BulkUploadError as e:
+            return Response({"error": str(e), "rows": e.rows}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(counts)
+
+
 class SoftSkillRatingDetail(RetrieveUpdateDestroyAPIView):
-    queryset = SoftSkillRating.objects.all().select_related('user', 'soft_skill_kra__pillar')
+    queryset = SoftSkillRating.objects.all().select_related('user', 'period', 'soft_skill_kra__pillar')
     serializer_class = SoftSkillRatingSerializer
+    version_models = [SoftSkillRating, User, AppraisalPeriod, KeyResultArea]
     permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin]
-
-    def get_object(self, pk):
-        obj = get_object_or_404(self.queryset, pk=pk)
-        if not (self.request.user.is_staff or self.request.user.is_superuser):
-            if obj.user == self.request.user:
-                return obj
-            if hasattr(self.request.user, 'role') and self.request.user.role and \
-               self.request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and \
-               obj.user.department == self.request.user.department:
-                return obj
-            raise status.HTTP_403_FORBIDDEN("You do not have permission to access this soft skill rating.")
-        return obj
+    scope = 'user'
 
 
 class OverallAppraisalListCreate(ListCreateAPIView):
-    queryset = OverallAppraisal.objects.all().select_related('user', 'appraiser')
+    queryset = OverallAppraisal.objects.all().select_related('user', 'period', 'appraiser')
     serializer_class = OverallAppraisalSerializer
+    version_models = [OverallAppraisal, User, AppraisalPeriod]
     permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin]
-
-    def get_queryset_filtered_by_user_or_department(self, request, queryset):
-        if request.user.is_staff or request.user.is_superuser:
-            return queryset.all()
-        if hasattr(request.user, 'role') and request.user.role and \
-           request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and request.user.department:
-            return queryset.filter(user__department=request.user.department)
-        return queryset.filter(user=request.user)
+    scope = 'user'
+    ordering_fields = ['date_of_appraisal']
+    filters = {
+        'period_under_review': QueryFilter('period__label', normalize_period_label, many=False),
+        'period': QueryFilter('period_id'),
+        'user': QueryFilter('user_id'),
+        'department': QueryFilter('user__department_id'),
+        'appraiser': QueryFilter('appraiser_id'),
+        **date_range_filters('date_of_appraisal', 'date_of_appraisal'),
+    }
 
     def perform_create_with_user_or_department_context(self, serializer, request):
         # Ensure the user being appraised is in the supervisor's department
         if not (request.user.is_staff or request.user.is_superuser):
             target_user = serializer.validated_data.get('user')
-            if not target_user or target_user.department != request.user.department:
+            if not target_user or target_user.department_id != request.user.department_id:
                 raise serializer.ValidationError("You can only create appraisals for employees in your department.")
-        serializer.save(appraiser=request.user) # Set the appraiser to the current user
+
+        # Section scores that were not entered are calculated from the period's performance records and ratings
+        scores = {}
+        validated_data = serializer.validated_data
+        if validated_data.get('strategic_objectives_score') is None or validated_data.get('soft_skills_score') is None:
+            strategic_score, soft_skill_score = appraisal_scores(validated_data['user'].id, validated_data['period'].id)
+            if validated_data.get('strategic_objectives_score') is None:
+                scores['strategic_objectives_score'] = strategic_score
+            if validated_data.get('soft_skills_score') is None:
+                scores['soft_skills_score'] = soft_skill_score
+        serializer.save(appraiser=request.user, **scores) # Set the appraiser to the current user
 
 class OverallAppraisalDetail(RetrieveUpdateDestroyAPIView):
-    queryset = OverallAppraisal.objects.all().select_related('user', 'appraiser')
+    queryset = OverallAppraisal.objects.all().select_related('user', 'period', 'appraiser')
     serializer_class = OverallAppraisalSerializer
+    version_models = [OverallAppraisal, User, AppraisalPeriod]
     permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin]
+    scope = 'user'
 
-    def get_object(self, pk):
-        obj = get_object_or_404(self.queryset, pk=pk)
-        if not (self.request.user.is_staff or self.request.user.is_superuser):
-            if obj.user == self.request.user:
-                return obj
-            if hasattr(self.request.user, 'role') and self.request.user.role and \
-               self.request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and \
-               obj.user.department == self.request.user.department:
-                return obj
-            raise status.HTTP_403_FORBIDDEN("You do not have permission to access this appraisal.")
-        return obj
+
+class PeriodScoreSummaryList(ListCreateAPIView):
+    """
+    Read-only: one materialized score row per employee and period, for dashboards.
+    """
+    queryset = PeriodScoreSummary.objects.all().select_related('user', 'period')
+    serializer_class = PeriodScoreSummarySerializer
+    version_models = [PeriodScoreSummary, User, AppraisalPeriod]
+    permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin]
+    scope = 'user'
+    http_method_names = ['get', 'head', 'options']
+    ordering_fields = ['total_score', 'updated_at']
+    filters = {
+        'period_under_review': QueryFilter('period__label', normalize_period_label, many=False),
+        'period': QueryFilter('period_id'),
+        'user': QueryFilter('user_id'),
+        'department': QueryFilter('user__department_id'),
+    }
 
 
 class TrainingListCreate(ListCreateAPIView):
     queryset = Training.objects.all().select_related('user')
     serializer_class = TrainingSerializer
+    version_models = [Training, User]
     permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin]
-
-    def get_queryset_filtered_by_user_or_department(self, request, queryset):
-        if request.user.is_staff or request.user.is_superuser:
-            return queryset.all()
-        if hasattr(request.user, 'role') and request.user.role and \
-           request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and request.user.department:
-            return queryset.filter(user__department=request.user.department)
-        return queryset.filter(user=request.user)
+    scope = 'user'
 
     def perform_create_with_user_or_department_context(self, serializer, request):
         if not (request.user.is_staff or request.user.is_superuser):
             target_user = serializer.validated_data.get('user')
-            if not target_user or target_user.department != request.user.department:
+            if not target_user or target_user.department_id != request.user.department_id:
                 raise serializer.ValidationError("You can only create training records for employees in your department.")
         serializer.save()
 
 class TrainingDetail(RetrieveUpdateDestroyAPIView):
     queryset = Training.objects.all().select_related('user')
     serializer_class = TrainingSerializer
+    version_models = [Training, User]
     permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin]
+    scope = 'user'
 
-    def get_object(self, pk):
-        obj = get_object_or_404(self.queryset, pk=pk)
-        if not (self.request.user.is_staff or self.request.user.is_superuser):
-            if obj.user == self.request.user:
-                return obj
-            if hasattr(self.request.user, 'role') and self.request.user.role and \
-               self.request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and \
-               obj.user.department == self.request.user.department:
-                return obj
-            raise status.HTTP_403_FORBIDDEN("You do not have permission to access this training record.")
-        return obj
 
 class DevelopmentPlanListCreate(ListCreateAPIView):
     queryset = DevelopmentPlan.objects.all().select_related('user')
     serializer_class = DevelopmentPlanSerializer
+    version_models = [DevelopmentPlan, User]
     permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin]
-
-    def get_queryset_filtered_by_user_or_department(self, request, queryset):
-        if request.user.is_staff or request.user.is_superuser:
-            return queryset.all()
-        if hasattr(request.user, 'role') and request.user.role and \
-           request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and request.user.department:
-            return queryset.filter(user__department=request.user.department)
-        return queryset.filter(user=request.user)
+    scope = 'user'
 
     def perform_create_with_user_or_department_context(self, serializer, request):
         if not (request.user.is_staff or request.user.is_superuser):
             target_user = serializer.validated_data.get('user')
-            if not target_user or target_user.department != request.user.department:
+            if not target_user or target_user.department_id != request.user.department_id:
                 raise serializer.ValidationError("You can only create development plans for employees in your department.")
         serializer.save()
 
 class DevelopmentPlanDetail(RetrieveUpdateDestroyAPIView):
     queryset = DevelopmentPlan.objects.all().select_related('user')
     serializer_class = DevelopmentPlanSerializer
+    version_models = [DevelopmentPlan, User]
     permission_classes = [IsSupervisorOrAdmin | IsOwnerOrAdmin]
+    scope = 'user'
 
-    def get_object(self, pk):
-        obj = get_object_or_404(self.queryset, pk=pk)
-        if not (self.request.user.is_staff or self.request.user.is_superuser):
-            if obj.user == self.request.user:
-                return obj
-            if hasattr(self.request.user, 'role') and self.request.user.role and \
-               self.request.user.role.role_name in ['Supervisor', 'HOD-ICT', 'Ass.ICTM'] and \
-               obj.user.department == self.request.user.department:
-                return obj
-            raise status.HTTP_403_FORBIDDEN("You do not have permission to access this development plan.")
-        return obj
 
 class RatingKeyListCreate(ListCreateAPIView):
     queryset = RatingKey.objects.all().order_by('point_scale_min')
     serializer_class = RatingKeySerializer
     permission_classes = [IsAdminUser]
+    ordering = 'point_scale_min'
+    ordering_fields = ['point_scale_min']
 
 class RatingKeyDetail(RetrieveUpdateDestroyAPIView):
     queryset = RatingKey.objects.all().order_by('point_scale_min')
@@ -643,94 +828,135 @@ class BonusCalculationAPIView(APIView):
         serializer.is_valid(raise_exception=True)
 
         total_bonus_pool = serializer.validated_data['total_bonus_pool']
-        period_under_review = serializer.validated_data['period_under_review']
+        period = serializer.validated_data['period_under_review']
 
-        all_eligible_users = User.objects.filter(is_active=True)
-
-        if not hasattr(User, 'annual_salary') or not isinstance(User._meta.get_field('annual_salary'), (models.DecimalField, models.FloatField)):
+        export_format = request.query_params.get('export')
+        if export_format and export_format not in EXPORT_FORMATS:
             return Response(
-                {"error": "User model must have an 'annual_salary' DecimalField or FloatField for bonus calculation."},
+                {"error": f"Unsupported export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}."},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        sum_of_all_staff_annual_salary = all_eligible_users.aggregate(
-            total_annual_salary=Sum('annual_salary')
-        )['total_annual_salary']
 
-        if not sum_of_all_staff_annual_salary or sum_of_all_staff_annual_salary == Decimal('0.00'):
-            return Response(
-                {"error": "Sum of all staff annual salaries is zero or not found. Cannot calculate bonus."},
-                status=status.HTTP_400_BAD_REQUEST
+        try:
+            bonus_results = iter_bonuses(total_bonus_pool, period.id)
+        except BonusCalculationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if export_format:
+            return streaming_export(
+                bonus_results, BONUS_RESULT_FIELDS, export_format, f"bonus-{slugify(period.label)}"
             )
+        return Response(list(bonus_results), status=status.HTTP_200_OK)
 
-        bonus_results = []
 
-        for user in all_eligible_users:
-            # 1. Calculate Score for Strategic Objectives (Section B)
-            employee_performances = EmployeePerformance.objects.filter(
-                user=user,
-                period_under_review=period_under_review,
-                performance_target__kra__pillar__pillar_name__in=[
-                    "SHARED PERFORMANCE AREAS", "ICT & BUSINESS PROCESSES"
-                ]
-            )
-            total_strategic_weight = Decimal(str(employee_performances.aggregate(sum_weight=Sum('performance_target__weight'))['sum_weight'] or 0))
-            total_strategic_weighted_average = Decimal(str(employee_performances.aggregate(sum_w_avg=Sum('weighted_average'))['sum_w_avg'] or 0))
-
-            strategic_score = Decimal('0.00')
-            if total_strategic_weight > Decimal('0.00'):
-                strategic_score = (total_strategic_weighted_average / total_strategic_weight)
-
-            # 2. Calculate Score for Soft Skills (Section C)
-            soft_skill_ratings = SoftSkillRating.objects.filter(
-                user=user,
-                period_under_review=period_under_review,
-                soft_skill_kra__pillar__pillar_name="SOFT SKILLS"
+
+# --- Stored Bonus Runs (CEO only) ---
+
+class BonusRunListCreate(APIView):
+    """
+    Lists stored bonus runs and queues new ones for the background worker.
+    """
+    permission_classes = [IsAdminOrCEO]
+    ordering = '-id'
+
+    def get(self, request):
+        etag, last_modified = list_etag(request, [BonusRun, User, AppraisalPeriod])
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        runs = BonusRun.objects.select_related('requested_by', 'period')
+        return with_validators(list_response(self, request, runs, BonusRunSerializer), etag, last_modified)
+
+    def post(self, request):
+        serializer = BonusCalculationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        run, created = request_bonus_run(
+            serializer.validated_data['total_bonus_pool'],
+            serializer.validated_data['period_under_review'].id,
+            requested_by=request.user,
+        )
+        # A finished run over identical inputs is returned as-is; anything else is still in progress
+        response_status = status.HTTP_200_OK if run.status == BonusRun.STATUS_COMPLETED else status.HTTP_202_ACCEPTED
+        return Response(BonusRunSerializer(run).data, status=response_status)
+
+
+class BonusRunDetail(APIView):
+    """
+    Returns the status and progress of a single bonus run.
+    """
+    permission_classes = [IsAdminOrCEO]
+
+    def get(self, request, pk):
+        run = get_object_or_404(BonusRun.objects.select_related('requested_by', 'period'), pk=pk)
+        etag, last_modified = row_etag(request, run, [User, AppraisalPeriod])
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        return with_validators(Response(BonusRunSerializer(run, context={'request': request}).data), etag, last_modified)
+
+
+class BonusRunResults(APIView):
+    """
+    Returns the stored per-employee results of a bonus run, one page at a time.
+    """
+    permission_classes = [IsAdminOrCEO]
+
+    def get(self, request, pk):
+        run = get_object_or_404(BonusRun, pk=pk)
+        if run.status != BonusRun.STATUS_COMPLETED:
+            return Response(
+                {"detail": f"Bonus run is {run.status}; results are available once it has completed.",
+                 "run": BonusRunSerializer(run).data},
+                status=status.HTTP_409_CONFLICT
             )
-            total_soft_skill_weight = Decimal(str(soft_skill_ratings.aggregate(sum_weight=Sum('weight'))['sum_weight'] or 0))
-            total_soft_skill_weighted_average = Decimal(str(soft_skill_ratings.aggregate(sum_w_avg=Sum('weighted_average'))['sum_w_avg'] or 0))
 
-            soft_skill_score = Decimal('0.00')
-            if total_soft_skill_weight > Decimal('0.00'):
-                soft_skill_score = (total_soft_skill_weighted_average / total_soft_skill_weight)
+        export_format = request.query_params.get('export')
+        if export_format:
+            if export_format not in EXPORT_FORMATS:
+                return Response(
+                    {"error": f"Unsupported export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            fields = BonusResultSerializer.Meta.fields
+            rows = run.results.order_by('id').values(*fields).iterator(chunk_size=2000)
+            return streaming_export(rows, fields, export_format, f"bonus-run-{run.pk}")
 
-            strategic_percentage_contribution = Decimal('0.70') # 70%
-            soft_skill_percentage_contribution = Decimal('0.30') # 30%
+        paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+        results = BonusResultSerializer.project_queryset(run.results.order_by('id'), request, keep=['id'])
+        page = paginator.paginate_queryset(results, request, view=self)
+        serializer = BonusResultSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
-            score_at_strategic_percentage = strategic_score * strategic_percentage_contribution
-            score_at_soft_skill_percentage = soft_skill_score * soft_skill_percentage_contribution
 
-            total_employee_score = score_at_strategic_percentage + score_at_soft_skill_percentage
-            
-            performance_rating = total_employee_score
+# --- Deletion Jobs ---
 
-            employee_bonus = Decimal('0.00')
-            warning_message = None
+class DeletionJobList(APIView):
+    """
+    Lists the queued, running and finished deletions of pillars and KRAs.
+    """
+    permission_classes = [IsSupervisorOrAdmin]
+    ordering = '-id'
 
-            if user.annual_salary is None:
-                warning_message = f"User {user.username} has no annual salary defined, skipping bonus calculation for them."
-            else:
-                try:
-                    employee_bonus = (user.annual_salary / sum_of_all_staff_annual_salary) * \
-                                     (performance_rating * total_bonus_pool)
-                except Exception as e:
-                    warning_message = f"Error calculating bonus for {user.username}: {e}"
-                    employee_bonus = Decimal('0.00')
-
-
-            bonus_results.append({
-                'user_id': user.id,
-                'username': user.username,
-                'employee_name': user.get_full_name(),
-                'department': user.department.department_name if user.department else None,
-                'role': user.role.role_name if user.role else None,
-                'annual_salary': user.annual_salary,
-                'strategic_score': round(strategic_score, 2),
-                'soft_skill_score': round(soft_skill_score, 2),
-                'total_employee_score': round(total_employee_score, 2),
-                'performance_rating': round(performance_rating, 2),
-                'calculated_bonus': round(employee_bonus, 2),
-                'warnings': warning_message
-            })
-
-        return Response(bonus_results, status=status.HTTP_200_OK)
\ No newline at end of file
+    def get(self, request):
+        etag, last_modified = list_etag(request, [DeletionJob, User])
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        jobs = DeletionJob.objects.select_related('requested_by')
+        return with_validators(list_response(self, request, jobs, DeletionJobSerializer), etag, last_modified)
+
+
+class DeletionJobDetail(APIView):
+    """
+    Returns the status and progress of a single deletion job.
+    """
+    permission_classes = [IsSupervisorOrAdmin]
+
+    def get(self, request, pk):
+        job = get_object_or_404(DeletionJob.objects.select_related('requested_by'), pk=pk)
+        etag, last_modified = row_etag(request, job, [User])
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        return with_validators(Response(DeletionJobSerializer(job, context={'request': request}).data), etag, last_modified)
@@ -56,6 +56,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Reports requests that run too many or repeated (N+1) queries, see winas.querycount
+if DEBUG:
+    MIDDLEWARE.append('winas.querycount.QueryCountMiddleware')
+
 ROOT_URLCONF = 'winas_sacco.urls'
 
 TEMPLATES = [
@@ -139,13 +143,13 @@ CSRF_TRUSTED_ORIGINS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication', # Use JWT for authentication
+        'winas.authentication.ClaimsJWTAuthentication', # JWT, authorized from the token's role and department claims
        
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated', # Default to authenticated access
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'winas.pagination.KeysetPagination',
     'PAGE_SIZE': 10
 }
 
@@ -218,6 +222,24 @@ EMAIL_HOST_USER = 'muasyathegreat4@gmail.com'  # Update with your email
 EMAIL_HOST_PASSWORD = os.environ.get('MAIL_PASSWORD')  # Update with your password or app password
 DEFAULT_FROM_EMAIL = 'WinasSacco <noreply@winassacco.com>'
 
+# Appraisal scoring
+# Pillars whose records make up each appraisal section, the table whose rows are scored in it
+# ('employee_performance' or 'soft_skill_ratings'), and the section's share (%) of the total
+# score; the shares add up to 100. A Metrics weight replaces the share when all pillars of that
+# Metrics belong to one section.
+APPRAISAL_SECTIONS = {
+    'strategic': {
+        'pillars': ["SHARED PERFORMANCE AREAS", "ICT & BUSINESS PROCESSES"],
+        'rows': 'employee_performance',
+        'weight': 70,
+    },
+    'soft_skill': {
+        'pillars': ["SOFT SKILLS"],
+        'rows': 'soft_skill_ratings',
+        'weight': 30,
+    },
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 